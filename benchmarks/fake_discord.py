@@ -0,0 +1,238 @@
+"""An in-process stand-in for the Discord REST API, with Discord's rate-limit behaviour."""
+
+import asyncio
+import itertools
+import json
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+
+from aiohttp import web
+
+from venkatesh.utils.ratelimits import route_key
+
+# Requests allowed per window for each kind of route. Interaction callbacks aren't limited.
+ROUTE_LIMITS = {
+    "POST /channels/{channel}/messages": (5, 5.0),
+    "PATCH /channels/{channel}/messages/{id}": (5, 5.0),
+    "PATCH /guilds/{guild}/members/{id}": (10, 10.0),
+    "PUT /guilds/{guild}/members/{id}/roles/{id}": (10, 10.0),
+    "DELETE /guilds/{guild}/members/{id}/roles/{id}": (10, 10.0),
+}
+DEFAULT_LIMIT = (50, 1.0)
+GLOBAL_LIMIT = (50, 1.0)
+
+
+def _json(data: Any, status: int, headers: dict[str, str]) -> web.Response:
+    # disnake only decodes bodies whose content type is exactly "application/json".
+    return web.Response(
+        body=json.dumps(data).encode(),
+        status=status,
+        headers={**headers, "Content-Type": "application/json"},
+    )
+
+
+def _limit_key(key: str) -> str:
+    method, _, path = key.partition(" ")
+    parts = path.split("/")
+    for index, part in enumerate(parts[:-1]):
+        if part in ("channels", "guilds", "webhooks") and parts[index + 1].isdigit():
+            parts[index + 1] = "{" + part.rstrip("s") + "}"
+    return f"{method} {'/'.join(parts)}"
+
+
+@dataclass
+class Window:
+    """A fixed rate-limit window, as Discord implements them."""
+
+    limit: int
+    period: float
+    remaining: int
+    reset_at: float
+
+    def take(self, now: float) -> bool:
+        """Use up a request from the window, returning whether one was left."""
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.period
+        if self.remaining == 0:
+            return False
+        self.remaining -= 1
+        return True
+
+
+class FakeDiscord:
+    """Answer the REST calls the bot makes, counting them and enforcing rate limits."""
+
+    def __init__(
+        self, bot_user: dict[str, Any], latency: float = 0.0, time_scale: float = 1.0
+    ):
+        self.bot_user = bot_user
+        self.latency = latency
+        # Multiplies every rate-limit window, so long scenarios can be run quicker.
+        self.time_scale = time_scale
+        self.calls: Counter[str] = Counter()
+        self.rate_limited: Counter[str] = Counter()
+        self.windows: dict[str, Window] = {}
+        self.global_window = Window(
+            GLOBAL_LIMIT[0], GLOBAL_LIMIT[1] * time_scale, GLOBAL_LIMIT[0], 0.0
+        )
+        self._ids = itertools.count(1100000000000000000)
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self.url = ""
+
+    def reset(self) -> None:
+        """Forget the calls counted so far."""
+        self.calls.clear()
+        self.rate_limited.clear()
+
+    def start(self) -> str:
+        """Serve on a free local port from a thread of its own, returning the API base URL."""
+        # A separate loop keeps the server's connection tasks and CPU time out of the bot's.
+        ready = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(ready,), daemon=True)
+        self._thread.start()
+        ready.wait()
+        return self.url
+
+    def close(self) -> None:
+        """Stop serving."""
+        if self._loop is not None:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+
+    def _serve(self, ready: threading.Event) -> None:
+        self._loop = asyncio.new_event_loop()
+        app = web.Application()
+        app.router.add_route("*", "/api/v10/{path:.*}", self.handle)
+        runner = web.AppRunner(app, access_log=None)
+        self._loop.run_until_complete(runner.setup())
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        self._loop.run_until_complete(site.start())
+        port = site._server.sockets[0].getsockname()[1]  # type: ignore
+        self.url = f"http://127.0.0.1:{port}/api/v10"
+        ready.set()
+
+        self._loop.run_forever()
+        self._loop.run_until_complete(runner.cleanup())
+        self._loop.close()
+
+    def _window(self, key: str) -> Window:
+        if key not in self.windows:
+            limit, period = ROUTE_LIMITS.get(_limit_key(key), DEFAULT_LIMIT)
+            self.windows[key] = Window(limit, period * self.time_scale, limit, 0.0)
+        return self.windows[key]
+
+    async def handle(self, request: web.Request) -> web.Response:
+        """Answer a single API request."""
+        key = route_key(request.method, request.path)
+        self.calls[key] += 1
+        now = time.monotonic()
+
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+        is_interaction = key.startswith(("POST /interactions/", "POST /webhooks/"))
+        # Like Discord, each channel or guild gets its own window on a route.
+        window = self._window(key)
+        if not is_interaction and not self.global_window.take(now):
+            return self._too_many(key, self.global_window, now, is_global=True)
+        if not is_interaction and not window.take(now):
+            return self._too_many(key, window, now, is_global=False)
+
+        headers = {
+            "X-RateLimit-Limit": str(window.limit),
+            "X-RateLimit-Remaining": str(window.remaining),
+            "X-RateLimit-Reset-After": f"{max(0.0, window.reset_at - now):.3f}",
+            "X-RateLimit-Reset": f"{time.time() + max(0.0, window.reset_at - now):.3f}",
+            "X-RateLimit-Bucket": _limit_key(key),
+        }
+        body = await request.read()
+        payload = json.loads(body) if request.content_type == "application/json" else {}
+        status, data = self._respond(request, payload)
+        if data is None:
+            return web.Response(status=status, headers=headers)
+        return _json(data, status, headers)
+
+    def _too_many(
+        self, key: str, window: Window, now: float, is_global: bool
+    ) -> web.Response:
+        self.rate_limited[key] += 1
+        retry_after = max(0.0, window.reset_at - now)
+        return _json(
+            {
+                "message": "You are being rate limited.",
+                "retry_after": retry_after,
+                "global": is_global,
+            },
+            429,
+            {
+                "Via": "1.1 google",
+                "Retry-After": f"{retry_after:.3f}",
+                "X-RateLimit-Limit": str(window.limit),
+                "X-RateLimit-Remaining": "0",
+                "X-RateLimit-Reset-After": f"{retry_after:.3f}",
+                "X-RateLimit-Global": str(is_global).lower(),
+            },
+        )
+
+    def _message(self, channel_id: str, payload: dict[str, Any]) -> dict[str, Any]:
+        return {
+            "id": str(next(self._ids)),
+            "channel_id": channel_id,
+            "author": self.bot_user,
+            "content": payload.get("content") or "",
+            "timestamp": "2023-01-01T00:00:00+00:00",
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": payload.get("embeds") or [],
+            "components": payload.get("components") or [],
+            "pinned": False,
+            "type": 0,
+        }
+
+    def _respond(
+        self, request: web.Request, payload: dict[str, Any]
+    ) -> tuple[int, Any]:
+        parts = request.path.split("/")[3:]
+        method = request.method
+
+        if parts == ["users", "@me"]:
+            return 200, self.bot_user
+        if parts[0] == "interactions":
+            return 204, None
+        if parts[0] == "webhooks" and method in ("POST", "PATCH", "GET"):
+            return 200, self._message("0", payload)
+        if parts[0] == "channels" and len(parts) == 3 and parts[2] == "messages":
+            if method == "GET":
+                return 200, []
+            return 200, self._message(parts[1], payload)
+        if (
+            parts[0] == "guilds"
+            and len(parts) == 4
+            and parts[2] == "members"
+            and method == "PATCH"
+        ):
+            return 200, {
+                "user": {
+                    "id": parts[3],
+                    "username": "member",
+                    "discriminator": "0",
+                    "avatar": None,
+                },
+                "roles": payload.get("roles", []),
+                "joined_at": "2023-01-01T00:00:00+00:00",
+                "deaf": False,
+                "mute": False,
+                "flags": 0,
+            }
+        if method in ("PUT", "DELETE"):
+            return 204, None
+        return 200, {}
@@ -0,0 +1,189 @@
+"""
+Measure memory use and gateway event throughput for each intent profile.
+
+Each profile runs in its own process against a synthetic guild. The guild is loaded the way
+the profile would receive it from Discord: members are only included when the profile chunks
+at startup, and presences only when the presences intent is enabled. Then a stream of gateway
+events is parsed, limited to the events Discord would send for the profile's intents.
+Finally some members leave, and the run fails unless every leave reached the event the join
+log listens to, which for members that aren't cached is only the raw one.
+
+    python -m benchmarks.intent_profiles --members 10000 --events 100000
+"""
+
+import argparse
+import json
+import os
+import random
+import resource
+import subprocess
+import sys
+import time
+from collections import Counter
+
+from benchmarks.synthetic import (
+    FIRST_MEMBER_ID,
+    GUILD_ID,
+    connection_state,
+    guild_payload,
+    member_payload,
+    presence_payload,
+    user_payload,
+)
+from venkatesh.constants import Channels
+from venkatesh.utils.profiles import PROFILES
+
+
+def rss() -> int:
+    """Current resident set size in bytes."""
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Peak rather than current RSS, in kilobytes on Linux and bytes on macOS.
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def event_stream(intents, members: int, count: int, seed: int = 1):
+    """Gateway events in roughly the mix a busy guild produces, filtered by intents."""
+    rng = random.Random(seed)
+    kinds = []
+    if intents.presences:
+        kinds += ["PRESENCE_UPDATE"] * 20
+    if intents.members:
+        kinds += ["GUILD_MEMBER_UPDATE"]
+    if intents.guild_messages:
+        kinds += ["MESSAGE_CREATE"] * 3
+
+    for index in range(count):
+        kind = rng.choice(kinds)
+        member_id = FIRST_MEMBER_ID + rng.randrange(members)
+        if kind == "PRESENCE_UPDATE":
+            yield kind, presence_payload(member_id, rng)
+        elif kind == "GUILD_MEMBER_UPDATE":
+            yield kind, {**member_payload(member_id, rng), "guild_id": str(GUILD_ID)}
+        else:
+            yield kind, {
+                "id": str(FIRST_MEMBER_ID * 2 + index),
+                "channel_id": str(Channels.log),
+                "guild_id": str(GUILD_ID),
+                "author": member_payload(member_id, rng)["user"],
+                "member": {"roles": [], "joined_at": "2023-01-01T00:00:00+00:00"},
+                "content": "hello",
+                "timestamp": "2023-01-01T00:00:00+00:00",
+                "edited_timestamp": None,
+                "tts": False,
+                "mention_everyone": False,
+                "mentions": [],
+                "mention_roles": [],
+                "attachments": [],
+                "embeds": [],
+                "pinned": False,
+                "type": 0,
+            }
+
+
+def measure(name: str, members: int, events: int) -> dict:
+    """Load the synthetic guild and replay events under a single profile."""
+    profile = PROFILES[name]
+    intents = profile.intents()
+    baseline = rss()
+
+    state = connection_state(
+        intents, profile.member_cache_flags(intents), profile.chunk_guilds_at_startup
+    )
+    data = guild_payload(
+        members,
+        include_members=profile.chunk_guilds_at_startup,
+        include_presences=intents.presences,
+    )
+    state._get_create_guild(data)
+    del data
+    loaded = rss()
+
+    stream = list(event_stream(intents, members, events))
+    start = time.perf_counter()
+    for kind, payload in stream:
+        state.parsers[kind](payload)
+    elapsed = time.perf_counter() - start
+
+    guild = state._get_guild(GUILD_ID)
+    cached = len(guild.members)
+    dispatched: Counter[str] = Counter()
+    state.dispatch = lambda event, *args, **kwargs: dispatched.update([event])
+    leaves = min(members, 100)
+    for member_id in range(FIRST_MEMBER_ID, FIRST_MEMBER_ID + leaves):
+        state.parsers["GUILD_MEMBER_REMOVE"](
+            {"guild_id": str(GUILD_ID), "user": user_payload(member_id)}
+        )
+
+    return {
+        "profile": name,
+        "members": members,
+        "cached_members": cached,
+        "guild_rss_mb": round((loaded - baseline) / 2**20, 2),
+        "total_rss_mb": round(rss() / 2**20, 2),
+        "events": len(stream),
+        "events_per_second": round(len(stream) / elapsed) if elapsed else None,
+        "leaves": leaves,
+        "leaves_cached": dispatched["member_remove"],
+        "leaves_logged": dispatched["raw_member_remove"],
+    }
+
+
+def main() -> None:
+    """Run every requested profile in a fresh interpreter and print the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--members", type=int, default=10000)
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--profile", choices=PROFILES, action="append")
+    parser.add_argument("--json", help="Also write the results to this file.")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(measure(args.profile[0], args.members, args.events)))
+        return
+
+    results = []
+    for name in args.profile or PROFILES:
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "benchmarks.intent_profiles",
+                "--child",
+                "--profile",
+                name,
+                "--members",
+                str(args.members),
+                "--events",
+                str(args.events),
+            ],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        results.append(json.loads(output.splitlines()[-1]))
+
+    columns = list(results[0])
+    print("  ".join(f"{column:>18}" for column in columns))
+    for result in results:
+        print("  ".join(f"{str(result[column]):>18}" for column in columns))
+
+    if args.json:
+        with open(args.json, "w") as file:
+            json.dump(results, file, indent=2)
+
+    missed = [
+        result["profile"]
+        for result in results
+        if result["leaves_logged"] != result["leaves"]
+    ]
+    if missed:
+        sys.exit(f"Leaves never reached the join log under: {', '.join(missed)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Check that registration holds, and their release, reach the other bot processes.
+
+Two processes share registrations over a real IPC broker, wired up by `Bot.share_state`. One
+reserves a registration; the other must reject a conflicting one while it's held, and accept
+it once the first releases its reservation, well before the hold would have expired.
+
+    python -m benchmarks.ipc_registrations
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+from types import SimpleNamespace
+
+# The bot reads these when venkatesh.constants is imported, so they're set first.
+os.environ.setdefault("DATA_DIR", tempfile.mkdtemp(prefix="venkatesh-ipc-"))
+
+from venkatesh.bot import Bot  # noqa: E402
+from venkatesh.utils.ipc import IPCBroker, IPCClient  # noqa: E402
+from venkatesh.utils.registrations import Registration, RegistrationStore  # noqa: E402
+
+HOLDER, RETRIER = 1000, 2000
+# Well short of the 30 second hold, so only a release lets the retry through in time.
+TIMEOUT = 10.0
+
+
+def registration(user_id: int) -> Registration:
+    """A registration with the same details for whichever member submits it."""
+    return Registration(user_id, "Test", "RA0001", "test@example.com", "0", "now")
+
+
+async def wait_for(condition, what: str) -> None:
+    """Poll until a condition holds, failing after TIMEOUT seconds."""
+    deadline = time.monotonic() + TIMEOUT
+    while not condition():
+        if time.monotonic() > deadline:
+            raise SystemExit(f"Timed out waiting for {what}")
+        await asyncio.sleep(0.05)
+
+
+async def child(role: str, socket: Path) -> None:
+    """Run one side of the check in its own process."""
+    store = RegistrationStore(Path(os.environ["DATA_DIR"]) / f"{role}.db")
+    ipc = IPCClient(socket, 0 if role == "holder" else 1)
+    cooldowns = SimpleNamespace(listeners=[], apply=lambda *_: None)
+    bot = SimpleNamespace(
+        cooldowns=cooldowns, registrations=store, _reload_on_signal=lambda: None
+    )
+    Bot.share_state(bot, ipc)
+    seen: set[str] = set()
+    for topic in ("waiting", "checked", "done"):
+        ipc.subscribe(topic, lambda _data, _origin, topic=topic: seen.add(topic))
+    ipc.start()
+    await ipc.connected.wait()
+
+    if role == "holder":
+        await wait_for(lambda: "waiting" in seen, "the retrier")
+        held = registration(HOLDER)
+        assert store.reserve(held)
+        await wait_for(lambda: "checked" in seen, "the retrier to see the hold")
+        store.release(held)
+        await wait_for(lambda: "done" in seen, "the retrier to finish")
+    else:
+        while not store._remote:
+            ipc.publish("waiting")
+            await asyncio.sleep(0.05)
+        attempt = registration(RETRIER)
+        if store.reserve(attempt):
+            raise SystemExit("A registration held by another process was accepted")
+        ipc.publish("checked")
+        await wait_for(lambda: not store._remote, "the release")
+        if not store.reserve(attempt):
+            raise SystemExit("A released registration was still rejected")
+        ipc.publish("done")
+        print("Holds and releases reached the other process")
+
+    # Let the last message go out before disconnecting.
+    await asyncio.sleep(0.2)
+    await ipc.close()
+    await store.close()
+
+
+async def run() -> None:
+    """Start a broker and both sides, failing if either side does."""
+    socket = Path(os.environ["DATA_DIR"]) / "ipc.sock"
+    broker = IPCBroker(socket)
+    await broker.start()
+    try:
+        processes = [
+            await asyncio.create_subprocess_exec(
+                sys.executable,
+                "-m",
+                "benchmarks.ipc_registrations",
+                "--child",
+                role,
+                "--socket",
+                str(socket),
+            )
+            for role in ("holder", "retrier")
+        ]
+        codes = await asyncio.wait_for(
+            asyncio.gather(*(process.wait() for process in processes)), TIMEOUT * 3
+        )
+    finally:
+        await broker.close()
+    if any(codes):
+        raise SystemExit(f"Registration sharing failed (exit codes {codes})")
+
+
+def main() -> None:
+    """Run the check, or one side of it."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument(
+        "--child", choices=["holder", "retrier"], help=argparse.SUPPRESS
+    )
+    parser.add_argument("--socket", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        asyncio.run(child(args.child, args.socket))
+    else:
+        asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main()
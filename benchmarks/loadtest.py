@@ -0,0 +1,419 @@
+"""
+Run the real cogs against a fake Discord API and measure how they cope with bursts of events.
+
+The bot logs in to an in-process REST server with Discord's rate limits, a synthetic guild is
+loaded into its cache, and each scenario replays a burst of gateway events through the same
+parsers the gateway uses. Handler latency comes from the bot's own listener metrics.
+
+    python -m benchmarks.loadtest --events 50 --json results.json
+    python -m benchmarks.loadtest --compare results.json
+"""
+
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable, Iterator
+from datetime import datetime, timezone
+from typing import Any
+
+# The bot reads these when venkatesh.constants is imported, so they're set first.
+os.environ["METRICS_PORT"] = "0"
+os.environ["DATA_DIR"] = tempfile.mkdtemp(prefix="venkatesh-loadtest-")
+os.environ["CONFIG_PATH"] = os.path.join(os.environ["DATA_DIR"], "config.toml")
+os.environ.setdefault("MEMBERLOG_WINDOW", "0.5")
+
+import disnake  # noqa: E402
+
+from benchmarks.fake_discord import FakeDiscord  # noqa: E402
+from benchmarks.synthetic import (  # noqa: E402
+    BOT_ID,
+    FIRST_MEMBER_ID,
+    GUILD_ID,
+    guild_payload,
+    member_payload,
+    user_payload,
+)
+from venkatesh.bot import Bot  # noqa: E402
+from venkatesh.constants import Channels, Departments, Roles  # noqa: E402
+from venkatesh.utils.resolver import constant_ids  # noqa: E402
+
+# A result counts as a regression when it's this much worse than the baseline.
+THRESHOLD = 0.15
+# Latencies are estimated from histogram buckets, so small absolute changes are noise.
+MIN_LATENCY_CHANGE_MS = 10.0
+
+_ids = itertools.count(1200000000000000000)
+# Users who haven't registered yet, outside the synthetic guild's cached members.
+FIRST_NEW_MEMBER_ID = FIRST_MEMBER_ID + 20_000_000
+
+# The components of the messages the interactions come from, as the cogs send them.
+REGISTRATION_BUTTONS = [
+    {
+        "type": 1,
+        "components": [
+            {"type": 2, "style": 3, "label": "Register", "custom_id": "reg_button"},
+            {"type": 2, "style": 2, "label": "Join as Guest", "custom_id": "reg_guest"},
+        ],
+    }
+]
+DEPARTMENT_SELECT = [
+    {
+        "type": 1,
+        "components": [
+            {
+                "type": 3,
+                "custom_id": "reg_dept_select",
+                "min_values": 1,
+                "max_values": 3,
+                "options": [
+                    {"label": name.upper(), "value": str(role_id)}
+                    for name, role_id in constant_ids(Departments).items()
+                ],
+            }
+        ],
+    }
+]
+
+
+def interaction_payload(
+    kind: int,
+    user_id: int,
+    roles: list[int],
+    data: dict[str, Any],
+    components: list[dict[str, Any]] | None = None,
+) -> dict[str, Any]:
+    """An INTERACTION_CREATE payload from a member in the synthetic guild."""
+    interaction_id = next(_ids)
+    payload = {
+        "id": str(interaction_id),
+        "application_id": str(BOT_ID),
+        "type": kind,
+        "token": f"token-{interaction_id}",
+        "version": 1,
+        "guild_id": str(GUILD_ID),
+        "channel_id": str(Channels.rules),
+        "member": {
+            "user": user_payload(user_id),
+            "roles": [str(role) for role in roles],
+            "joined_at": "2023-01-01T00:00:00+00:00",
+            "deaf": False,
+            "mute": False,
+            "flags": 0,
+            "permissions": "0",
+        },
+        "app_permissions": "0",
+        "locale": "en-US",
+        "guild_locale": "en-US",
+        "data": data,
+    }
+    if kind == 3:
+        payload["message"] = {
+            "id": str(next(_ids)),
+            "channel_id": str(Channels.rules),
+            "author": {**user_payload(BOT_ID), "bot": True},
+            "content": "",
+            "timestamp": "2023-01-01T00:00:00+00:00",
+            "edited_timestamp": None,
+            "tts": False,
+            "mention_everyone": False,
+            "mentions": [],
+            "mention_roles": [],
+            "attachments": [],
+            "embeds": [],
+            "components": components or [],
+            "pinned": False,
+            "type": 0,
+            "flags": 0,
+        }
+    return payload
+
+
+def join_storm(count: int, rng: random.Random) -> Iterator[tuple[str, dict]]:
+    """New members joining all at once."""
+    for user_id in range(FIRST_NEW_MEMBER_ID, FIRST_NEW_MEMBER_ID + count):
+        yield "GUILD_MEMBER_ADD", {
+            **member_payload(user_id, rng),
+            "roles": [],
+            "guild_id": str(GUILD_ID),
+        }
+
+
+def button_flood(count: int, rng: random.Random) -> Iterator[tuple[str, dict]]:
+    """Unregistered members pressing the registration and guest buttons."""
+    for index in range(count):
+        custom_id = rng.choice(["reg_button", "reg_guest"])
+        yield "INTERACTION_CREATE", interaction_payload(
+            3,
+            FIRST_NEW_MEMBER_ID + index,
+            [Roles.guest] if rng.random() < 0.5 else [],
+            {"custom_id": custom_id, "component_type": 2},
+            REGISTRATION_BUTTONS,
+        )
+
+
+def modal_flood(count: int, rng: random.Random) -> Iterator[tuple[str, dict]]:
+    """Guests submitting the registration form."""
+    for index in range(count):
+        values = {
+            "Full Name": f"Member {index}",
+            "Registration Number": f"22{rng.randrange(10**8):08d}{index}",
+            "Learner's Email Address": f"member{index}@learner.manipal.edu",
+            "Phone Number": f"{rng.randrange(10**10):010d}",
+        }
+        yield "INTERACTION_CREATE", interaction_payload(
+            5,
+            FIRST_NEW_MEMBER_ID + index,
+            [Roles.guest],
+            {
+                "custom_id": "reg_modal",
+                "components": [
+                    {
+                        "type": 1,
+                        "components": [{"type": 4, "custom_id": key, "value": value}],
+                    }
+                    for key, value in values.items()
+                ],
+            },
+        )
+
+
+def dropdown_churn(count: int, rng: random.Random) -> Iterator[tuple[str, dict]]:
+    """Members changing departments, some of them several times in a row."""
+    departments = list(constant_ids(Departments).values())
+    for _ in range(count):
+        user_id = FIRST_MEMBER_ID + rng.randrange(max(1, count // 3))
+        yield "INTERACTION_CREATE", interaction_payload(
+            3,
+            user_id,
+            [Roles.member, *rng.sample(departments, rng.randint(0, 3))],
+            {
+                "custom_id": "reg_dept_select",
+                "component_type": 3,
+                "values": [
+                    str(role) for role in rng.sample(departments, rng.randint(1, 3))
+                ],
+            },
+            DEPARTMENT_SELECT,
+        )
+
+
+SCENARIOS: dict[str, Callable[[int, random.Random], Iterator[tuple[str, dict]]]] = {
+    "join_storm": join_storm,
+    "button_flood": button_flood,
+    "modal_flood": modal_flood,
+    "dropdown_churn": dropdown_churn,
+}
+
+
+async def settle(bot: Bot, baseline: set[asyncio.Task], timeout: float) -> None:
+    """Wait until queued work, spooled messages and tasks started since the baseline are done."""
+    deadline = time.monotonic() + timeout
+    while True:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError(f"Scenario still running after {timeout}s")
+
+        pending = asyncio.all_tasks() - baseline - {asyncio.current_task()}
+        if pending:
+            await asyncio.wait(pending, timeout=remaining)
+            continue
+
+        await asyncio.wait_for(bot.work_queue.queue.join(), remaining)
+        if bot.spool.pending:
+            await asyncio.sleep(0.05)
+        elif not asyncio.all_tasks() - baseline - {asyncio.current_task()}:
+            return
+
+
+async def run_scenario(
+    bot: Bot,
+    fake: FakeDiscord,
+    name: str,
+    events: int,
+    seed: int,
+    timeout: float,
+) -> dict[str, Any]:
+    """Replay one scenario and summarise how the bot handled it."""
+    stream = list(SCENARIOS[name](events, random.Random(seed)))
+    parsers = bot._connection.parsers
+    listeners = bot.metrics.listener_duration
+    listeners.counts.clear()
+    listeners.sums.clear()
+    fake.reset()
+
+    baseline = asyncio.all_tasks()
+    start = time.perf_counter()
+    for kind, payload in stream:
+        parsers[kind](payload)
+        await asyncio.sleep(0)
+    await settle(bot, baseline, timeout)
+    elapsed = time.perf_counter() - start
+
+    # Only the cogs' handlers, not the library's own bookkeeping listeners.
+    handlers = [
+        dict(labels) for labels in listeners.counts if "." in dict(labels)["listener"]
+    ]
+    durations = {
+        label["listener"]: {
+            "calls": sum(listeners.counts[tuple(sorted(label.items()))]),
+            "p50_ms": round(listeners.quantile(0.5, **label) * 1000, 2),
+            "p99_ms": round(listeners.quantile(0.99, **label) * 1000, 2),
+        }
+        for label in handlers
+    }
+    rest_calls = sum(fake.calls.values())
+    return {
+        "events": len(stream),
+        "seconds": round(elapsed, 3),
+        "events_per_second": round(len(stream) / elapsed, 2),
+        "p50_ms": max((d["p50_ms"] for d in durations.values()), default=0.0),
+        "p99_ms": max((d["p99_ms"] for d in durations.values()), default=0.0),
+        "rest_calls": rest_calls,
+        "rest_calls_per_event": round(rest_calls / len(stream), 3),
+        "rate_limited": sum(fake.rate_limited.values()),
+        "handlers": durations,
+        "routes": dict(fake.calls.most_common()),
+    }
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    """Start the fake API and the bot, then run each requested scenario."""
+    fake = FakeDiscord(
+        {**user_payload(BOT_ID), "bot": True},
+        latency=args.latency / 1000,
+        time_scale=args.time_scale,
+    )
+    disnake.http.Route.BASE = fake.start()
+
+    bot = Bot()
+    await bot.login("loadtest")
+    bot._connection._get_create_guild(
+        guild_payload(args.members, include_members=True, include_presences=False)
+    )
+    bot.load_extensions()
+    await bot.resolver.warm()
+    bot._ready.set()
+    bot.work_queue.start()
+    bot.spool.interval *= args.time_scale
+    bot.spool.start()
+
+    results = {}
+    try:
+        for name in args.scenario or SCENARIOS:
+            results[name] = await run_scenario(
+                bot, fake, name, args.events, args.seed, args.timeout
+            )
+            print(
+                f"{name:>16}: {results[name]['events_per_second']:>8} events/s, "
+                f"p50 {results[name]['p50_ms']:>8} ms, p99 {results[name]['p99_ms']:>8} ms, "
+                f"{results[name]['rest_calls_per_event']:>6} calls/event, "
+                f"{results[name]['rate_limited']} rate limited",
+                file=sys.stderr,
+            )
+    finally:
+        await bot.close()
+        fake.close()
+
+    return results
+
+
+def git_commit() -> str | None:
+    """The commit being measured, if this is a git checkout."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> list[str]:
+    """Print how each scenario changed against a baseline, returning the regressions."""
+    checks = [
+        # Metric, and whether a higher value is better.
+        ("events_per_second", True),
+        ("p50_ms", False),
+        ("p99_ms", False),
+        ("rest_calls_per_event", False),
+        ("rate_limited", False),
+    ]
+    regressions = []
+    print(f"Comparing {current.get('commit')} against {baseline.get('commit')}")
+    for name, result in current["scenarios"].items():
+        old = baseline["scenarios"].get(name)
+        if old is None:
+            continue
+        print(f"\n{name}")
+        for metric, higher_is_better in checks:
+            before, after = old[metric], result[metric]
+            change = (after - before) / before if before else (1.0 if after else 0.0)
+            worse = -change if higher_is_better else change
+            flag = ""
+            if metric.endswith("_ms") and abs(after - before) < MIN_LATENCY_CHANGE_MS:
+                worse = 0.0
+            if worse > THRESHOLD:
+                flag = "  REGRESSION"
+                regressions.append(f"{name} {metric}")
+            print(f"  {metric:>22}: {before:>10} -> {after:>10} ({change:+.1%}){flag}")
+    return regressions
+
+
+def main() -> None:
+    """Run the load test, then save or compare the results."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--scenario", choices=SCENARIOS, action="append")
+    parser.add_argument("--events", type=int, default=30, help="Events per scenario.")
+    parser.add_argument("--members", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="Added to every response, in ms."
+    )
+    parser.add_argument(
+        "--time-scale",
+        type=float,
+        default=1.0,
+        help="Multiplies the fake API's rate-limit windows.",
+    )
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--json", help="Write the results to this file.")
+    parser.add_argument("--compare", help="Compare against results saved with --json.")
+    args = parser.parse_args()
+
+    results = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            key: getattr(args, key)
+            for key in ("events", "members", "seed", "latency", "time_scale")
+        },
+        "scenarios": asyncio.run(run(args)),
+    }
+    output = json.dumps(results, indent=2)
+    if args.json:
+        with open(args.json, "w") as file:
+            file.write(output + "\n")
+    else:
+        print(output)
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        if baseline["config"] != results["config"]:
+            print("Warning: the baseline was run with different options.")
+        if regressions := compare(baseline, results):
+            print(f"\n{len(regressions)} regressions: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+import asyncio
+import random
+from typing import Any
+
+from disnake import ClientUser, Intents, MemberCacheFlags
+from disnake.state import ConnectionState
+
+from venkatesh.constants import Channels, Departments, Roles
+from venkatesh.utils.resolver import constant_ids
+
+GUILD_ID = 1035610000000000000
+BOT_ID = 1035600000000000000
+FIRST_MEMBER_ID = 1040000000000000000
+ROLE_IDS = [
+    *constant_ids(Roles).values(),
+    *constant_ids(Departments).values(),
+]
+
+
+def user_payload(user_id: int) -> dict[str, Any]:
+    """A minimal user object."""
+    return {
+        "id": str(user_id),
+        "username": f"member{user_id % 100000}",
+        "discriminator": "0",
+        "avatar": None,
+        "global_name": None,
+    }
+
+
+def member_payload(user_id: int, rng: random.Random) -> dict[str, Any]:
+    """A guild member with a guest or member role and a few departments."""
+    roles = [Roles.guest if rng.random() < 0.3 else Roles.member]
+    roles += rng.sample(list(constant_ids(Departments).values()), rng.randint(0, 3))
+    return {
+        "user": user_payload(user_id),
+        "roles": [str(role_id) for role_id in roles],
+        "joined_at": "2023-01-01T00:00:00+00:00",
+        "deaf": False,
+        "mute": False,
+        "flags": 0,
+    }
+
+
+def presence_payload(user_id: int, rng: random.Random) -> dict[str, Any]:
+    """A presence update for a member."""
+    status = rng.choice(["online", "idle", "dnd"])
+    return {
+        "user": {"id": str(user_id)},
+        "guild_id": str(GUILD_ID),
+        "status": status,
+        "activities": [{"name": "Visual Studio Code", "type": 0}],
+        "client_status": {"desktop": status},
+    }
+
+
+def guild_payload(
+    members: int, *, include_members: bool, include_presences: bool, seed: int = 0
+) -> dict[str, Any]:
+    """A GUILD_CREATE payload for a guild with `members` members."""
+    rng = random.Random(seed)
+    member_ids = range(FIRST_MEMBER_ID, FIRST_MEMBER_ID + members)
+    data: dict[str, Any] = {
+        "id": str(GUILD_ID),
+        "name": "CodeX",
+        "owner_id": str(BOT_ID),
+        "member_count": members + 1,
+        "large": members > 250,
+        "features": [],
+        "emojis": [],
+        "stickers": [],
+        "roles": [
+            {
+                "id": str(role_id),
+                "name": str(role_id),
+                "permissions": "0",
+                "position": position,
+                "color": 0,
+                "hoist": False,
+                "managed": False,
+                "mentionable": False,
+            }
+            for position, role_id in enumerate([GUILD_ID, *ROLE_IDS])
+        ],
+        "channels": [
+            {"id": str(channel_id), "type": 0, "name": name, "position": 0}
+            for name, channel_id in constant_ids(Channels).items()
+        ],
+        "members": [member_payload(BOT_ID, rng)],
+        "presences": [],
+        "voice_states": [],
+        "threads": [],
+        "stage_instances": [],
+        "guild_scheduled_events": [],
+    }
+    if include_members:
+        data["members"] += [member_payload(member_id, rng) for member_id in member_ids]
+    if include_presences:
+        online = [member_id for member_id in member_ids if rng.random() < 0.3]
+        data["presences"] = [presence_payload(member_id, rng) for member_id in online]
+    return data
+
+
+def connection_state(
+    intents: Intents,
+    member_cache_flags: MemberCacheFlags,
+    chunk_guilds_at_startup: bool,
+    dispatch: Any = lambda *args, **kwargs: None,
+    http: Any = None,
+) -> ConnectionState:
+    """A connection state logged in as the synthetic bot user, without a gateway."""
+    state = ConnectionState(
+        dispatch=dispatch,
+        handlers={},
+        hooks={},
+        http=http,
+        loop=asyncio.get_event_loop(),
+        intents=intents,
+        member_cache_flags=member_cache_flags,
+        chunk_guilds_at_startup=chunk_guilds_at_startup,
+    )
+    state.user = ClientUser(state=state, data={**user_payload(BOT_ID), "bot": True})
+    return state
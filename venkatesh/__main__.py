@@ -1,6 +1,25 @@
-from venkatesh.bot import Bot
+from venkatesh.bot import Bot, ShardedBot
+from venkatesh.constants import Logging, Sharding
+from venkatesh.utils.log import Rotation, setup_logging
 
 
 if __name__ == "__main__":
-    bot = Bot()
-    bot.run()
+    log_file = Logging.file
+    if log_file is not None and Sharding.group is not None:
+        log_file = log_file.with_stem(f"{log_file.stem}-{Sharding.group}")
+    setup_logging(
+        Logging.level,
+        levels=Logging.levels,
+        serialize=Logging.json,
+        path=log_file,
+        rotation=Rotation(Logging.rotation_size, Logging.rotation_interval),
+        retention=Logging.retention,
+    )
+
+    if Sharding.processes > 1 and Sharding.group is None:
+        from venkatesh.launcher import main
+
+        main()
+    else:
+        bot = ShardedBot() if Sharding.enabled else Bot()
+        bot.run()
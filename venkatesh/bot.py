@@ -1,29 +1,76 @@
 import asyncio
-import os
+import signal
+import time
+from collections.abc import Callable, Coroutine
+from dataclasses import asdict
 from datetime import datetime
+from pathlib import Path
+from typing import Any
 
-from disnake import Activity, ActivityType, AllowedMentions, Embed, Intents, Status
+from disnake import (
+    Activity,
+    ActivityType,
+    AllowedMentions,
+    ApplicationCommandInteraction,
+    Embed,
+    Message,
+    Status,
+)
 from disnake.ext import commands
+from loguru import logger
 
 from . import constants
+from .utils.config import Config, ConfigError, load_config
+from .utils.cooldowns import CooldownStore, PersistentCooldownMapping
+from .utils.extensions import walk_extensions
+from .utils.interactions import InteractionRouter
+from .utils.ipc import IPCClient
+from .utils.log import correlated
+from .utils.metrics import BotMetrics
+from .utils.outbound import OutboundScheduler
+from .utils.profiles import PROFILES, missing_intents, uncached_events
+from .utils.ratelimits import RateLimitObserver
+from .utils.registrations import Registration, RegistrationStore
+from .utils.resolver import Resolver
+from .utils.role_edits import RoleEditor
+from .utils.snapshot import GuildSnapshot
+from .utils.spool import MessageSpool, SpooledMessage
+from .utils.templates import TemplateRegistry
+from .utils.watchdog import LoopWatchdog
+from .utils.work_queue import WorkQueue
 
 
 class Bot(commands.Bot):
     """The core of the bot."""
 
-    def __init__(self) -> None:
-        intents = Intents.default()
-        intents.members = True
-        intents.message_content = True
-        intents.presences = True
+    def __init__(self, **options: Any) -> None:
+        self.started_at = time.perf_counter()
+
+        if constants.INTENT_PROFILE not in PROFILES:
+            raise EnvironmentError(
+                f"Unknown INTENT_PROFILE {constants.INTENT_PROFILE!r}, "
+                f"expected one of: {', '.join(PROFILES)}"
+            )
+        self.profile = PROFILES[constants.INTENT_PROFILE]
+        intents = self.profile.intents()
 
         test_guilds = None
         if constants.TEST_GUILDS:
             test_guilds = constants.TEST_GUILDS
 
+        # Processes started by the launcher keep their own files, and share state over IPC.
+        self.group = constants.Sharding.group
+        # With a snapshot of member roles to read from, members are chunked after startup
+        # instead of before.
+        snapshot_path = self.data_file("guild-snapshot.json.gz")
+        self.warm_start = snapshot_path.exists()
+
         super().__init__(
             command_prefix=constants.PREFIX,
             intents=intents,
+            member_cache_flags=self.profile.member_cache_flags(intents),
+            chunk_guilds_at_startup=self.profile.chunk_guilds_at_startup
+            and not self.warm_start,
             status=Status.idle,
             activity=Activity(type=ActivityType.watching, name="over CodeX."),
             test_guilds=test_guilds,
@@ -32,18 +79,255 @@ class Bot(commands.Bot):
                 users=True,
                 replied_user=True,
             ),
+            **options,
         )
 
         self.initiated = False
+        self.config = load_config(constants.CONFIG_PATH)
+        self.ipc = None
+        if self.group is not None:
+            self.ipc = IPCClient(constants.Sharding.ipc_path, self.group)
+        self.resolver = Resolver(self)
+        self.registrations = RegistrationStore(constants.DATA_DIR / "registrations.db")
+        self.cooldowns = CooldownStore(constants.DATA_DIR / "cooldowns.db")
+        self.role_editor = RoleEditor()
+        self.ratelimits = RateLimitObserver()
+        self.metrics = BotMetrics(self)
+        self.ratelimits.listeners.append(self.metrics.observe_request)
+        self.outbound = OutboundScheduler(
+            self.ratelimits,
+            global_rate=constants.Outbound.global_rate,
+            audit_channels=self.audit_channels,
+        )
+        self.outbound.listeners.append(self.metrics.observe_rest_wait)
+        self.watchdog = LoopWatchdog(
+            interval=constants.Watchdog.interval,
+            threshold=constants.Watchdog.threshold,
+        )
+        self.watchdog.listeners.append(self.metrics.observe_loop_lag)
+        self.router = InteractionRouter(self)
+        self.work_queue = WorkQueue(
+            workers=constants.Workers.count,
+            maxsize=constants.Workers.queue_size,
+            retries=constants.Workers.retries,
+        )
+        self.work_queue.listeners.append(self.metrics.observe_job)
+        self.spool = MessageSpool(
+            self.data_file("spool.jsonl"),
+            self.deliver,
+            interval=constants.Spool.interval,
+        )
+        self.templates = TemplateRegistry(
+            constants.ASSETS / "templates", constants.ASSETS
+        )
+        self.templates.load()
+        self._template_watcher: asyncio.Task | None = None
+        # Work left running by cogs as they unload, finished before the bot closes.
+        self._background: set[asyncio.Task] = set()
+        self.snapshot = GuildSnapshot(
+            self, snapshot_path, interval=constants.Snapshot.interval
+        )
+        if self.ipc is not None:
+            self.share_state(self.ipc)
+
+        self.extension_times: dict[str, float] = {}
+        self.lazy_extensions: set[str] = set()
+        self.ready_after: float | None = None
+
+    def run_in_background(self, coro: Coroutine[Any, Any, object]) -> asyncio.Task:
+        """Start a task the bot holds on to, and waits for before it closes."""
+        task = asyncio.create_task(coro)
+        self._background.add(task)
+        task.add_done_callback(self._background.discard)
+        return task
+
+    def data_file(self, name: str) -> Path:
+        """The path of a data file only this process uses."""
+        if self.group is None:
+            return constants.DATA_DIR / name
+        stem, _, extension = name.partition(".")
+        return constants.DATA_DIR / f"{stem}-{self.group}.{extension}"
+
+    def add_cog(self, cog: commands.Cog, *, override: bool = False) -> None:
+        """Add a cog, routing its interactions and restoring its commands' cooldowns."""
+        self.router.add_cog(cog)
+        try:
+            super().add_cog(cog, override=override)
+        except Exception:
+            self.router.remove_cog(cog)
+            raise
+
+        for command in (*cog.walk_commands(), *cog.get_application_commands()):
+            if isinstance(command._buckets, PersistentCooldownMapping):
+                command._buckets.bind(self.cooldowns, command.qualified_name)
+
+    def remove_cog(self, name: str) -> commands.Cog | None:
+        """Remove a cog, along with its interaction routes."""
+        cog = super().remove_cog(name)
+        if cog is not None:
+            self.router.remove_cog(cog)
+        return cog
+
+    def share_state(self, ipc: IPCClient) -> None:
+        """Keep cooldowns, registrations and config reloads in step with the other processes."""
+        self.cooldowns.listeners.append(
+            lambda name, key, state: ipc.publish("cooldown", [name, key, state])
+        )
+        ipc.subscribe("cooldown", lambda data, _: self.cooldowns.apply(*data))
+
+        self.registrations.listeners.append(
+            lambda registration: ipc.publish("registration", asdict(registration))
+        )
+        ipc.subscribe(
+            "registration",
+            lambda data, _: self.registrations.add_remote(Registration(**data)),
+        )
+        self.registrations.release_listeners.append(
+            lambda registration: ipc.publish(
+                "registration_release", asdict(registration)
+            )
+        )
+        ipc.subscribe(
+            "registration_release",
+            lambda data, _: self.registrations.remove_remote(Registration(**data)),
+        )
+
+        ipc.subscribe("config_reload", lambda *_: self._reload_on_signal())
+
+    def reload_config(self) -> tuple[Config, list[str]]:
+        """
+        Read the config again and swap it in, without touching the gateway connection.
+
+        The new config is rejected with a `ConfigError` if it can't be read, or names channels
+        or roles missing from the guild. Returns the previous config and what changed, and
+        dispatches `config_reload` with the old and new configs if anything did.
+        """
+        config = load_config(constants.CONFIG_PATH)
+        if problems := config.validate(self.config_guilds()):
+            raise ConfigError("; ".join(problems))
+
+        old, self.config = self.config, config
+        changes = old.changes(config)
+        if changes:
+            logger.info(f"Config reloaded: {', '.join(changes)}")
+            self.dispatch("config_reload", old, config)
+        return old, changes
+
+    def audit_channels(self) -> set[int]:
+        """The channels the bot keeps records in, whose messages are sent after everything else."""
+        channels = self.config.channels
+        return {channels.log, channels.memberinfo, channels.memberlog}
+
+    def config_guilds(self) -> list:
+        """
+        The guilds the config's IDs are checked against.
+
+        A process started by the launcher only sees the guilds on its own shards, so it
+        checks the config against the guild holding the log channel, or not at all if
+        another process has that guild.
+        """
+        if self.ipc is None:
+            return self.guilds
+        home = self.get_channel(self.config.channels.log)
+        return [home.guild] if home is not None else []
+
+    def _reload_on_signal(self) -> None:
+        try:
+            self.reload_config()
+        except ConfigError as error:
+            logger.error(f"Keeping the current config: {error}")
+
+    def load_timed_extension(self, ext_path: str) -> None:
+        """Load an extension, recording how long its import and setup took."""
+        start = time.perf_counter()
+        self.load_extension(ext_path)
+        self.extension_times[ext_path] = time.perf_counter() - start
+        logger.info(
+            f"Extension loaded: {ext_path} ({self.extension_times[ext_path] * 1000:.1f} ms)"
+        )
 
     def load_extensions(self) -> None:
-        """Load all the extensions in the exts/ folder."""
-        for extension in constants.EXTENSIONS.glob("*/*.py"):
-            if extension.name.startswith("_"):
-                continue  # Ignore shadowed files
-            ext_path = str(extension).replace(os.sep, ".")[:-3]  # Truncate .py
-            self.load_extension(ext_path)
-            print(f"Extension loaded: {ext_path}")
+        """Load all the extensions in the exts package, deferring the lazy ones."""
+        for ext_path in walk_extensions():
+            if ext_path in constants.LAZY_EXTENSIONS:
+                self.lazy_extensions.add(ext_path)
+                continue
+            self.load_timed_extension(ext_path)
+
+        for event, intent in missing_intents(
+            self.intents, list(self.extra_events)
+        ).items():
+            logger.warning(
+                f"{event} is listened to, but the {intent} intent is disabled "
+                f"by the {constants.INTENT_PROFILE!r} profile"
+            )
+        for event in uncached_events(
+            self._connection.member_cache_flags, list(self.extra_events)
+        ):
+            logger.warning(
+                f"{event} is listened to, but never fires as the "
+                f"{constants.INTENT_PROFILE!r} profile caches no members"
+            )
+
+    def load_lazy_extensions(self) -> None:
+        """Load every extension that was deferred at startup."""
+        while self.lazy_extensions:
+            self.load_timed_extension(self.lazy_extensions.pop())
+
+    async def process_commands(self, message: Message) -> None:
+        """Invoke the command in a message, loading lazy extensions if it isn't known yet."""
+        if message.author.bot:
+            return
+
+        ctx = await self.get_context(message)
+        if ctx.command is None and ctx.invoked_with and self.lazy_extensions:
+            self.load_lazy_extensions()
+            ctx = await self.get_context(message)
+
+        await self.invoke(ctx)
+
+    async def invoke(self, ctx: commands.Context) -> None:
+        """Invoke a prefix command, tagging its logs with the message ID and timing it."""
+        start = time.perf_counter()
+        with correlated(str(ctx.message.id)):
+            await super().invoke(ctx)
+        if ctx.command is not None:
+            self.metrics.observe_command(
+                ctx.command.qualified_name,
+                "prefix",
+                time.perf_counter() - start,
+                ctx.command_failed,
+            )
+
+    async def process_application_commands(
+        self, interaction: ApplicationCommandInteraction
+    ) -> None:
+        """Invoke an application command, tagging its logs with the interaction ID and timing it."""
+        start = time.perf_counter()
+        with correlated(str(interaction.id)):
+            await super().process_application_commands(interaction)
+        if interaction.application_command is not None:
+            self.metrics.observe_command(
+                interaction.application_command.qualified_name,
+                "application",
+                time.perf_counter() - start,
+                getattr(interaction, "command_failed", False),
+            )
+
+    async def _run_event(
+        self,
+        coro: Callable[..., Coroutine[Any, Any, Any]],
+        event_name: str,
+        *args: Any,
+        **kwargs: Any,
+    ) -> None:
+        start = time.perf_counter()
+        await super()._run_event(coro, event_name, *args, **kwargs)
+        self.metrics.listener_duration.observe(
+            time.perf_counter() - start,
+            event=event_name,
+            listener=getattr(coro, "__qualname__", event_name),
+        )
 
     def run(self) -> None:
         """Run the bot with token present in .env."""
@@ -52,16 +336,46 @@ class Bot(commands.Bot):
                 "Token value is None. Make sure you have configured the TOKEN field in .env"
             )
 
+        # Register commands and listeners before connecting, so no events are missed.
+        self.load_extensions()
         super().run(constants.BOT_TOKEN)
 
+    async def login(self, token: str) -> None:
+        """Log in, then start scheduling requests and observing rate limits and loop lag."""
+        await super().login(token)
+        self.ratelimits.attach(self.http)
+        if constants.Outbound.global_rate:
+            self.outbound.attach(self.http)
+        if constants.Watchdog.interval:
+            self.watchdog.start()
+        if self.ipc is not None:
+            self.ipc.start()
+
     async def on_ready(self) -> None:
         """Runs the bot when connected to Discord and is ready."""
         if not self.initiated:
-            await asyncio.sleep(2)
-            self.load_extensions()
+            self.ready_after = time.perf_counter() - self.started_at
+            self._template_watcher = asyncio.create_task(self.templates.watch())
+            self.spool.start()
+            self.snapshot.start()
+            if self.profile.chunk_guilds_at_startup:
+                self.snapshot.reconcile_all(self.guilds)
+            for problem in self.config.validate(self.config_guilds()):
+                logger.error(f"Config: {problem}")
+            if hasattr(signal, "SIGHUP"):
+                self.loop.add_signal_handler(signal.SIGHUP, self._reload_on_signal)
+            if constants.Metrics.port:
+                # Each process started by the launcher serves its metrics on the next port up.
+                port = constants.Metrics.port + (self.group or 0)
+                try:
+                    await self.metrics.start(constants.Metrics.host, port)
+                except OSError as error:
+                    logger.error(f"Failed to serve metrics on port {port}: {error}")
+            if self.ipc is not None:
+                self.ipc.publish("ready", self.shard_ids)
             await self.startup_alert()
             self.initiated = True
-        print("The bot is online!")
+        logger.info("The bot is online!")
 
     async def startup_alert(self) -> None:
         """Announce bot's presence to the log channel."""
@@ -71,8 +385,67 @@ class Bot(commands.Bot):
             color=constants.Colors.green,
             timestamp=datetime.now(),
         )
-        await self.get_channel(constants.Channels.log).send(embed=embed)
+        embed.add_field(
+            name="Startup Timings", value=self.startup_report(), inline=False
+        )
+
+        await self.spool.post(self.config.channels.log, embed=embed)
+
+    async def deliver(self, message: SpooledMessage) -> None:
+        """Send a message from the spool to its channel."""
+        channel = await self.resolver.fetch_channel(message.channel_id)
+        if channel is None:
+            raise LookupError(f"Channel {message.channel_id} not found")
+
+        await channel.send(
+            content=message.content,
+            embeds=[Embed.from_dict(embed) for embed in message.embeds],
+        )
+
+    def startup_report(self) -> str:
+        """Summarise how long extensions took to load and the bot took to become ready."""
+        lines = [
+            f"`{ext_path.removeprefix('venkatesh.exts.')}` {seconds * 1000:.1f} ms"
+            for ext_path, seconds in sorted(
+                self.extension_times.items(), key=lambda item: item[1], reverse=True
+            )
+        ]
+        lines.append(
+            f"**Extensions:** {sum(self.extension_times.values()) * 1000:.1f} ms"
+        )
+        if self.lazy_extensions:
+            lines.append(f"**Deferred:** {len(self.lazy_extensions)} extensions")
+        if self.ready_after is not None:
+            lines.append(f"**Ready after:** {self.ready_after:.2f} s")
+        return "\n".join(lines)
 
     async def close(self) -> None:
         """Close the bot gracefully."""
+        await self.work_queue.close()
+        await asyncio.gather(*self._background, return_exceptions=True)
+        self.watchdog.stop()
+        if self._template_watcher is not None:
+            self._template_watcher.cancel()
         await super().close()
+        self.outbound.close()
+        await self.metrics.close()
+        await self.registrations.close()
+        await self.cooldowns.close()
+        await self.spool.close()
+        await self.snapshot.close()
+        if self.ipc is not None:
+            await self.ipc.close()
+
+
+class ShardedBot(Bot, commands.AutoShardedBot):
+    """
+    The bot, running several gateway shards in one process.
+
+    Runs the shards in SHARD_IDS out of SHARD_COUNT when started by the launcher, and every
+    shard otherwise.
+    """
+
+    def __init__(self) -> None:
+        super().__init__(
+            shard_count=constants.Sharding.count, shard_ids=constants.Sharding.ids
+        )
@@ -11,9 +11,20 @@ if ENVIRONMENT is None:
 # Environment Vars
 PREFIX = os.getenv("PREFIX", ">")
 BOT_TOKEN = os.getenv("BOT_TOKEN")
+INTENT_PROFILE = os.getenv("INTENT_PROFILE", "standard")
 
 # Paths
-EXTENSIONS = pathlib.Path("venkatesh/exts/")
+ASSETS = pathlib.Path(__file__).parent / "assets"
+DATA_DIR = pathlib.Path(os.getenv("DATA_DIR", "data"))
+# Channels, roles and departments, reloaded on SIGHUP or the `config reload` command
+CONFIG_PATH = pathlib.Path(os.getenv("CONFIG_PATH", "config.toml"))
+
+# Extensions (relative to venkatesh.exts) only loaded once one of their commands is used
+LAZY_EXTENSIONS = [
+    f"venkatesh.exts.{name.strip()}"
+    for name in os.getenv("LAZY_EXTENSIONS", "").split(",")
+    if name.strip()
+]
 
 if TEST_GUILDS := os.getenv("TEST_GUILDS"):
     TEST_GUILDS = [int(x) for x in TEST_GUILDS.split(",")]
@@ -42,7 +53,86 @@ class Departments(NamedTuple):
     cxgd = 1035615934074847232
 
 
+class Logging(NamedTuple):
+    level = os.getenv("LOG_LEVEL", "INFO").upper()
+    # Levels for particular modules or packages, e.g. "venkatesh.exts.logs=WARNING,disnake=INFO"
+    levels = {
+        name.strip(): level.strip().upper()
+        for name, _, level in (
+            item.partition("=") for item in os.getenv("LOG_LEVELS", "").split(",")
+        )
+        if name.strip()
+    }
+    json = os.getenv("LOG_JSON", "false").lower() in ("1", "true", "yes")
+    # Also log as JSON to this file, rotated at either limit and compressed
+    file = pathlib.Path(os.environ["LOG_FILE"]) if os.getenv("LOG_FILE") else None
+    rotation_size = int(float(os.getenv("LOG_ROTATION_MB", 50)) * 2**20)
+    rotation_interval = float(os.getenv("LOG_ROTATION_HOURS", 24)) * 3600
+    retention = os.getenv("LOG_RETENTION", "14 days")
+
+
+class MemberLog(NamedTuple):
+    window = float(os.getenv("MEMBERLOG_WINDOW", 5))
+    batch_size = int(os.getenv("MEMBERLOG_BATCH_SIZE", 10))
+    max_messages = int(os.getenv("MEMBERLOG_MAX_MESSAGES", 3))
+
+
+class Metrics(NamedTuple):
+    host = os.getenv("METRICS_HOST", "127.0.0.1")
+    port = int(os.getenv("METRICS_PORT", 9100))  # 0 disables the endpoint
+
+
+class Outbound(NamedTuple):
+    # REST requests per second across every route; 0 stops scheduling them ahead of time
+    global_rate = float(os.getenv("REST_GLOBAL_RATE", 50))
+
+
+class RaidMode(NamedTuple):
+    threshold = int(os.getenv("RAID_JOIN_THRESHOLD", 10))  # Joins within the window
+    window = float(os.getenv("RAID_JOIN_WINDOW", 10))
+    # Raid mode ends once joins within the window drop below this fraction of the threshold
+    exit_ratio = float(os.getenv("RAID_EXIT_RATIO", 0.5))
+    lock_guests = os.getenv("RAID_LOCK_GUESTS", "false").lower() in ("1", "true", "yes")
+
+
 class Roles(NamedTuple):
     moderator = int(os.getenv("ROLE_MODERATOR", 1037793218756104292))
     guest = int(os.getenv("ROLE_GUEST", 1047567918147321886))
     member = int(os.getenv("ROLE_MEMBER", 1035616682317729792))
+
+
+class Sharding(NamedTuple):
+    # Run as an AutoShardedBot, with SHARD_COUNT shards or as many as Discord recommends
+    enabled = os.getenv("SHARDED", "false").lower() in ("1", "true", "yes")
+    count = int(os.getenv("SHARD_COUNT") or 0) or None
+    # More than one runs shard groups in separate processes, started by the launcher
+    processes = int(os.getenv("SHARD_PROCESSES", 1))
+    ipc_path = pathlib.Path(os.getenv("IPC_SOCKET", DATA_DIR / "ipc.sock"))
+    health_interval = float(os.getenv("SHARD_HEALTH_INTERVAL", 300))
+    # Set by the launcher for each process it starts
+    group = int(os.environ["SHARD_GROUP"]) if os.getenv("SHARD_GROUP") else None
+    ids = [int(x) for x in os.getenv("SHARD_IDS", "").split(",") if x.strip()] or None
+
+
+class Snapshot(NamedTuple):
+    # Seconds between saves of the member snapshot used for warm restarts
+    interval = float(os.getenv("SNAPSHOT_INTERVAL", 300))
+
+
+class Spool(NamedTuple):
+    # Seconds between log and audit messages sent from the on-disk spool
+    interval = float(os.getenv("SPOOL_INTERVAL", 1.0))
+
+
+class Watchdog(NamedTuple):
+    # Seconds between event loop heartbeats; 0 disables the watchdog
+    interval = float(os.getenv("LOOP_LAG_INTERVAL", 0.5))
+    # Seconds the loop can go past a heartbeat before the blocking stack is logged
+    threshold = float(os.getenv("LOOP_LAG_THRESHOLD", 1.0))
+
+
+class Workers(NamedTuple):
+    count = int(os.getenv("WORKERS", 4))
+    # Interactions get a busy reply once this many jobs are waiting
+    queue_size = int(os.getenv("WORK_QUEUE_SIZE", 100))
+    retries = int(os.getenv("WORK_RETRIES", 3))
@@ -1,79 +1,172 @@
+import asyncio
+import math
+import time
+from collections import Counter
 from datetime import datetime
 
-from disnake import Embed, Member, Message, TextChannel
+from disnake import Embed, Guild, Member, RawGuildMemberRemoveEvent, User
 from disnake.ext import commands
 from loguru import logger
 
-from ...constants import Channels, Colors
+from ...bot import Bot
+from ...constants import Colors, MemberLog, RaidMode
+from ...utils.batching import EmbedBatcher
+from ...utils.join_rate import JoinRateMonitor
 
 
 class JoinLeaveLog(commands.Cog):
     """Log members joining and leaving."""
 
-    def __init__(self, bot: commands.Bot):
+    def __init__(self, bot: Bot):
         self.bot = bot
-        self.member_log: TextChannel | None = None
+        self.batcher = EmbedBatcher(
+            self.send_embeds,
+            self.summarize,
+            window=MemberLog.window,
+            batch_size=MemberLog.batch_size,
+            max_messages=MemberLog.max_messages,
+        )
+        self.joins = JoinRateMonitor(RaidMode.threshold, RaidMode.window)
+        # Joins and leaves seen since the last raid summary, while raid mode is on.
+        self.raid_counts: Counter[str] | None = None
+        self.raid_totals: Counter[str] = Counter()
+        self.raid_started: datetime | None = None
+        self.raid_task: asyncio.Task | None = None
         super().__init__()
 
-    async def post_message(self, embed: Embed) -> Message | None:
-        """Send the given message in the joins-and-leaves channel."""
-        if self.member_log is None:
-            await self.bot.wait_until_ready()
-            self.member_log = await self.bot.fetch_channel(Channels.memberlog)
+    def cog_unload(self) -> None:
+        """Flush any buffered embeds before the cog goes away."""
+        if self.raid_task is not None:
+            self.raid_task.cancel()
+        self.bot.run_in_background(self.batcher.close())
+
+    def post_message(self, embed: Embed, kind: str = "other") -> None:
+        """Queue the given embed for the joins-and-leaves channel."""
+        self.batcher.add(embed, kind)
 
-            if self.member_log is None:
-                logger.error(
-                    f"Failed to get log channel with ID ({Channels.memberlog})"
-                )
+    def summarize(self, counts: Counter[str]) -> Embed:
+        """Collapse an overflowing burst of joins and leaves into one embed."""
+        return Embed(
+            title="Member Activity",
+            description=f"**{counts['join']}** members joined and **{counts['leave']}** left"
+            " in the last few seconds.",
+            color=Colors.yellow,
+            timestamp=datetime.now(),
+        )
 
-        return await self.member_log.send(embed=embed)
+    async def send_embeds(self, embeds: list[Embed]) -> None:
+        """Spool a batch of embeds for the joins-and-leaves channel."""
+        await self.bot.spool.post(self.bot.config.channels.memberlog, embeds=embeds)
 
     async def post_formatted_message(
         self,
-        member: Member,
-        title: str,
-        description: str,
-        footer: str,
-        color: int = Colors.green,
+        user: User | Member,
+        guild: Guild,
+        template: str,
+        name: str,
+        kind: str = "other",
     ) -> None:
-        """Formats the log message into an embed."""
-        embed = Embed(
-            title=title, description=description, color=color, timestamp=datetime.now()
+        """Formats the log message into an embed from the given template."""
+        (embed,) = self.bot.templates[template].render(
+            name=name,
+            mention=user.mention,
+            rules=f"<#{self.bot.config.channels.rules}>",
+            avatar=user.display_avatar.url,
+            member_count=guild.member_count,
         )
+        embed.timestamp = datetime.now()
+
+        self.post_message(embed=embed, kind=kind)
 
-        embed.set_author(
-            name="Team CodeX",
-            icon_url="https://codex.mitb.club/brand_enlarged.png",
+    async def send_alert(self, embed: Embed) -> None:
+        """Send an alert to the log channel."""
+        await self.bot.spool.post(self.bot.config.channels.log, embed=embed)
+
+    async def start_raid(self) -> None:
+        """Switch to posting periodic summaries instead of an embed per member."""
+        self.raid_counts = Counter()
+        self.raid_totals = Counter()
+        self.raid_started = datetime.now()
+        self.raid_task = asyncio.create_task(self.watch_raid())
+        self.bot.dispatch("raid_mode", True)
+        logger.warning("Join rate threshold crossed, entering raid mode")
+
+        await self.send_alert(
+            Embed(
+                title="Raid Mode Enabled",
+                description=f"**{RaidMode.threshold}** members joined within "
+                f"{RaidMode.window:g} seconds. Joins and leaves will be summarised in "
+                f"<#{self.bot.config.channels.memberlog}> until things calm down.",
+                color=Colors.orange,
+                timestamp=datetime.now(),
+            )
         )
-        embed.set_thumbnail(url=member.display_avatar.url)
-        embed.set_footer(text=footer)
 
-        await self.post_message(embed=embed)
+    def post_raid_summary(self) -> None:
+        """Queue a summary of the joins and leaves since the last one."""
+        if self.raid_counts:
+            self.post_message(self.summarize(self.raid_counts), kind="summary")
+            self.raid_totals += self.raid_counts
+            self.raid_counts = Counter()
+
+    async def watch_raid(self) -> None:
+        """Post summaries during a raid, and leave raid mode once the join rate drops."""
+        exit_count = math.ceil(RaidMode.threshold * RaidMode.exit_ratio)
+        while True:
+            await asyncio.sleep(RaidMode.window)
+            self.post_raid_summary()
+            if not self.joins.above(exit_count, time.monotonic()):
+                break
+
+        self.raid_counts = None
+        self.raid_task = None
+        self.bot.dispatch("raid_mode", False)
+        logger.info("Join rate back to normal, leaving raid mode")
+
+        await self.send_alert(
+            Embed(
+                title="Raid Mode Disabled",
+                description="The join rate is back to normal.",
+                color=Colors.green,
+                timestamp=datetime.now(),
+            )
+            .add_field(
+                name="Started", value=f"<t:{int(self.raid_started.timestamp())}:T>"
+            )
+            .add_field(name="Joined", value=self.raid_totals["join"])
+            .add_field(name="Left", value=self.raid_totals["leave"])
+        )
 
     @commands.Cog.listener()
     async def on_member_join(self, member: Member) -> None:
         """Logs new members joining the server."""
+        self.joins.record(time.monotonic())
+        if self.raid_counts is None and self.joins.exceeded(time.monotonic()):
+            await self.start_raid()
+
+        if self.raid_counts is not None:
+            self.raid_counts["join"] += 1
+            return
+
         await self.post_formatted_message(
-            member=member,
-            title=f"{member.name} Joined!",
-            description=f"{member.mention}, welcome to **CodeX**! "
-            "We hope you have a great time here. Please go through "
-            f"{(await self.bot.fetch_channel(Channels.rules)).mention} in order to proceed.",
-            footer=f"{member.guild.member_count} Members",
+            member, member.guild, "join", member.name, kind="join"
         )
 
     @commands.Cog.listener()
-    async def on_member_remove(self, member: Member) -> None:
-        """Logs members leaving the server."""
+    async def on_raw_member_remove(self, payload: RawGuildMemberRemoveEvent) -> None:
+        """Logs members leaving the server, whether or not they were cached."""
+        if self.raid_counts is not None:
+            self.raid_counts["leave"] += 1
+            return
+
+        guild = self.bot.get_guild(payload.guild_id)
+        if guild is None:
+            return
         await self.post_formatted_message(
-            member=member,
-            title=f"{member.display_name} Left",
-            description="We hope you enjoyed your time here.",
-            footer=f"{member.guild.member_count} Members",
-            color=Colors.orange,
+            payload.user, guild, "leave", payload.user.display_name, kind="leave"
         )
 
 
-def setup(bot: commands.Bot) -> None:
+def setup(bot: Bot) -> None:
     """Loads the JoinLeaveLog cog."""
     bot.add_cog(JoinLeaveLog(bot))
@@ -0,0 +1,128 @@
+import asyncio
+import time
+from collections import Counter
+from datetime import datetime
+
+from disnake import Embed
+from disnake.ext import commands
+from loguru import logger
+
+from ...bot import Bot
+from ...constants import Colors, Sharding
+
+
+class ShardHealth(commands.Cog):
+    """Report the health of every shard to the log channel."""
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self.disconnects: Counter[int] = Counter()
+        self.down_since: dict[int, float] = {}
+        # The latest report from each process, by group; only the first process collects them.
+        self.reports: dict[int, dict] = {}
+        self.task: asyncio.Task | None = None
+        if bot.ipc is not None:
+            bot.ipc.subscribe("health", self.on_health)
+
+    def cog_unload(self) -> None:
+        """Stop reporting."""
+        if self.task is not None:
+            self.task.cancel()
+        if self.bot.ipc is not None:
+            self.bot.ipc.unsubscribe("health", self.on_health)
+
+    @property
+    def collecting(self) -> bool:
+        """Whether this process posts the reports, rather than sending its own to another."""
+        return self.bot.group in (None, 0)
+
+    @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        """Starts reporting once every shard is connected."""
+        if self.task is None:
+            self.task = asyncio.create_task(self.report_periodically())
+
+    @commands.Cog.listener()
+    async def on_shard_disconnect(self, shard_id: int) -> None:
+        """Notes a shard losing its connection."""
+        self.disconnects[shard_id] += 1
+        self.down_since.setdefault(shard_id, time.time())
+        logger.warning(f"Shard {shard_id} disconnected")
+
+    @commands.Cog.listener()
+    async def on_shard_resumed(self, shard_id: int) -> None:
+        """Notes a shard resuming its session."""
+        self.down_since.pop(shard_id, None)
+
+    @commands.Cog.listener()
+    async def on_shard_ready(self, shard_id: int) -> None:
+        """Notes a shard starting a new session."""
+        self.down_since.pop(shard_id, None)
+
+    def shard_report(self) -> dict:
+        """The state of each shard in this process, since the last report."""
+        shards = {
+            str(shard_id): {
+                "latency": latency,
+                "down_since": self.down_since.get(shard_id),
+                "disconnects": self.disconnects[shard_id],
+                "guilds": sum(guild.shard_id == shard_id for guild in self.bot.guilds),
+            }
+            for shard_id, latency in self.bot.latencies
+        }
+        self.disconnects.clear()
+        return {"at": time.time(), "shards": shards}
+
+    async def on_health(self, report: dict, origin: int | None) -> None:
+        """Keeps the latest report from another process."""
+        if self.collecting and origin is not None:
+            self.reports[origin] = report
+
+    async def report_periodically(self) -> None:
+        """Send or post a health report every SHARD_HEALTH_INTERVAL seconds."""
+        while True:
+            await asyncio.sleep(Sharding.health_interval)
+            report = self.shard_report()
+            if not self.collecting:
+                self.bot.ipc.publish("health", report)
+                continue
+
+            self.reports[self.bot.group or 0] = report
+            await self.bot.spool.post(
+                self.bot.config.channels.log, embed=self.health_embed()
+            )
+
+    def health_embed(self) -> Embed:
+        """Summarise the latest report from every process."""
+        now = time.time()
+        lines, unhealthy = [], 0
+        for group, report in sorted(self.reports.items()):
+            # A process that missed two reports has most likely stopped.
+            stale = now - report["at"] > Sharding.health_interval * 2
+            for shard_id, shard in sorted(
+                report["shards"].items(), key=lambda item: int(item[0])
+            ):
+                if stale:
+                    status = "no report"
+                elif shard["down_since"] is not None:
+                    status = f"down since <t:{int(shard['down_since'])}:T>"
+                else:
+                    status = f"{shard['latency'] * 1000:.0f} ms"
+                unhealthy += stale or shard["down_since"] is not None
+                lines.append(
+                    f"`{shard_id}` (process {group}) {status}, {shard['guilds']} guilds, "
+                    f"{shard['disconnects']} disconnects"
+                )
+
+        return Embed(
+            title="Shard Health",
+            description="\n".join(lines)[:4096] or "No shards reported.",
+            color=Colors.orange if unhealthy else Colors.green,
+            timestamp=datetime.now(),
+        )
+
+
+def setup(bot: Bot) -> None:
+    """Loads the ShardHealth cog, when the bot is sharded."""
+    if isinstance(bot, commands.AutoShardedBot):
+        bot.add_cog(ShardHealth(bot))
@@ -0,0 +1,88 @@
+from datetime import datetime
+
+from disnake import Embed
+from disnake.ext import commands
+
+from ...bot import Bot
+from ...constants import Colors
+from ...utils.config import Config, ConfigError, has_configured_role
+from ...utils.cooldowns import persistent_cooldown
+
+
+class Configuration(commands.Cog):
+    """Inspect and reload the bot's configuration."""
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+
+    @commands.group(invoke_without_command=True)
+    @has_configured_role("moderator")
+    async def config(self, ctx: commands.Context) -> None:
+        """Shows the channels, roles and departments currently in use."""
+        config = self.bot.config
+        embed = Embed(
+            title="Configuration",
+            description=f"**Source:** `{config.source or 'environment'}`",
+            color=Colors.blue,
+            timestamp=datetime.now(),
+        )
+        embed.add_field(
+            name="Channels",
+            value="\n".join(
+                f"{name}: <#{channel_id}>"
+                for name, channel_id in vars(config.channels).items()
+            ),
+        )
+        embed.add_field(
+            name="Roles",
+            value="\n".join(
+                f"{name}: <@&{role_id}>" for name, role_id in vars(config.roles).items()
+            ),
+        )
+        embed.add_field(
+            name="Departments",
+            value="\n".join(
+                f"{department.label}: <@&{department.role_id}>"
+                for department in config.departments
+            ),
+            inline=False,
+        )
+        await ctx.send(embed=embed)
+
+    @config.command()
+    @persistent_cooldown(3, 30)
+    @has_configured_role("moderator")
+    async def reload(self, ctx: commands.Context) -> None:
+        """Reads the config again in every bot process, keeping the gateway connection."""
+        try:
+            _, changes = self.bot.reload_config()
+        except ConfigError as error:
+            return await ctx.send(f"Kept the current config: {error}")
+
+        if self.bot.ipc is not None:
+            self.bot.ipc.publish("config_reload")
+
+        if not changes:
+            return await ctx.send("Config reloaded, nothing changed.")
+        await ctx.send(f"Config reloaded with {len(changes)} changes.")
+
+    @commands.Cog.listener()
+    async def on_config_reload(self, old: Config, new: Config) -> None:
+        """Records what changed in the log channel."""
+        # Every process reloads, and the first one speaks for all of them.
+        if self.bot.group not in (None, 0):
+            return
+        await self.bot.spool.post(
+            new.channels.log,
+            embed=Embed(
+                title="Config Reloaded",
+                description="\n".join(f"`{change}`" for change in old.changes(new)),
+                color=Colors.yellow,
+                timestamp=datetime.now(),
+            ),
+        )
+
+
+def setup(bot: Bot) -> None:
+    """Loads the Configuration cog."""
+    bot.add_cog(Configuration(bot))
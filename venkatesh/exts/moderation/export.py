@@ -0,0 +1,227 @@
+import asyncio
+import csv
+import json
+import re
+from datetime import datetime
+from pathlib import Path
+from typing import Any
+
+from disnake import File, Message, Object
+from disnake.ext import commands
+from loguru import logger
+
+from ...bot import Bot
+from ...constants import DATA_DIR
+from ...utils.config import Config, has_configured_role
+from ...utils.cooldowns import persistent_cooldown
+
+COLUMNS = [
+    "type",
+    "message_id",
+    "timestamp",
+    "user_id",
+    "user",
+    "name",
+    "registration_number",
+    "email",
+    "phone",
+    "old_departments",
+    "new_departments",
+]
+REGISTRATION_FIELDS = {
+    "Full Name": "name",
+    "Registration Number": "registration_number",
+    "Learner's Email Address": "email",
+    "Phone Number": "phone",
+}
+
+_REGISTRATION_TITLE = re.compile(r"Member Registration \((\d+)\)")
+_ROLE_MENTION = re.compile(r"<@&(\d+)>")
+# Department changes recorded before the user ID was added to the footer only have an avatar.
+_AVATAR_USER = re.compile(r"/avatars/(\d+)/")
+_FOOTER_USER = re.compile(r"User ID: (\d+)")
+
+
+def _departments(value: str, config: Config) -> str:
+    keys = []
+    for role_id in map(int, _ROLE_MENTION.findall(value)):
+        department = config.department_roles.get(role_id)
+        keys.append(department.key if department is not None else str(role_id))
+    return " ".join(keys)
+
+
+def parse_record(message: Message, config: Config) -> dict[str, Any] | None:
+    """Turn a memberinfo message back into a record, or None if it isn't one."""
+    if not message.embeds:
+        return None
+
+    embed = message.embeds[0]
+    record = {
+        "message_id": message.id,
+        "timestamp": (embed.timestamp or message.created_at).isoformat(),
+    }
+    fields = {field.name: field.value for field in embed.fields}
+
+    if match := _REGISTRATION_TITLE.fullmatch(embed.title or ""):
+        record |= {"type": "registration", "user_id": int(match[1])}
+        for name, column in REGISTRATION_FIELDS.items():
+            record[column] = fields.get(name)
+        return record
+
+    if embed.title == "Member Departments Changed":
+        user_id = None
+        if match := _FOOTER_USER.fullmatch(embed.footer.text or ""):
+            user_id = int(match[1])
+        elif match := _AVATAR_USER.search(embed.author.icon_url or ""):
+            user_id = int(match[1])
+        return record | {
+            "type": "departments",
+            "user_id": user_id,
+            "user": embed.author.name,
+            "old_departments": _departments(fields.get("Old Departments", ""), config),
+            "new_departments": _departments(fields.get("New Departments", ""), config),
+        }
+    return None
+
+
+class RecordWriter:
+    """Write records to a CSV or JSONL file, a batch at a time off the event loop."""
+
+    def __init__(self, path: Path, format: str, *, batch_size: int = 100):
+        self.path = path
+        self.format = format
+        self.batch_size = batch_size
+        self.count = 0
+        self._buffer: list[dict[str, Any]] = []
+        self._file = path.open("w", encoding="utf-8", newline="")
+        if format == "csv":
+            self._csv = csv.DictWriter(self._file, COLUMNS, extrasaction="ignore")
+            self._csv.writeheader()
+
+    def _write_batch(self, records: list[dict[str, Any]]) -> None:
+        if self.format == "csv":
+            self._csv.writerows(records)
+        else:
+            self._file.writelines(
+                json.dumps(record, ensure_ascii=False) + "\n" for record in records
+            )
+
+    async def write(self, record: dict[str, Any]) -> None:
+        """Buffer a record, writing out the buffer once it's full."""
+        self._buffer.append(record)
+        self.count += 1
+        if len(self._buffer) >= self.batch_size:
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Write out the buffered records."""
+        records, self._buffer = self._buffer, []
+        if records:
+            await asyncio.get_running_loop().run_in_executor(
+                None, self._write_batch, records
+            )
+
+    async def close(self) -> None:
+        """Write out anything buffered and finish the file."""
+        await self.flush()
+        await asyncio.get_running_loop().run_in_executor(None, self._file.close)
+
+    def discard(self) -> None:
+        """Stop writing and delete the file."""
+        self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class Export(commands.Cog):
+    """Export the registration and department records in the memberinfo channel."""
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        self.cursor_path = DATA_DIR / "export-cursor.json"
+        self.running = False
+
+    def load_cursor(self, channel_id: int) -> int | None:
+        """The last message exported from a channel."""
+        if not self.cursor_path.exists():
+            return None
+        return json.loads(self.cursor_path.read_text()).get(str(channel_id))
+
+    def save_cursor(self, channel_id: int, message_id: int) -> None:
+        """Atomically record the last message exported from a channel."""
+        cursors = {}
+        if self.cursor_path.exists():
+            cursors = json.loads(self.cursor_path.read_text())
+        cursors[str(channel_id)] = message_id
+
+        temp = self.cursor_path.with_suffix(".tmp")
+        temp.write_text(json.dumps(cursors))
+        temp.replace(self.cursor_path)
+
+    @commands.command()
+    @persistent_cooldown(1, 60)
+    @has_configured_role("moderator")
+    async def export(
+        self, ctx: commands.Context, format: str = "csv", scope: str = "new"
+    ) -> None:
+        """
+        Exports memberinfo records as a `csv` or `jsonl` file.
+
+        Only messages posted since the last export are included, unless the scope is `all`.
+        """
+        format, scope = format.lower(), scope.lower()
+        if format not in ("csv", "jsonl") or scope not in ("new", "all"):
+            return await ctx.send("Usage: `export [csv|jsonl] [new|all]`")
+        if self.running:
+            return await ctx.send("An export is already running.")
+
+        channel = await self.bot.resolver.fetch_channel(
+            self.bot.config.channels.memberinfo
+        )
+        if channel is None:
+            return await ctx.send("The memberinfo channel could not be found.")
+
+        cursor = self.load_cursor(channel.id) if scope == "new" else None
+        exports = DATA_DIR / "exports"
+        exports.mkdir(parents=True, exist_ok=True)
+        path = exports / f"memberinfo-{datetime.now():%Y%m%d-%H%M%S}.{format}"
+
+        self.running = True
+        writer = RecordWriter(path, format)
+        last = scanned = 0
+        try:
+            async with ctx.typing():
+                # History is fetched a page at a time, and records written in batches as parsed.
+                async for message in channel.history(
+                    limit=None,
+                    after=Object(cursor) if cursor else None,
+                    oldest_first=True,
+                ):
+                    scanned += 1
+                    last = message.id
+                    if (record := parse_record(message, self.bot.config)) is not None:
+                        await writer.write(record)
+            await writer.close()
+        except BaseException:
+            # A partial export is no use, and shouldn't leave personal data lying around.
+            writer.discard()
+            raise
+        finally:
+            self.running = False
+
+        if not scanned:
+            path.unlink()
+            return await ctx.send("There is nothing new to export.")
+
+        summary = f"Exported {writer.count} records from {scanned} messages"
+        if path.stat().st_size > ctx.guild.filesize_limit:
+            logger.info(f"{summary} to {path}")
+            await ctx.send(f"{summary}. The file is too large to upload, see `{path}`.")
+        else:
+            await ctx.send(f"{summary}.", file=File(path))
+            path.unlink()
+        self.save_cursor(channel.id, last)
+
+
+def setup(bot: Bot) -> None:
+    """Loads the Export cog."""
+    bot.add_cog(Export(bot))
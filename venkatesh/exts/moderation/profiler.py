@@ -0,0 +1,162 @@
+import asyncio
+import cProfile
+import io
+import marshal
+import pstats
+import tracemalloc
+from datetime import datetime
+
+from disnake import Embed, File
+from disnake.ext import commands
+
+from ...bot import Bot
+from ...constants import Colors
+from ...utils.config import has_configured_role
+
+MAX_SECONDS = 300
+# Allocations made by tracemalloc itself and by imports aren't the bot's doing.
+MEMORY_FILTERS = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+)
+
+
+def _cpu_report(profiler: cProfile.Profile) -> tuple[pstats.Stats, str, bytes]:
+    stats = pstats.Stats(profiler, stream=(text := io.StringIO()))
+    stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(60)
+    stats.sort_stats(pstats.SortKey.TIME).print_stats(30)
+    # The same format as `dump_stats`, for snakeviz and friends.
+    return stats, text.getvalue(), marshal.dumps(stats.stats)
+
+
+def _memory_report(
+    before: tracemalloc.Snapshot, after: tracemalloc.Snapshot, limit: int
+) -> str:
+    lines = ["Largest allocations:"]
+    lines += map(str, after.statistics("lineno")[:limit])
+    lines += ["", "Largest growth:"]
+    lines += map(str, after.compare_to(before, "lineno")[:limit])
+    return "\n".join(lines)
+
+
+def _snapshot() -> tracemalloc.Snapshot:
+    return tracemalloc.take_snapshot().filter_traces(MEMORY_FILTERS)
+
+
+class Profiler(commands.Cog):
+    """Profile the bot while it runs, to find what is slowing it down."""
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+        # Only one profile runs at a time, as the profilers are process-wide.
+        self.running = False
+
+    @commands.group(invoke_without_command=True)
+    @has_configured_role("moderator")
+    async def profile(self, ctx: commands.Context) -> None:
+        """Shows event loop lag and the latest times the loop was blocked."""
+        watchdog = self.bot.watchdog
+        lag = self.bot.metrics.loop_lag
+        embed = Embed(
+            title="Event Loop",
+            description=f"**Lag:** p50 {(lag.quantile(0.5) or 0) * 1000:.0f} ms, "
+            f"p99 {(lag.quantile(0.99) or 0) * 1000:.0f} ms, "
+            f"max {watchdog.max_lag * 1000:.0f} ms\n"
+            f"**Threshold:** {watchdog.threshold:g} s",
+            color=Colors.blue,
+            timestamp=datetime.now(),
+        )
+        embed.add_field(
+            name="Latest Stalls",
+            value="\n".join(
+                f"<t:{int(stall.at)}:R> {stall.lag:.2f} s in `{stall.task}`"
+                for stall in reversed(watchdog.stalls)
+            )[:1024]
+            or "None yet.",
+            inline=False,
+        )
+
+        files = []
+        if watchdog.stalls:
+            stacks = "\n".join(
+                f"{datetime.fromtimestamp(stall.at)} blocked {stall.lag:.2f}s in "
+                f"{stall.task}:\n{stall.stack}"
+                for stall in watchdog.stalls
+            )
+            files.append(File(io.BytesIO(stacks.encode()), filename="stalls.txt"))
+        await ctx.send(embed=embed, files=files)
+
+    @profile.command(name="cpu")
+    @has_configured_role("moderator")
+    async def profile_cpu(self, ctx: commands.Context, seconds: float = 30) -> None:
+        """Profiles everything run on the event loop for some seconds, attaching the report."""
+        if not 1 <= seconds <= MAX_SECONDS:
+            return await ctx.send(f"Profiles can run for 1 to {MAX_SECONDS} seconds.")
+        if self.running:
+            return await ctx.send("A profile is already running.")
+
+        profiler = cProfile.Profile()
+        self.running = True
+        try:
+            await ctx.send(f"Profiling the event loop for {seconds:g} seconds.")
+            profiler.enable()
+            try:
+                await asyncio.sleep(seconds)
+            finally:
+                profiler.disable()
+        finally:
+            self.running = False
+
+        stats, text, raw = await asyncio.get_running_loop().run_in_executor(
+            None, _cpu_report, profiler
+        )
+        await ctx.send(
+            f"{stats.total_calls} calls took {stats.total_tt:.2f} s of CPU time "
+            f"on the event loop over {seconds:g} seconds.",
+            files=[
+                File(io.BytesIO(text.encode()), filename="profile.txt"),
+                File(io.BytesIO(raw), filename="profile.prof"),
+            ],
+        )
+
+    @profile.command(name="memory")
+    @has_configured_role("moderator")
+    async def profile_memory(
+        self, ctx: commands.Context, seconds: float = 30, limit: int = 25
+    ) -> None:
+        """Traces allocations for some seconds, attaching the largest and fastest growing."""
+        if not 1 <= seconds <= MAX_SECONDS:
+            return await ctx.send(f"Traces can run for 1 to {MAX_SECONDS} seconds.")
+        if self.running:
+            return await ctx.send("A profile is already running.")
+
+        loop = asyncio.get_running_loop()
+        started = not tracemalloc.is_tracing()
+        self.running = True
+        try:
+            await ctx.send(f"Tracing allocations for {seconds:g} seconds.")
+            if started:
+                tracemalloc.start()
+            # Taking a snapshot holds the GIL throughout, so a thread wouldn't keep the loop
+            # running either. The bot stalls while each one is taken, longer the larger the heap.
+            before = _snapshot()
+            await asyncio.sleep(seconds)
+            after = _snapshot()
+            current, peak = tracemalloc.get_traced_memory()
+        finally:
+            if started:
+                tracemalloc.stop()
+            self.running = False
+
+        report = await loop.run_in_executor(
+            None, _memory_report, before, after, min(max(limit, 1), 100)
+        )
+        await ctx.send(
+            f"{current / 2**20:.1f} MiB traced, peaking at {peak / 2**20:.1f} MiB.",
+            file=File(io.BytesIO(report.encode()), filename="memory.txt"),
+        )
+
+
+def setup(bot: Bot) -> None:
+    """Loads the Profiler cog."""
+    bot.add_cog(Profiler(bot))
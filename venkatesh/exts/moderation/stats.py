@@ -0,0 +1,89 @@
+import time
+from datetime import datetime, timedelta
+
+from disnake import Embed
+from disnake.ext import commands
+
+from ...bot import Bot
+from ...constants import Colors
+from ...utils.config import has_configured_role
+from ...utils.cooldowns import persistent_cooldown
+
+
+class Stats(commands.Cog):
+    """Summarise the bot's metrics."""
+
+    def __init__(self, bot: Bot):
+        self.bot = bot
+
+    @commands.command()
+    @persistent_cooldown(3, 30)
+    @has_configured_role("moderator")
+    async def stats(self, ctx: commands.Context) -> None:
+        """Shows latency, event loop lag, API usage and cache sizes."""
+        metrics = self.bot.metrics
+        uptime = timedelta(seconds=int(time.monotonic() - metrics.started_at))
+
+        embed = Embed(
+            title="Bot Statistics",
+            description=f"**Uptime:** {uptime}\n"
+            f"**Gateway Latency:** {self.bot.latency * 1000:.0f} ms\n"
+            f"**Event Loop Lag:** p99 {(metrics.loop_lag.quantile(0.99) or 0) * 1000:.0f} ms, "
+            f"max {self.bot.watchdog.max_lag * 1000:.0f} ms",
+            color=Colors.blue,
+            timestamp=datetime.now(),
+        )
+
+        listeners = []
+        for labels, counts in sorted(
+            metrics.listener_duration.counts.items(), key=lambda item: -sum(item[1])
+        )[:8]:
+            label = dict(labels)
+            p50 = metrics.listener_duration.quantile(0.5, **label) * 1000
+            p99 = metrics.listener_duration.quantile(0.99, **label) * 1000
+            listeners.append(
+                f"`{label['listener']}` {sum(counts)}x, p50 {p50:.0f} ms, p99 {p99:.0f} ms"
+            )
+        embed.add_field(
+            name="Busiest Listeners",
+            value="\n".join(listeners) or "None yet.",
+            inline=False,
+        )
+
+        routes = sorted(
+            metrics.rest_requests.values.items(), key=lambda item: -item[1]
+        )[:5]
+        embed.add_field(
+            name="API Requests",
+            value=f"**Total:** {metrics.rest_requests.total():.0f}, "
+            f"**Rate Limited:** {metrics.rate_limited.total():.0f}\n"
+            + "\n".join(
+                f"`{dict(labels)['route']}` ({dict(labels)['status']}) {count:.0f}x"
+                for labels, count in routes
+            ),
+            inline=False,
+        )
+
+        waits = metrics.rest_queue_wait
+        queues = []
+        for priority, depth in self.bot.outbound.depths().items():
+            name = priority.name.lower()
+            p99 = (waits.quantile(0.99, priority=name) or 0) * 1000
+            queues.append(f"{name}: {depth} waiting, p99 wait {p99:.0f} ms")
+        embed.add_field(name="Outbound Queue", value="\n".join(queues), inline=False)
+
+        sizes = metrics.cache_sizes()
+        embed.add_field(
+            name="Caches",
+            value="\n".join(
+                f"{dict(labels)['cache']}: {size}" for labels, size in sizes.items()
+            ),
+            inline=False,
+        )
+
+        await ctx.send(embed=embed)
+
+
+def setup(bot: Bot) -> None:
+    """Loads the Stats cog."""
+    bot.add_cog(Stats(bot))
@@ -1,23 +1,199 @@
+import time
+from datetime import datetime, timezone
+
+from disnake import AllowedMentions, Embed, TextChannel
 from disnake.ext import commands
 
-from ...constants import Roles
+from ...bot import Bot
+from ...constants import Colors
+from ...utils.announcements import (
+    Announcement,
+    AnnouncementScheduler,
+    Delivery,
+    parse_duration,
+)
+from ...utils.config import has_configured_role
+from ...utils.cooldowns import persistent_cooldown
+
+# Recurring announcements more often than this are almost certainly a typo.
+MIN_INTERVAL = 600
+MAX_CHANNELS = 25
 
 
 class BotRepeats(commands.Cog):
     """Announcements made using the bot."""
 
-    def __init__(self, bot: commands.Bot):
+    def __init__(self, bot: Bot):
         self.bot = bot
+        self.scheduler = AnnouncementScheduler(
+            bot.data_file("announcements.json"), self.send, self.confirm
+        )
+
+    def cog_unload(self) -> None:
+        """Stop posting scheduled announcements."""
+        self.bot.run_in_background(self.scheduler.close())
+
+    @commands.Cog.listener()
+    async def on_ready(self) -> None:
+        """Starts posting scheduled announcements, including any that fell due while offline."""
+        self.scheduler.start()
+
+    async def send(self, channel_id: int, content: str) -> None:
+        """Post an announcement in a channel."""
+        channel = await self.bot.resolver.fetch_channel(channel_id)
+        if channel is None:
+            raise LookupError("channel not found")
+        await channel.send(content, allowed_mentions=AllowedMentions.none())
+
+    async def confirm(self, delivery: Delivery) -> None:
+        """Record the outcome of an announcement in the log channel."""
+        job = delivery.announcement
+        lines = [f"<#{channel_id}> sent" for channel_id in delivery.sent]
+        lines += [
+            f"<#{channel_id}> failed: {error}"
+            for channel_id, error in delivery.failed.items()
+        ]
+        embed = Embed(
+            title=f"Announcement Delivered ({job.id})",
+            description=job.content[:1024],
+            color=Colors.orange if delivery.failed else Colors.green,
+            timestamp=datetime.now(),
+        )
+        embed.add_field(name="Channels", value="\n".join(lines)[:1024], inline=False)
+        embed.add_field(name="Scheduled By", value=f"<@{job.author_id}>")
+        if job.interval:
+            embed.add_field(name="Next Run", value=f"<t:{int(job.next_run)}:R>")
+
+        await self.bot.spool.post(self.bot.config.channels.log, embed=embed)
 
     @commands.command()
-    @commands.cooldown(3, 15)
-    @commands.has_any_role(Roles.moderator)
+    @persistent_cooldown(3, 15)
+    @has_configured_role("moderator")
     async def repeat(self, ctx: commands.Context, *, message: str) -> None:
         """Returns the message specified by the user."""
         await ctx.message.delete()
         await ctx.send(message, allowed_mentions=None)
 
+    async def schedule(
+        self,
+        ctx: commands.Context,
+        next_run: float,
+        interval: float | None,
+        channels: list[TextChannel],
+        message: str,
+    ) -> None:
+        """Queues an announcement and describes when it will be posted."""
+        channels = list(dict.fromkeys(channels or [ctx.channel]))
+        if len(channels) > MAX_CHANNELS:
+            return await ctx.send(
+                f"Announcements can go to at most {MAX_CHANNELS} channels."
+            )
+
+        job = Announcement(
+            content=message,
+            channel_ids=[channel.id for channel in channels],
+            next_run=next_run,
+            author_id=ctx.author.id,
+            interval=interval,
+        )
+        self.scheduler.add(job)
+
+        every = f", then every {interval / 3600:g} hours" if interval else ""
+        await ctx.send(
+            f"Announcement `{job.id}` scheduled for <t:{int(next_run)}:F>{every} in "
+            + " ".join(channel.mention for channel in channels)
+        )
+
+    @commands.group(invoke_without_command=True)
+    @has_configured_role("moderator")
+    async def announce(self, ctx: commands.Context) -> None:
+        """Lists the scheduled announcements."""
+        jobs = sorted(self.scheduler.jobs.values(), key=lambda job: job.next_run)
+        if not jobs:
+            return await ctx.send("No announcements are scheduled.")
+
+        embed = Embed(
+            title="Scheduled Announcements",
+            description="\n".join(
+                f"`{job.id}` <t:{int(job.next_run)}:R>"
+                f"{' (recurring)' if job.interval else ''} in "
+                f"{' '.join(f'<#{channel_id}>' for channel_id in job.channel_ids)}: "
+                f"{job.content[:50]}"
+                for job in jobs
+            )[:4096],
+            color=Colors.blue,
+            timestamp=datetime.now(),
+        )
+        await ctx.send(embed=embed)
+
+    @announce.command(name="in")
+    @has_configured_role("moderator")
+    async def announce_in(
+        self,
+        ctx: commands.Context,
+        delay: str,
+        channels: commands.Greedy[TextChannel],
+        *,
+        message: str,
+    ) -> None:
+        """Posts an announcement after a delay such as `2h30m`, here or in the given channels."""
+        try:
+            seconds = parse_duration(delay)
+        except ValueError as error:
+            return await ctx.send(str(error))
+        await self.schedule(ctx, time.time() + seconds, None, channels, message)
+
+    @announce.command(name="at")
+    @has_configured_role("moderator")
+    async def announce_at(
+        self,
+        ctx: commands.Context,
+        when: str,
+        channels: commands.Greedy[TextChannel],
+        *,
+        message: str,
+    ) -> None:
+        """Posts an announcement at a time such as `2024-01-31T18:00` (UTC, unless given)."""
+        try:
+            moment = datetime.fromisoformat(when)
+        except ValueError:
+            return await ctx.send(f"`{when}` isn't a time like `2024-01-31T18:00`.")
+        if moment.tzinfo is None:
+            moment = moment.replace(tzinfo=timezone.utc)
+        if moment.timestamp() <= time.time():
+            return await ctx.send("That time has already passed.")
+        await self.schedule(ctx, moment.timestamp(), None, channels, message)
+
+    @announce.command(name="every")
+    @has_configured_role("moderator")
+    async def announce_every(
+        self,
+        ctx: commands.Context,
+        interval: str,
+        channels: commands.Greedy[TextChannel],
+        *,
+        message: str,
+    ) -> None:
+        """Posts an announcement now and then every interval, such as `1d` or `1w`."""
+        try:
+            seconds = parse_duration(interval)
+        except ValueError as error:
+            return await ctx.send(str(error))
+        if seconds < MIN_INTERVAL:
+            return await ctx.send(
+                f"Recurring announcements can't be more often than every {MIN_INTERVAL // 60} minutes."
+            )
+        await self.schedule(ctx, time.time(), seconds, channels, message)
+
+    @announce.command(name="cancel")
+    @has_configured_role("moderator")
+    async def announce_cancel(self, ctx: commands.Context, job_id: str) -> None:
+        """Cancels a scheduled announcement."""
+        if self.scheduler.cancel(job_id) is None:
+            return await ctx.send(f"There is no announcement `{job_id}`.")
+        await ctx.send(f"Announcement `{job_id}` cancelled.")
+
 
-def setup(bot: commands.Bot) -> None:
+def setup(bot: Bot) -> None:
     """Loads the BotRepeats cog."""
     bot.add_cog(BotRepeats(bot))
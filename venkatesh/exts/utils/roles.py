@@ -1,10 +1,11 @@
+from collections.abc import Awaitable, Callable
 from datetime import datetime
+from functools import partial
 
 from disnake import (
     ApplicationCommandInteraction,
     ButtonStyle,
     Embed,
-    Guild,
     MessageInteraction,
     ModalInteraction,
     Role,
@@ -12,101 +13,276 @@ from disnake import (
     TextInputStyle,
 )
 from disnake.ext import commands
-from disnake.ui import Button, StringSelect, TextInput
+from disnake.ui import ActionRow, Button, StringSelect, TextInput
 from loguru import logger
 
-from ...constants import Channels, Colors, Departments, Roles
+from ...bot import Bot
+from ...constants import DATA_DIR, Colors, RaidMode
+from ...utils.config import has_configured_role
+from ...utils.cooldowns import persistent_cooldown
+from ...utils.interactions import interaction_route
+from ...utils.migration import Checkpoint, Progress, RoleMigration, parse_changes
+from ...utils.registrations import Registration
+from ...utils.templates import publish
+
+BUSY = "The bot is busy right now. Please try again in a minute."
+FAILED = (
+    "Something went wrong while updating your roles."
+    " Please try again later, or contact a moderator."
+)
 
 
 class DepartmentRoles(commands.Cog):
     """Roles assigned per department."""
 
-    def __init__(self, bot: commands.Bot):
+    def __init__(self, bot: Bot):
         self.bot = bot
-        self.dept_list: list[Role] | None = None
-
-    async def get_dept_roles(self, guild: Guild) -> list:
-        """Get each role listed under DepartmentRoles."""
-        if self.dept_list is None:
-            await self.bot.wait_until_ready()
-            self.dept_list = [
-                guild.get_role(Departments.__dict__[role])
-                for role in dir(Departments)
-                if not callable(getattr(Departments, role)) and not role.startswith("_")
-            ]
+        self.migration: RoleMigration | None = None
+        self.guests_locked = False
+
+    def get_dept_roles(self) -> list[Role]:
+        """Get the role of each department in the config."""
+        dept_ids = self.bot.config.department_roles
+        dept_roles = self.bot.resolver.get_roles(dept_ids)
+
+        if len(dept_roles) != len(dept_ids):
+            logger.error("Failed to get some department roles.")
+
+        return dept_roles
 
-            if self.dept_list is None:
-                logger.error("Failed to get department roles.")
+    async def send_memberinfo(self, embed: Embed) -> None:
+        """Post a record in the memberinfo channel."""
+        await self.bot.spool.post(self.bot.config.channels.memberinfo, embed=embed)
 
-        return self.dept_list
+    async def defer(self, inter: MessageInteraction | ModalInteraction) -> bool:
+        """Acknowledges an interaction right away, unless the bot is too busy to act on it."""
+        if self.bot.work_queue.busy:
+            await inter.response.send_message(BUSY, ephemeral=True)
+            return False
+
+        await inter.response.defer(with_message=True, ephemeral=True)
+        return True
+
+    async def queue_work(
+        self,
+        inter: MessageInteraction | ModalInteraction,
+        name: str,
+        run: Callable[[], Awaitable[object]],
+        success: str,
+        audit: Embed | None = None,
+        failed: Callable[[], None] | None = None,
+    ) -> None:
+        """Runs the side effects of a deferred interaction in the background."""
+
+        async def done(error: Exception | None) -> None:
+            logger.info(f"{name} for {inter.user.id} {'failed' if error else 'done'}")
+            if error is not None and failed is not None:
+                failed()
+            # The audit record is spooled first, so a reply that can't be sent doesn't lose it.
+            try:
+                if error is None and audit is not None:
+                    await self.send_memberinfo(audit)
+            finally:
+                await inter.edit_original_response(FAILED if error else success)
+
+        if not self.bot.work_queue.submit(name, run, done):
+            if failed is not None:
+                failed()
+            await inter.edit_original_response(BUSY)
 
     @commands.command()
-    @commands.cooldown(3, 30)
-    @commands.has_any_role(Roles.moderator)
+    @persistent_cooldown(3, 30)
+    @has_configured_role("moderator")
     async def roles(self, ctx: commands.Context, reg_disabled: str = None) -> None:
-        """Sends the announcement message to register."""
+        """Publishes the registration message, or updates the existing one."""
         if reg_disabled:
-            description = "Registrations are currently closed. You can proceed to join as a guest."
+            status = "Registrations are currently closed. You can proceed to join as a guest."
         else:
-            description = (
-                "Register to join the club, or proceed to the server as a guest!"
-            )
+            status = "Register to join the club, or proceed to the server as a guest!"
+
+        rules = self.bot.config.channels.rules
+        channel = await self.bot.resolver.fetch_channel(rules)
+        if channel is None:
+            return await ctx.send("The rules channel could not be found.")
+
+        template = self.bot.templates["registration"]
+        embeds = template.render(status=status, rules=f"<#{rules}>")
+        buttons = [
+            Button(
+                label="Register",
+                style=ButtonStyle.success,
+                disabled=(True if reg_disabled else False),
+                custom_id="reg_button",
+            ),
+            Button(
+                label="Join as Guest",
+                style=ButtonStyle.gray,
+                disabled=self.guests_locked,
+                custom_id="reg_guest",
+            ),
+        ]
+
+        result = await publish(channel, template, embeds, buttons)
+        await ctx.send(f"Registration message {result} in {channel.mention}.")
+
+    async def set_guest_button(self, disabled: bool) -> None:
+        """Enable or disable the guest button on the published registration message."""
+        channel = await self.bot.resolver.fetch_channel(self.bot.config.channels.rules)
+        if channel is None:
+            logger.error("Failed to update the guest button, rules channel not found.")
+            return
 
-        embed = Embed(
-            title="Member Registration",
-            description=description
-            + f" **By proceeding, you agree to {(await self.bot.fetch_channel(Channels.rules)).mention}.**",
-            color=Colors.orange,
-        ).set_author(
-            name="Team CodeX",
-            icon_url="https://codex.mitb.club/brand_enlarged.png",
-        )
+        async for message in channel.history(limit=50):
+            if message.author.id != channel.guild.me.id:
+                continue
 
-        await ctx.send(
-            embed=embed,
-            components=[
-                Button(
-                    label="Register",
-                    style=ButtonStyle.success,
-                    disabled=(True if reg_disabled else False),
-                    custom_id="reg_button",
-                ),
-                Button(
-                    label="Join as Guest",
-                    style=ButtonStyle.gray,
-                    disabled=False,
-                    custom_id="reg_guest",
-                ),
-            ],
+            rows = ActionRow.rows_from_message(message)
+            buttons = [
+                component
+                for row in rows
+                for component in row.children
+                if isinstance(component, Button) and component.custom_id == "reg_guest"
+            ]
+            if buttons:
+                for button in buttons:
+                    button.disabled = disabled
+                await message.edit(components=rows)
+                return
+
+        logger.warning(
+            "Failed to update the guest button, registration message not found."
         )
 
     @commands.Cog.listener()
-    async def on_button_click(self, inter: MessageInteraction) -> None:
-        """Handles modal interaction for registration."""
-        if inter.component.custom_id not in ["reg_button", "reg_guest"]:
+    async def on_raid_mode(self, active: bool) -> None:
+        """Locks the guest button while the server is being raided, if enabled."""
+        if not RaidMode.lock_guests:
             return
 
-        member = inter.guild.get_role(Roles.member)
+        self.guests_locked = active
+        await self.set_guest_button(disabled=active)
+
+    @commands.command()
+    @has_configured_role("moderator")
+    async def migrate(
+        self, ctx: commands.Context, selector: str, *changes: str
+    ) -> None:
+        """
+        Changes roles for every member matching a selector.
+
+        The selector is `all`, `none` or a role name, and changes look like `+member -guest`.
+        Add `--dry-run` to only count affected members, or use `migrate resume` to continue
+        an interrupted migration, retrying members it failed to change.
+        """
+        if self.migration is not None:
+            return await ctx.send("A migration is already running.")
+        if not self.bot.profile.caches_members:
+            return await ctx.send(
+                "Migrations need members to be cached, which the current intent profile turns off."
+            )
+
+        dry_run = "--dry-run" in changes
+        changes = tuple(change for change in changes if change != "--dry-run")
+        path = DATA_DIR / "migration.json"
+        if selector == "resume":
+            checkpoint = Checkpoint.load(path)
+            if checkpoint is None or checkpoint.guild_id != ctx.guild.id:
+                return await ctx.send("There is no migration to resume.")
+            # Members that failed before get one more attempt.
+            checkpoint.failed.clear()
+        else:
+            selector = selector.lower()
+            if selector not in ("all", "none", *self.bot.config.role_aliases()):
+                return await ctx.send(f"Unknown selector `{selector}`.")
+            try:
+                add, remove = parse_changes(changes, self.bot.config)
+            except ValueError as error:
+                return await ctx.send(str(error))
+
+            checkpoint = Checkpoint(ctx.guild.id, selector, add, remove)
+
+        if dry_run:
+            migration = RoleMigration(
+                ctx.guild, checkpoint, path, self.bot.ratelimits, self.bot.config
+            )
+            return await ctx.send(
+                embed=self.migration_embed(
+                    "Role Migration (Dry Run)",
+                    migration.dry_run(self.bot.snapshot.members_of(ctx.guild)),
+                )
+            )
+
+        self.migration = RoleMigration(
+            ctx.guild, checkpoint, path, self.bot.ratelimits, self.bot.config
+        )
+        message = await ctx.send(
+            embed=self.migration_embed("Role Migration", Progress(0))
+        )
+
+        async def report(progress: Progress) -> None:
+            await message.edit(embed=self.migration_embed("Role Migration", progress))
+
+        try:
+            # Counting can use the snapshot, but editing members needs them all cached.
+            if not ctx.guild.chunked:
+                await ctx.guild.chunk()
+            await self.migration.run(report)
+        finally:
+            self.migration = None
+
+    def migration_embed(self, title: str, progress: Progress) -> Embed:
+        """Formats the progress of a role migration into an embed."""
+        return Embed(
+            title=title,
+            description=f"**{progress.processed}/{progress.total}** members processed.",
+            color=Colors.blue,
+            timestamp=datetime.now(),
+        ).add_field(
+            name="Results",
+            value=f"Changed: {progress.changed}\n"
+            f"Unchanged: {progress.unchanged}\n"
+            f"Failed: {progress.failed}",
+        )
+
+    @interaction_route("reg_button", "reg_guest")
+    async def registration_buttons(self, inter: MessageInteraction) -> None:
+        """Handles modal interaction for registration."""
+        member = self.bot.resolver.get_role(self.bot.config.roles.member)
         if member in inter.user.roles:
             return await inter.response.send_message(
                 "You are already registered. Use `/departments` at any time to choose your departments!",
                 ephemeral=True,
             )
 
-        guest = inter.guild.get_role(Roles.guest)
-        if guest in inter.user.roles:
-            await inter.user.remove_roles(guest)
-            if inter.component.custom_id == "reg_guest":
+        if inter.data.custom_id == "reg_guest":
+            guest = self.bot.resolver.get_role(self.bot.config.roles.guest)
+            if guest in inter.user.roles:
+                if await self.defer(inter):
+                    await self.queue_work(
+                        inter,
+                        "guest role removal",
+                        partial(self.bot.role_editor.apply, inter.user, remove=[guest]),
+                        "Your guest role has been removed.",
+                    )
+                return
+
+            if self.guests_locked:
                 return await inter.response.send_message(
-                    "Your guest role has been removed.", ephemeral=True
+                    "Joining as a guest is paused for now. Please try again later.",
+                    ephemeral=True,
                 )
 
-        if inter.component.custom_id == "reg_guest":
-            await inter.user.add_roles(guest)
-            return await inter.response.send_message(
-                "You have been registered as a guest!", ephemeral=True
-            )
+            if await self.defer(inter):
+                await self.queue_work(
+                    inter,
+                    "guest role",
+                    partial(self.bot.role_editor.apply, inter.user, add=[guest]),
+                    "You have been registered as a guest!",
+                )
+            return
 
+        # The guest role is swapped for the member role once the modal is submitted.
+        logger.info(f"Registration started by {inter.user.id}")
         await inter.response.send_modal(
             title="Member Registration",
             custom_id="reg_modal",
@@ -142,20 +318,32 @@ class DepartmentRoles(commands.Cog):
             ],
         )
 
-    @commands.Cog.listener()
-    async def on_modal_submit(self, inter: ModalInteraction) -> None:
+    @interaction_route("reg_modal")
+    async def registration_form(self, inter: ModalInteraction) -> None:
         """Handles data received from modal."""
-        if inter.custom_id != "reg_modal":
+        if not await self.defer(inter):
             return
 
-        await inter.user.add_roles(
-            inter.guild.get_role(Roles.member), reason="Member registered"
-        )
+        registration = Registration.from_modal(inter.user.id, inter.text_values)
+        duplicate = await self.bot.registrations.find_duplicate(registration)
+        # Reserved right away, so a submission racing this one is rejected as a duplicate.
+        if duplicate is not None or not self.bot.registrations.reserve(registration):
+            logger.info(f"Registration by {inter.user.id} rejected as a duplicate")
+            return await inter.edit_original_response(
+                "This registration number or email address has already been used by another member."
+                " Please contact a moderator if you think this is a mistake."
+            )
 
-        await inter.response.send_message(
-            "You have been registered. Use `/departments` at any time to choose your departments!",
-            ephemeral=True,
-        )
+        roles = self.bot.config.roles
+
+        async def register() -> None:
+            await self.bot.role_editor.apply(
+                inter.user,
+                add=[self.bot.resolver.get_role(roles.member)],
+                remove=[self.bot.resolver.get_role(roles.guest)],
+                reason="Member registered",
+            )
+            self.bot.registrations.add(registration)
 
         embed = Embed(
             title=f"Member Registration ({inter.user.id})",
@@ -166,11 +354,19 @@ class DepartmentRoles(commands.Cog):
         for reg_name, reg_no in inter.text_values.items():
             embed.add_field(name=reg_name, value=reg_no, inline=False)
 
-        await self.bot.get_channel(Channels.memberinfo).send(embed=embed)
+        logger.info(f"Registration submitted by {inter.user.id}")
+        await self.queue_work(
+            inter,
+            "registration",
+            register,
+            "You have been registered. Use `/departments` at any time to choose your departments!",
+            audit=embed,
+            failed=partial(self.bot.registrations.release, registration),
+        )
 
     @commands.slash_command()
-    @commands.cooldown(1, 43200, commands.BucketType.user)
-    @commands.has_any_role(Roles.member)
+    @persistent_cooldown(1, 43200, commands.BucketType.user)
+    @has_configured_role("member")
     async def departments(self, inter: ApplicationCommandInteraction) -> None:
         """Choose your departments within the club! Your current roles will be reset."""
         embed = Embed(
@@ -187,38 +383,14 @@ class DepartmentRoles(commands.Cog):
                 StringSelect(
                     custom_id="reg_dept_select",
                     min_values=1,
-                    max_values=3,
+                    max_values=min(3, len(self.bot.config.departments)),
                     options=[
                         SelectOption(
-                            label="CXSD - Software Development",
-                            value=Departments.cxsd,
-                            emoji="\N{PERSONAL COMPUTER}",
-                        ),
-                        SelectOption(
-                            label="CXGD - Game Development",
-                            value=Departments.cxgd,
-                            emoji="\N{VIDEO GAME}",
-                        ),
-                        SelectOption(
-                            label="CXCP - Competitive Programming",
-                            value=Departments.cxcp,
-                            emoji="\N{CHEQUERED FLAG}",
-                        ),
-                        SelectOption(
-                            label="CXIT - Information Technology",
-                            value=Departments.cxit,
-                            emoji="\N{CLOUD}",
-                        ),
-                        SelectOption(
-                            label="CXAD - App Development",
-                            value=Departments.cxad,
-                            emoji="\N{MOBILE PHONE}",
-                        ),
-                        SelectOption(
-                            label="CXDS - Data Science",
-                            value=Departments.cxds,
-                            emoji="\N{INPUT SYMBOL FOR NUMBERS}",
-                        ),
+                            label=department.label,
+                            value=department.role_id,
+                            emoji=department.emoji,
+                        )
+                        for department in self.bot.config.departments
                     ],
                 ),
             ],
@@ -252,25 +424,18 @@ class DepartmentRoles(commands.Cog):
 
         await inter.response.send_message(embed=embed, ephemeral=True)
 
-    @commands.Cog.listener()
-    async def on_dropdown(self, inter: MessageInteraction) -> None:
+    @interaction_route("reg_dept_select")
+    async def department_select(self, inter: MessageInteraction) -> None:
         """Adds respective department roles to the user."""
-        if inter.component.custom_id != "reg_dept_select":
+        if not await self.defer(inter):
             return
 
-        dept_roles = await self.get_dept_roles(inter.guild)
+        dept_roles = self.get_dept_roles()
         user_roles = [role for role in dept_roles if role in inter.user.roles]
-
-        if user_roles is not None:
-            await inter.user.remove_roles(*user_roles)
-
-        selected_roles = [role for role in dept_roles if str(role.id) in inter.values]
-
-        await inter.user.add_roles(*selected_roles)
-
-        await inter.response.send_message(
-            f"Your enrolled departments are: {' '.join([role.mention for role in selected_roles])}",
-            ephemeral=True,
+        selected_roles = self.bot.resolver.get_roles(
+            int(value)
+            for value in inter.values
+            if value.isdigit() and int(value) in self.bot.config.department_roles
         )
 
         embed = Embed(
@@ -278,20 +443,33 @@ class DepartmentRoles(commands.Cog):
             color=Colors.yellow,
             timestamp=datetime.now(),
         ).set_author(name=inter.user, icon_url=inter.user.display_avatar.url)
+        embed.set_footer(text=f"User ID: {inter.user.id}")
 
         embed.add_field(
             name="Old Departments",
-            value=" ".join([role.mention for role in user_roles]),
+            value=" ".join([role.mention for role in user_roles]) or "None",
             inline=False,
         )
         embed.add_field(
             name="New Departments",
-            value=" ".join([role.mention for role in selected_roles]),
+            value=" ".join([role.mention for role in selected_roles]) or "None",
         )
 
-        await self.bot.get_channel(Channels.memberinfo).send(embed=embed)
+        await self.queue_work(
+            inter,
+            "department roles",
+            partial(
+                self.bot.role_editor.apply,
+                inter.user,
+                add=selected_roles,
+                remove=dept_roles,
+                reason="Departments changed",
+            ),
+            f"Your enrolled departments are: {' '.join([role.mention for role in selected_roles])}",
+            audit=embed,
+        )
 
 
-def setup(bot: commands.Bot) -> None:
+def setup(bot: Bot) -> None:
     """Loads the DepartmentRoles cog."""
     bot.add_cog(DepartmentRoles(bot))
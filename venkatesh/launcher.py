@@ -0,0 +1,187 @@
+import asyncio
+import os
+import signal
+import sys
+from dataclasses import dataclass, field
+from typing import Any
+
+from disnake.http import HTTPClient
+from loguru import logger
+
+from . import constants
+from .utils.ipc import IPCBroker
+
+
+@dataclass
+class ShardGroup:
+    """A process running some of the bot's shards."""
+
+    index: int
+    shard_ids: list[int]
+    process: asyncio.subprocess.Process | None = None
+    restarts: int = 0
+    ready: asyncio.Event = field(default_factory=asyncio.Event)
+
+
+async def recommended_shards(token: str) -> int:
+    """Ask Discord how many shards the bot should run."""
+    http = HTTPClient(loop=asyncio.get_running_loop())
+    try:
+        await http.static_login(token)
+        shards, _, _ = await http.get_bot_gateway()
+    finally:
+        await http.close()
+    return shards
+
+
+def split_shards(count: int, processes: int) -> list[list[int]]:
+    """Split the shard IDs into at most `processes` contiguous groups of similar size."""
+    processes = max(1, min(processes, count))
+    size, extra = divmod(count, processes)
+    groups, start = [], 0
+    for index in range(processes):
+        end = start + size + (index < extra)
+        groups.append(list(range(start, end)))
+        start = end
+    return groups
+
+
+class Launcher:
+    """
+    Run the bot's shards across several processes, sharing an IPC broker.
+
+    Groups are started one at a time, each once the previous one is ready, so shards never
+    identify faster than Discord allows. A group that exits is restarted with backoff, and
+    SIGHUP is passed on to every ready group so they all reload their config.
+    """
+
+    def __init__(self, shard_count: int, processes: int, *, max_backoff: float = 300.0):
+        self.shard_count = shard_count
+        self.groups = [
+            ShardGroup(index, shard_ids)
+            for index, shard_ids in enumerate(split_shards(shard_count, processes))
+        ]
+        self.max_backoff = max_backoff
+        self.broker = IPCBroker(constants.Sharding.ipc_path)
+        self.broker.listeners.append(self.on_message)
+        self.stopping = asyncio.Event()
+
+    def on_message(self, message: dict[str, Any]) -> None:
+        """Note each group becoming ready."""
+        if message["topic"] == "ready" and message["origin"] is not None:
+            group = self.groups[message["origin"]]
+            group.ready.set()
+            logger.info(
+                f"Shard group {group.index} ready with shards {group.shard_ids}"
+            )
+
+    async def spawn(self, group: ShardGroup) -> None:
+        """Start the process for a shard group."""
+        group.ready.clear()
+        env = {
+            **os.environ,
+            "SHARDED": "true",
+            "SHARD_COUNT": str(self.shard_count),
+            "SHARD_IDS": ",".join(map(str, group.shard_ids)),
+            "SHARD_GROUP": str(group.index),
+            "IPC_SOCKET": str(constants.Sharding.ipc_path),
+        }
+        group.process = await asyncio.create_subprocess_exec(
+            sys.executable, "-m", "venkatesh", env=env
+        )
+        logger.info(
+            f"Started shard group {group.index} (pid {group.process.pid}) "
+            f"with shards {group.shard_ids}"
+        )
+
+    async def supervise(self, group: ShardGroup) -> None:
+        """Restart a group whenever its process exits, until the launcher stops."""
+        while True:
+            code = await group.process.wait()
+            if self.stopping.is_set():
+                return
+
+            group.restarts += 1
+            delay = min(2**group.restarts, self.max_backoff)
+            logger.error(
+                f"Shard group {group.index} exited with code {code}, "
+                f"restarting in {delay:.0f}s"
+            )
+            try:
+                await asyncio.wait_for(self.stopping.wait(), delay)
+                return
+            except asyncio.TimeoutError:
+                pass
+            await self.spawn(group)
+
+    def signal_all(self, signum: int) -> None:
+        """Send a signal to every running group."""
+        for group in self.groups:
+            if group.process is not None and group.process.returncode is None:
+                group.process.send_signal(signum)
+
+    def reload(self) -> None:
+        """Have every group reload its config."""
+        # Groups install their handler once ready, and read the current config as they start.
+        for group in self.groups:
+            if group.ready.is_set() and group.process.returncode is None:
+                group.process.send_signal(signal.SIGHUP)
+
+    def stop(self) -> None:
+        """Stop every group and then the launcher."""
+        logger.info("Stopping shard groups")
+        self.stopping.set()
+        self.signal_all(signal.SIGTERM)
+
+    async def run(self, ready_timeout: float = 600.0) -> None:
+        """Start every group and wait until they have all stopped."""
+        loop = asyncio.get_running_loop()
+        loop.add_signal_handler(signal.SIGTERM, self.stop)
+        loop.add_signal_handler(signal.SIGINT, self.stop)
+        loop.add_signal_handler(signal.SIGHUP, self.reload)
+
+        await self.broker.start()
+        supervisors = []
+        try:
+            for group in self.groups:
+                if self.stopping.is_set():
+                    break
+                await self.spawn(group)
+                supervisors.append(asyncio.create_task(self.supervise(group)))
+                try:
+                    await asyncio.wait_for(group.ready.wait(), ready_timeout)
+                except asyncio.TimeoutError:
+                    logger.warning(
+                        f"Shard group {group.index} isn't ready after {ready_timeout:.0f}s, "
+                        "starting the next one anyway"
+                    )
+
+            await self.stopping.wait()
+            await asyncio.gather(
+                *(group.process.wait() for group in self.groups if group.process)
+            )
+        finally:
+            for supervisor in supervisors:
+                supervisor.cancel()
+            await self.broker.close()
+
+
+async def launch() -> None:
+    """Work out the shard count, then run the shards across SHARD_PROCESSES processes."""
+    if constants.BOT_TOKEN is None:
+        raise EnvironmentError(
+            "Token value is None. Make sure you have configured the TOKEN field in .env"
+        )
+
+    shard_count = constants.Sharding.count
+    if shard_count is None:
+        shard_count = await recommended_shards(constants.BOT_TOKEN)
+    logger.info(
+        f"Running {shard_count} shards in up to {constants.Sharding.processes} processes"
+    )
+    await Launcher(shard_count, constants.Sharding.processes).run()
+
+
+def main() -> None:
+    """Run the launcher until it is stopped."""
+    asyncio.run(launch())
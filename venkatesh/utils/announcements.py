@@ -0,0 +1,225 @@
+import asyncio
+import heapq
+import json
+import re
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from loguru import logger
+
+_DURATION = re.compile(r"(\d+)([wdhms])")
+_UNITS = {"w": 604800, "d": 86400, "h": 3600, "m": 60, "s": 1}
+
+
+def parse_duration(text: str) -> float:
+    """Parse a duration such as `1d12h` or `90m` into seconds."""
+    text = text.lower()
+    parts = _DURATION.findall(text)
+    if not parts or "".join(number + unit for number, unit in parts) != text:
+        raise ValueError(f"`{text}` isn't a duration like `1d12h` or `90m`.")
+    return float(sum(int(number) * _UNITS[unit] for number, unit in parts))
+
+
+@dataclass
+class Announcement:
+    """A message to post in some channels at a set time, and optionally every interval after."""
+
+    content: str
+    channel_ids: list[int]
+    next_run: float
+    author_id: int
+    interval: float | None = None
+    runs: int = 0
+    id: str = field(default_factory=lambda: uuid.uuid4().hex[:8])
+
+
+@dataclass
+class Delivery:
+    """The outcome of posting an announcement once."""
+
+    announcement: Announcement
+    sent: list[int] = field(default_factory=list)
+    failed: dict[int, str] = field(default_factory=dict)
+
+
+class AnnouncementScheduler:
+    """
+    Post announcements when they fall due, from a single timer task.
+
+    Jobs are kept in a heap ordered by their next run, and the timer sleeps until the
+    earliest one, waking early whenever a job is added or cancelled. Jobs are saved to disk
+    on every change, off the event loop, and any that fell due while the bot was down run
+    once on startup.
+    Deliveries post to at most `concurrency` channels at once and one message at a time
+    per channel, so an announcement to many channels never bursts through rate limits.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        send: Callable[[int, str], Awaitable[object]],
+        confirm: Callable[[Delivery], Awaitable[object]],
+        *,
+        concurrency: int = 5,
+    ):
+        self.path = path
+        self.send = send
+        self.confirm = confirm
+        self.jobs: dict[str, Announcement] = {}
+        self._heap: list[tuple[float, str]] = []
+        self._wake = asyncio.Event()
+        self._timer: asyncio.Task | None = None
+        self._deliveries: set[asyncio.Task] = set()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._channels: dict[int, asyncio.Lock] = {}
+        self._saves: set[asyncio.Future] = set()
+        # One thread does all the file writes, so saves land in the order they were made.
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="announcements"
+        )
+
+        self._load()
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+        try:
+            jobs = [
+                Announcement(**data)
+                for data in json.loads(self.path.read_text(encoding="utf-8"))
+            ]
+        except (OSError, ValueError, TypeError) as error:
+            logger.error(f"Ignoring unreadable scheduled announcements: {error}")
+            return
+        for job in jobs:
+            self.jobs[job.id] = job
+            heapq.heappush(self._heap, (job.next_run, job.id))
+        if self.jobs:
+            logger.info(f"Loaded {len(self.jobs)} scheduled announcements")
+
+    def _write(self, data: str) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temp = self.path.with_suffix(".tmp")
+        temp.write_text(data)
+        temp.replace(self.path)
+
+    def _save(self) -> None:
+        # Serialised on the loop, so later changes can't alter a save already queued.
+        data = json.dumps([asdict(job) for job in self.jobs.values()])
+        saved = asyncio.get_running_loop().run_in_executor(
+            self._executor, self._write, data
+        )
+        self._saves.add(saved)
+        saved.add_done_callback(self._saved)
+
+    def _saved(self, saved: asyncio.Future) -> None:
+        self._saves.discard(saved)
+        if not saved.cancelled() and (error := saved.exception()) is not None:
+            logger.error(f"Failed to save scheduled announcements: {error}")
+
+    def add(self, job: Announcement) -> None:
+        """Schedule an announcement."""
+        self.jobs[job.id] = job
+        heapq.heappush(self._heap, (job.next_run, job.id))
+        self._save()
+        self._wake.set()
+
+    def cancel(self, job_id: str) -> Announcement | None:
+        """Unschedule an announcement, returning it if it existed."""
+        job = self.jobs.pop(job_id, None)
+        if job is not None:
+            # Its heap entry is skipped when it comes up, rather than searched for now.
+            self._save()
+            self._wake.set()
+        return job
+
+    def start(self) -> None:
+        """Start the timer."""
+        if self._timer is None or self._timer.done():
+            self._timer = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            # Entries for cancelled jobs, or runs that have since moved, are stale.
+            while self._heap and (
+                (job := self.jobs.get(self._heap[0][1])) is None
+                or job.next_run != self._heap[0][0]
+            ):
+                heapq.heappop(self._heap)
+
+            if not self._heap:
+                await self._wake.wait()
+                continue
+
+            delay = self._heap[0][0] - time.time()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wake.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            _, job_id = heapq.heappop(self._heap)
+            self._fire(self.jobs[job_id])
+
+    def _fire(self, job: Announcement) -> None:
+        job.runs += 1
+        if job.interval:
+            # A recurring job that missed runs while the bot was down only runs once for them.
+            now = time.time()
+            while job.next_run <= now:
+                job.next_run += job.interval
+            heapq.heappush(self._heap, (job.next_run, job.id))
+        else:
+            del self.jobs[job.id]
+        self._save()
+
+        task = asyncio.create_task(self.deliver(job))
+        self._deliveries.add(task)
+        task.add_done_callback(self._deliveries.discard)
+
+    async def _post(self, channel_id: int, content: str, delivery: Delivery) -> None:
+        lock = self._channels.setdefault(channel_id, asyncio.Lock())
+        # The slot is only taken once it's this post's turn in the channel, so posts
+        # queued behind each other in one channel can't hold up the others.
+        async with lock, self._slots:
+            try:
+                await self.send(channel_id, content)
+            except Exception as error:
+                delivery.failed[channel_id] = str(error)
+            else:
+                delivery.sent.append(channel_id)
+
+    async def deliver(self, job: Announcement) -> Delivery:
+        """Post an announcement to each of its channels, then confirm the outcome."""
+        delivery = Delivery(job)
+        await asyncio.gather(
+            *(
+                self._post(channel_id, job.content, delivery)
+                for channel_id in job.channel_ids
+            )
+        )
+        if delivery.failed:
+            logger.warning(
+                f"Announcement {job.id} failed in {len(delivery.failed)} channels"
+            )
+        try:
+            await self.confirm(delivery)
+        except Exception as error:
+            logger.error(f"Failed to confirm announcement {job.id}: {error}")
+        return delivery
+
+    async def close(self) -> None:
+        """Stop the timer, letting deliveries and saves in progress finish."""
+        if self._timer is not None:
+            self._timer.cancel()
+        if self._deliveries:
+            await asyncio.gather(*self._deliveries, return_exceptions=True)
+        if self._saves:
+            await asyncio.gather(*self._saves, return_exceptions=True)
+        self._executor.shutdown(wait=True)
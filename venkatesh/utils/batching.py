@@ -0,0 +1,98 @@
+import asyncio
+from collections import Counter
+from collections.abc import Awaitable, Callable
+
+from disnake import Embed
+from loguru import logger
+
+# Hard limit imposed by Discord on a single message.
+MAX_EMBEDS_PER_MESSAGE = 10
+
+
+class EmbedBatcher:
+    """
+    Coalesce embeds posted in quick succession into as few messages as possible.
+
+    Embeds are buffered for `window` seconds after the first one arrives, then sent in groups
+    of up to `batch_size`. A burst needing more than `max_messages` messages is collapsed into
+    a single embed built by `summarize` from the count of each kind of embed in the burst.
+    `send` only hands each group to the spool, which retries delivery itself, so the only
+    failures here are local ones: a group `send` can't write is put back and tried again,
+    waiting up to `max_backoff` seconds, and a group it rejects as invalid is dropped.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[list[Embed]], Awaitable[object]],
+        summarize: Callable[[Counter[str]], Embed],
+        *,
+        window: float,
+        batch_size: int,
+        max_messages: int,
+        max_backoff: float = 60.0,
+    ) -> None:
+        self.send = send
+        self.summarize = summarize
+        self.window = window
+        self.batch_size = max(1, min(batch_size, MAX_EMBEDS_PER_MESSAGE))
+        self.max_messages = max(1, max_messages)
+        self.max_backoff = max_backoff
+
+        self._pending: list[tuple[str, Embed]] = []
+        self._backoff = 0.0
+        self._task: asyncio.Task | None = None
+
+    def add(self, embed: Embed, kind: str = "other") -> None:
+        """Queue an embed to be sent with the next flush."""
+        self._pending.append((kind, embed))
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while self._pending:
+            await asyncio.sleep(self.window + self._backoff)
+            await self.flush()
+
+    async def flush(self) -> None:
+        """Send everything buffered so far."""
+        items, self._pending = self._pending, []
+        if not items:
+            return
+
+        summarized = len(items) > self.batch_size * self.max_messages
+        if summarized:
+            embeds = [self.summarize(Counter(kind for kind, _ in items))]
+        else:
+            embeds = [embed for _, embed in items]
+
+        for start in range(0, len(embeds), self.batch_size):
+            batch = embeds[start : start + self.batch_size]
+            try:
+                await self.send(batch)
+            except ValueError as error:
+                # Discord would reject the group however often it was sent.
+                logger.error(
+                    f"Dropping {len(batch)} embeds Discord would reject: {error}"
+                )
+                continue
+            except OSError as error:
+                # Put back whatever wasn't delivered, ahead of embeds queued in the meantime,
+                # and wait longer before the next attempt.
+                self._pending[:0] = items if summarized else items[start:]
+                self._backoff = min(
+                    max(self._backoff * 2, self.window), self.max_backoff
+                )
+                logger.warning(
+                    f"Failed to spool embeds ({error}), retrying in "
+                    f"{self.window + self._backoff:.1f}s"
+                )
+                return
+
+        self._backoff = 0.0
+
+    async def close(self) -> None:
+        """Stop the flush timer and send anything still buffered."""
+        if self._task is not None:
+            self._task.cancel()
+        await self.flush()
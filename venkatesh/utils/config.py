@@ -0,0 +1,233 @@
+import os
+import tomllib
+from collections.abc import Callable, Iterable
+from dataclasses import dataclass, field, fields
+from pathlib import Path
+from typing import Any
+
+from disnake import Guild
+from disnake.ext import commands
+
+from .. import constants
+from .resolver import constant_ids
+
+# Names and emoji shown for the default departments, in the order they're listed.
+DEPARTMENT_DETAILS = {
+    "cxsd": ("Software Development", "\N{PERSONAL COMPUTER}"),
+    "cxgd": ("Game Development", "\N{VIDEO GAME}"),
+    "cxcp": ("Competitive Programming", "\N{CHEQUERED FLAG}"),
+    "cxit": ("Information Technology", "\N{CLOUD}"),
+    "cxad": ("App Development", "\N{MOBILE PHONE}"),
+    "cxds": ("Data Science", "\N{INPUT SYMBOL FOR NUMBERS}"),
+}
+
+
+class ConfigError(ValueError):
+    """The configuration file or environment holds an invalid value."""
+
+
+@dataclass(frozen=True)
+class ChannelConfig:
+    """IDs of the channels the bot posts in."""
+
+    log: int
+    memberinfo: int
+    memberlog: int
+    rules: int
+
+
+@dataclass(frozen=True)
+class RoleConfig:
+    """IDs of the roles the bot checks for and hands out."""
+
+    moderator: int
+    guest: int
+    member: int
+
+
+@dataclass(frozen=True)
+class Department:
+    """A department members can enrol in, and the role that marks it."""
+
+    key: str
+    role_id: int
+    name: str
+    emoji: str | None = None
+
+    @property
+    def label(self) -> str:
+        """How the department is shown in the selection menu."""
+        return f"{self.key.upper()} - {self.name}"
+
+
+@dataclass(frozen=True)
+class Config:
+    """
+    The channels, roles and departments the bot works with.
+
+    A config is never modified; reloading builds a new one and swaps it in whole, so a
+    handler reading `bot.config` sees a consistent set of IDs. The lookups handlers need are
+    worked out once when the config is built.
+    """
+
+    channels: ChannelConfig
+    roles: RoleConfig
+    departments: tuple[Department, ...]
+    source: Path | None = None
+
+    department_roles: dict[int, Department] = field(init=False, repr=False)
+    department_ids: dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        by_role = {department.role_id: department for department in self.departments}
+        by_key = {department.key: department.role_id for department in self.departments}
+        if len(by_role) != len(self.departments) or len(by_key) != len(
+            self.departments
+        ):
+            raise ConfigError("Departments must have distinct keys and role IDs")
+
+        object.__setattr__(self, "department_roles", by_role)
+        object.__setattr__(self, "department_ids", by_key)
+
+    def role_aliases(self) -> dict[str, set[int]]:
+        """Names that can be used to refer to roles in selectors and role changes."""
+        aliases = {
+            item.name: {getattr(self.roles, item.name)} for item in fields(self.roles)
+        }
+        aliases.update({key: {role_id} for key, role_id in self.department_ids.items()})
+        aliases["departments"] = set(self.department_roles)
+        return aliases
+
+    def validate(self, guilds: Iterable[Guild]) -> list[str]:
+        """Describe every channel and role that doesn't exist in the given guilds."""
+        guilds = list(guilds)
+        problems = []
+        for item in fields(self.channels):
+            channel_id = getattr(self.channels, item.name)
+            if not any(guild.get_channel(channel_id) for guild in guilds):
+                problems.append(f"Channel `{item.name}` ({channel_id}) not found")
+
+        roles = [
+            (item.name, getattr(self.roles, item.name)) for item in fields(self.roles)
+        ]
+        roles += [
+            (department.key, department.role_id) for department in self.departments
+        ]
+        for name, role_id in roles:
+            if not any(guild.get_role(role_id) for guild in guilds):
+                problems.append(f"Role `{name}` ({role_id}) not found")
+        return problems
+
+    def changes(self, other: "Config") -> list[str]:
+        """Describe what differs in another config."""
+        changes = []
+        for section in ("channels", "roles"):
+            for item in fields(getattr(self, section)):
+                before = getattr(getattr(self, section), item.name)
+                after = getattr(getattr(other, section), item.name)
+                if before != after:
+                    changes.append(f"{section}.{item.name}: {before} -> {after}")
+
+        if self.departments != other.departments:
+            before = ", ".join(department.key for department in self.departments)
+            after = ", ".join(department.key for department in other.departments)
+            changes.append(f"departments: {before} -> {after}")
+        return changes
+
+
+def _env_int(name: str) -> int | None:
+    value = os.environ.get(name, "").strip()
+    if not value:
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        raise ConfigError(f"{name} must be an ID, got {value!r}") from None
+
+
+def _section(
+    cls: type, data: dict[str, Any], defaults: dict[str, int], env_prefix: str
+) -> Any:
+    if unknown := set(data) - set(defaults):
+        raise ConfigError(f"Unknown {cls.__name__} keys: {', '.join(sorted(unknown))}")
+
+    values = {}
+    for name, default in defaults.items():
+        value = _env_int(f"{env_prefix}{name.upper()}")
+        if value is None:
+            value = data.get(name, default)
+        if not isinstance(value, int) or isinstance(value, bool):
+            raise ConfigError(f"{cls.__name__}.{name} must be an ID, got {value!r}")
+        values[name] = value
+    return cls(**values)
+
+
+def _departments(data: list[dict[str, Any]] | None) -> tuple[Department, ...]:
+    if data is None:
+        return tuple(
+            Department(key, constant_ids(constants.Departments)[key], name, emoji)
+            for key, (name, emoji) in DEPARTMENT_DETAILS.items()
+        )
+
+    departments = []
+    for entry in data:
+        try:
+            department = Department(
+                key=entry["key"].lower(),
+                role_id=entry["role"],
+                name=entry["name"],
+                emoji=entry.get("emoji"),
+            )
+        except (KeyError, TypeError, AttributeError):
+            raise ConfigError(
+                f"Departments need a key, role and name, got {entry!r}"
+            ) from None
+        if not isinstance(department.role_id, int):
+            raise ConfigError(f"Department {department.key} role must be an ID")
+        departments.append(department)
+    return tuple(departments)
+
+
+def load_config(path: Path) -> Config:
+    """
+    Read the config file, with environment variables taking precedence.
+
+    A missing file leaves the values from the environment and the defaults in constants.
+    `.env` is read again too, unless the bot runs with ENVIRONMENT set.
+    """
+    if constants.ENVIRONMENT is None:
+        from dotenv import load_dotenv
+
+        load_dotenv(dotenv_path=f"{os.getcwd()}/.env", override=True)
+
+    data: dict[str, Any] = {}
+    if path.exists():
+        try:
+            data = tomllib.loads(path.read_text(encoding="utf-8"))
+        except (OSError, tomllib.TOMLDecodeError) as error:
+            raise ConfigError(f"Failed to read {path}: {error}") from None
+
+    return Config(
+        channels=_section(
+            ChannelConfig,
+            data.get("channels", {}),
+            constant_ids(constants.Channels),
+            "CHANNEL_",
+        ),
+        roles=_section(
+            RoleConfig, data.get("roles", {}), constant_ids(constants.Roles), "ROLE_"
+        ),
+        departments=_departments(data.get("departments")),
+        source=path if path.exists() else None,
+    )
+
+
+def has_configured_role(*names: str) -> Callable[[Any], Any]:
+    """Like `commands.has_any_role`, with the role IDs read from the config on every use."""
+
+    async def predicate(ctx: Any) -> bool:
+        roles = ctx.bot.config.roles
+        check = commands.has_any_role(*(getattr(roles, name) for name in names))
+        return await check.predicate(ctx)
+
+    return commands.check(predicate)
@@ -0,0 +1,343 @@
+import asyncio
+import json
+import sqlite3
+import time
+from collections.abc import Callable, Hashable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from disnake.ext import commands
+from loguru import logger
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cooldowns (
+    command TEXT NOT NULL,
+    key TEXT NOT NULL,
+    window REAL NOT NULL,
+    tokens INTEGER NOT NULL,
+    last REAL NOT NULL,
+    expires REAL NOT NULL,
+    PRIMARY KEY (command, key)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS cooldowns_expires ON cooldowns (expires);
+"""
+
+
+class TimingWheel:
+    """
+    Schedule keys to expire, in time proportional to the number that do.
+
+    Each level is a ring of `slots` slots, a slot on one level spanning a whole turn of the
+    level below. Keys are placed on the lowest level whose turn reaches their expiry, and
+    move down a level each time the level below comes round to them.
+    """
+
+    def __init__(
+        self, now: float, *, resolution: float = 1.0, slots: int = 64, levels: int = 4
+    ):
+        self.resolution = resolution
+        self.slots = slots
+        self.levels = levels
+        self.tick = int(now / resolution)
+        self.wheels: list[list[dict[Hashable, int]]] = [
+            [{} for _ in range(slots)] for _ in range(levels)
+        ]
+        self._where: dict[Hashable, tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._where)
+
+    def schedule(self, key: Hashable, expires: float) -> None:
+        """Expire a key at the given time, replacing any earlier schedule for it."""
+        self.cancel(key)
+        self._place(key, max(int(expires / self.resolution) + 1, self.tick + 1))
+
+    def _place(self, key: Hashable, tick: int) -> None:
+        # Expiries past the top level's turn wait in its furthest slot and are placed again.
+        placed = min(tick, self.tick + self.slots**self.levels - 1)
+        delta = placed - self.tick
+        level = 0
+        while level < self.levels - 1 and delta >= self.slots ** (level + 1):
+            level += 1
+        slot = (placed // self.slots**level) % self.slots
+        self.wheels[level][slot][key] = tick
+        self._where[key] = (level, slot)
+
+    def cancel(self, key: Hashable) -> None:
+        """Stop a key from expiring."""
+        if (where := self._where.pop(key, None)) is not None:
+            level, slot = where
+            del self.wheels[level][slot][key]
+
+    def advance(self, now: float) -> list[Hashable]:
+        """Move the wheel forward to the given time, returning the keys that expired."""
+        target = int(now / self.resolution)
+        expired = []
+        while self.tick < target:
+            if not self._where:
+                self.tick = target
+                break
+
+            self.tick += 1
+            # Bring down the keys due within the next turn of each level, highest first.
+            for level in range(self.levels - 1, 0, -1):
+                if self.tick % self.slots**level == 0:
+                    slot = (self.tick // self.slots**level) % self.slots
+                    entries, self.wheels[level][slot] = self.wheels[level][slot], {}
+                    for key, tick in entries.items():
+                        self._place(key, tick)
+
+            slot = self.tick % self.slots
+            entries, self.wheels[0][slot] = self.wheels[0][slot], {}
+            for key, tick in entries.items():
+                if tick <= self.tick:
+                    del self._where[key]
+                    expired.append(key)
+                else:
+                    self._place(key, tick)
+        return expired
+
+
+class PersistentCooldown(commands.Cooldown):
+    """A cooldown bucket that saves its state whenever it changes."""
+
+    def __init__(
+        self, rate: float, per: float, mapping: "PersistentCooldownMapping", key: Any
+    ):
+        super().__init__(rate, per)
+        self.mapping = mapping
+        self.key = key
+
+    def update_rate_limit(self, current: float | None = None) -> float | None:
+        """Use up a token, saving the new state."""
+        retry_after = super().update_rate_limit(current)
+        self.mapping.save(self)
+        return retry_after
+
+    def reset(self) -> None:
+        """Refill the bucket, saving the new state."""
+        super().reset()
+        self.mapping.save(self)
+
+
+class PersistentCooldownMapping(commands.CooldownMapping):
+    """
+    Cooldown buckets for a command, kept in a `CooldownStore` once the command is bound to one.
+
+    Buckets are expired by the store's timing wheel rather than by scanning every bucket
+    whenever the command is used.
+    """
+
+    def __init__(self, original: commands.Cooldown | None, type: Callable[[Any], Any]):
+        super().__init__(original, type)
+        self.store: CooldownStore | None = None
+        self.name: str | None = None
+
+    def copy(self) -> "PersistentCooldownMapping":
+        """A copy of the mapping, sharing its store."""
+        mapping = PersistentCooldownMapping(self._cooldown, self._type)
+        mapping._cache = self._cache.copy()
+        mapping.store, mapping.name = self.store, self.name
+        return mapping
+
+    def bind(self, store: "CooldownStore", name: str) -> None:
+        """Keep the command's buckets in a store, restoring those saved before a restart."""
+        self.store, self.name = store, name
+        # A reloaded cog takes over the buckets of the command it replaces.
+        if (previous := store.mappings.get(name)) is not None and previous is not self:
+            for key, bucket in previous._cache.items():
+                bucket.mapping = self
+                self._cache[key] = bucket
+        store.mappings[name] = self
+        for key, (window, tokens, last) in store.restore(name).items():
+            bucket = self._bucket(key)
+            bucket._window, bucket._tokens, bucket._last = window, tokens, last
+            self._cache[key] = bucket
+            store.wheel.schedule((name, key), last + bucket.per)
+
+    def _bucket(self, key: Any) -> PersistentCooldown:
+        return PersistentCooldown(self._cooldown.rate, self._cooldown.per, self, key)
+
+    def _is_default(self) -> bool:
+        # Even a global cooldown gets a bucket of its own, so it can be saved.
+        return False
+
+    def _verify_cache_integrity(self, current: float | None = None) -> None:
+        if self.store is None:
+            return super()._verify_cache_integrity(current)
+        self.store.expire(current or time.time())
+
+    def get_bucket(
+        self, message: Any, current: float | None = None
+    ) -> PersistentCooldown:
+        """Get the bucket for a message or interaction, creating it if needed."""
+        self._verify_cache_integrity(current)
+        key = self._bucket_key(message)
+        if (bucket := self._cache.get(key)) is None:
+            bucket = self._cache[key] = self._bucket(key)
+        return bucket
+
+    def save(self, bucket: PersistentCooldown) -> None:
+        """Write a bucket's state to the store."""
+        if self.store is not None:
+            self.store.save(self.name, bucket)
+
+
+def persistent_cooldown(
+    rate: int, per: float, type: commands.BucketType = commands.BucketType.default
+) -> Callable[[Any], Any]:
+    """Like `commands.cooldown`, but the cooldown survives restarts once the bot binds it."""
+
+    def decorator(func: Any) -> Any:
+        mapping = PersistentCooldownMapping(commands.Cooldown(rate, per), type)
+        if hasattr(func, "__command_flag__"):
+            func._buckets = mapping
+        else:
+            func.__commands_cooldown__ = mapping
+        return func
+
+    return decorator
+
+
+def _encode_key(key: Any) -> str:
+    return json.dumps(key)
+
+
+def _decode_key(key: str) -> Any:
+    value = json.loads(key)
+    # Bucket keys for member, role and similar types are tuples, which JSON keeps as lists.
+    return tuple(value) if isinstance(value, list) else value
+
+
+class CooldownStore:
+    """
+    Command cooldowns saved in a local SQLite database.
+
+    Unexpired cooldowns are read once at startup. Changes are queued and written in batches
+    on a dedicated thread, and expired cooldowns are dropped from memory and the database as
+    the timing wheel reaches them.
+    """
+
+    def __init__(self, path: Path, *, flush_interval: float = 1.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.mappings: dict[str, PersistentCooldownMapping] = {}
+        self.wheel = TimingWheel(time.time())
+        # Called with the command, encoded key and state of every bucket saved here.
+        self.listeners: list[Callable[[str, str, tuple[float, int, float]], None]] = []
+
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="cooldowns"
+        )
+        self._db: sqlite3.Connection | None = None
+        self._saved: dict[str, dict[Any, tuple[float, int, float]]] = {}
+        self._writes: dict[tuple[str, str], tuple[float, int, float, float] | None] = {}
+        self._writer: asyncio.Task | None = None
+
+        self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def _load(self) -> None:
+        db = self._connect()
+        now = time.time()
+        with db:
+            db.execute("DELETE FROM cooldowns WHERE expires <= ?", (now,))
+        rows = db.execute(
+            "SELECT command, key, window, tokens, last FROM cooldowns"
+        ).fetchall()
+        for command, key, window, tokens, last in rows:
+            self._saved.setdefault(command, {})[_decode_key(key)] = (
+                window,
+                tokens,
+                last,
+            )
+        logger.info(f"Loaded {len(rows)} active cooldowns")
+
+    def restore(self, name: str) -> dict[Any, tuple[float, int, float]]:
+        """Take the saved state of a command's buckets."""
+        return self._saved.pop(name, {})
+
+    def save(self, name: str, bucket: PersistentCooldown) -> None:
+        """Queue a bucket's state to be written, and schedule it to expire."""
+        expires = bucket._last + bucket.per
+        key = _encode_key(bucket.key)
+        self.wheel.schedule((name, bucket.key), expires)
+        self._queue(
+            (name, key), (bucket._window, bucket._tokens, bucket._last, expires)
+        )
+        for listener in self.listeners:
+            listener(name, key, (bucket._window, bucket._tokens, bucket._last))
+
+    def apply(self, name: str, key: str, state: tuple[float, int, float]) -> None:
+        """Take on the state of a bucket saved by another process sharing the database."""
+        key = _decode_key(key)
+        if (mapping := self.mappings.get(name)) is None:
+            self._saved.setdefault(name, {})[key] = state
+            return
+
+        if (bucket := mapping._cache.get(key)) is None:
+            bucket = mapping._cache[key] = mapping._bucket(key)
+        bucket._window, bucket._tokens, bucket._last = state
+        self.wheel.schedule((name, key), bucket._last + bucket.per)
+
+    def expire(self, now: float) -> None:
+        """Drop the buckets that have been unused for a whole cooldown period."""
+        for name, key in self.wheel.advance(now):
+            if (mapping := self.mappings.get(name)) is not None:
+                mapping._cache.pop(key, None)
+            self._queue((name, _encode_key(key)), None)
+
+    def _queue(
+        self, key: tuple[str, str], row: tuple[float, int, float, float] | None
+    ) -> None:
+        self._writes[key] = row
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_later())
+
+    async def _write_later(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+
+    def _write(self, writes: dict[tuple[str, str], tuple | None]) -> None:
+        db = self._connect()
+        with db:
+            db.executemany(
+                "INSERT OR REPLACE INTO cooldowns VALUES (?, ?, ?, ?, ?, ?)",
+                [(*key, *row) for key, row in writes.items() if row is not None],
+            )
+            db.executemany(
+                "DELETE FROM cooldowns WHERE command = ? AND key = ?",
+                [key for key, row in writes.items() if row is None],
+            )
+
+    async def flush(self) -> None:
+        """Write every queued change."""
+        writes, self._writes = self._writes, {}
+        if not writes:
+            return
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._write, writes
+            )
+        except sqlite3.Error as error:
+            logger.error(f"Failed to save {len(writes)} cooldowns: {error}")
+
+    async def close(self) -> None:
+        """Write any queued changes and close the database."""
+        if self._writer is not None:
+            self._writer.cancel()
+        await self.flush()
+        if self._db is not None:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._db.close
+            )
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,12 @@
+import pkgutil
+from collections.abc import Iterator
+
+from .. import exts
+
+
+def walk_extensions() -> Iterator[str]:
+    """Yield the dotted path of every extension module in the exts package."""
+    for module in pkgutil.walk_packages(exts.__path__, f"{exts.__name__}."):
+        if module.ispkg or module.name.rpartition(".")[2].startswith("_"):
+            continue  # Ignore packages and shadowed files
+        yield module.name
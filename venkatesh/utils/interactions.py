@@ -0,0 +1,239 @@
+import re
+import time
+from collections import Counter
+from collections.abc import Callable, Coroutine
+from dataclasses import dataclass
+from typing import Any
+
+from disnake import InteractionResponseType, MessageInteraction, ModalInteraction
+from disnake.ext import commands
+from loguru import logger
+
+from .log import correlated
+
+Handler = Callable[..., Coroutine[Any, Any, Any]]
+
+_PARAMETER = re.compile(r"\{(\w+)(?::(int|str))?\}")
+_CONVERTERS = {"int": int, "str": str}
+SEPARATOR = ":"
+# A modal submitted within this many seconds continues the interaction that opened it.
+MODAL_LIFETIME = 900.0
+
+
+def interaction_route(*patterns: str) -> Callable[[Handler], Handler]:
+    """
+    Mark a cog method as the handler for components and modals with the given custom IDs.
+
+    A pattern is either an exact ID such as `reg_button`, or contains parameters such as
+    `dept:{role_id:int}`, which are parsed out of the ID and passed to the handler as keyword
+    arguments. The bot registers the handlers when the cog is added.
+    """
+
+    def decorator(func: Handler) -> Handler:
+        func.__interaction_routes__ = (
+            *getattr(func, "__interaction_routes__", ()),
+            *patterns,
+        )
+        return func
+
+    return decorator
+
+
+@dataclass
+class Route:
+    """A handler and the custom ID pattern it was registered with."""
+
+    pattern: str
+    handler: Handler
+    prefix: str
+    parameters: list[tuple[str, Callable[[str], Any]]]
+
+    @classmethod
+    def parse(cls, pattern: str, handler: Handler) -> "Route":
+        """Split a pattern into its literal prefix and the parameters following it."""
+        match = _PARAMETER.search(pattern)
+        if match is None:
+            return cls(pattern, handler, pattern, [])
+
+        prefix, rest = pattern[: match.start()], pattern[match.start() :]
+        parameters = list(_PARAMETER.finditer(rest))
+        if rest != SEPARATOR.join(parameter.group(0) for parameter in parameters):
+            raise ValueError(
+                f"Parameters must come last in {pattern!r}, separated by {SEPARATOR!r}"
+            )
+        return cls(
+            pattern,
+            handler,
+            prefix,
+            [
+                (parameter[1], _CONVERTERS[parameter[2] or "str"])
+                for parameter in parameters
+            ],
+        )
+
+    def arguments(self, custom_id: str) -> dict[str, Any] | None:
+        """Parse the parameters out of a custom ID, or None if it doesn't fit the pattern."""
+        if not self.parameters:
+            return {}
+
+        values = custom_id[len(self.prefix) :].split(SEPARATOR)
+        if len(values) != len(self.parameters):
+            return None
+        try:
+            return {
+                name: convert(value)
+                for (name, convert), value in zip(self.parameters, values)
+            }
+        except ValueError:
+            return None
+
+
+class InteractionRouter:
+    """
+    Send component and modal interactions straight to the handler for their custom ID.
+
+    Exact IDs are looked up in a dict, and parametric IDs by walking a trie of their literal
+    prefixes, so no handler runs for an interaction that isn't meant for it. Everything logged
+    while handling an interaction carries its ID, and a modal submission carries the ID of the
+    interaction that opened the modal, so a whole registration can be followed in the logs.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.exact: dict[str, Route] = {}
+        self.trie: dict[str, Any] = {}
+        self.unhandled: Counter[str] = Counter()
+        # The interaction that last opened a modal for each user, and when.
+        self.modals: dict[int, tuple[str, float]] = {}
+
+        bot.add_listener(self.on_message_interaction)
+        bot.add_listener(self.on_modal_submit)
+
+    def add(self, pattern: str, handler: Handler) -> None:
+        """Route interactions matching a custom ID pattern to a handler."""
+        route = Route.parse(pattern, handler)
+        if not route.parameters:
+            if pattern in self.exact:
+                raise ValueError(f"Custom ID {pattern!r} is already routed")
+            self.exact[pattern] = route
+            return
+
+        node = self.trie
+        for char in route.prefix:
+            node = node.setdefault(char, {})
+        if None in node:
+            raise ValueError(f"Custom ID prefix {route.prefix!r} is already routed")
+        node[None] = route
+
+    def remove(self, pattern: str) -> None:
+        """Stop routing a custom ID pattern."""
+        route = Route.parse(pattern, lambda: None)
+        if not route.parameters:
+            self.exact.pop(pattern, None)
+            return
+
+        node = self.trie
+        for char in route.prefix:
+            if (node := node.get(char)) is None:
+                return
+        node.pop(None, None)
+
+    def add_cog(self, cog: commands.Cog) -> None:
+        """Register every handler a cog marked with `interaction_route`."""
+        for handler in self._handlers(cog):
+            for pattern in handler.__interaction_routes__:
+                self.add(pattern, handler)
+
+    def remove_cog(self, cog: commands.Cog) -> None:
+        """Unregister every handler belonging to a cog."""
+        for handler in self._handlers(cog):
+            for pattern in handler.__interaction_routes__:
+                self.remove(pattern)
+
+    @staticmethod
+    def _handlers(cog: commands.Cog) -> list[Handler]:
+        return [
+            getattr(cog, name)
+            for name, member in vars(type(cog)).items()
+            if hasattr(member, "__interaction_routes__")
+        ]
+
+    def match(self, custom_id: str) -> tuple[Route, dict[str, Any]] | None:
+        """Find the route for a custom ID and the parameters parsed from it."""
+        if (route := self.exact.get(custom_id)) is not None:
+            return route, {}
+
+        # The longest registered prefix that the ID starts with wins.
+        node, found = self.trie, None
+        for char in custom_id:
+            if None in node:
+                found = node[None]
+            if (node := node.get(char)) is None:
+                break
+        else:
+            found = node.get(None, found)
+
+        if found is not None and (arguments := found.arguments(custom_id)) is not None:
+            return found, arguments
+        return None
+
+    def correlate(self, inter: MessageInteraction | ModalInteraction) -> str:
+        """The correlation ID of an interaction: its own, or for a modal, the one that opened it."""
+        if isinstance(inter, ModalInteraction):
+            opened = self.modals.pop(inter.user.id, None)
+            if opened is not None and time.monotonic() - opened[1] < MODAL_LIFETIME:
+                return opened[0]
+        return str(inter.id)
+
+    def _opened_modal(self, inter: MessageInteraction, correlation: str) -> None:
+        now = time.monotonic()
+        if len(self.modals) >= 1000:
+            self.modals = {
+                user_id: opened
+                for user_id, opened in self.modals.items()
+                if now - opened[1] < MODAL_LIFETIME
+            }
+        self.modals[inter.user.id] = (correlation, now)
+
+    async def dispatch(
+        self, inter: MessageInteraction | ModalInteraction, custom_id: str
+    ) -> None:
+        """Run the handler for an interaction, or record that there wasn't one."""
+        correlation = self.correlate(inter)
+        with correlated(correlation):
+            await self._dispatch(inter, custom_id)
+        if inter.response.type is InteractionResponseType.modal:
+            self._opened_modal(inter, correlation)
+
+    async def _dispatch(
+        self, inter: MessageInteraction | ModalInteraction, custom_id: str
+    ) -> None:
+        if (matched := self.match(custom_id)) is None:
+            if not self.unhandled[custom_id]:
+                logger.warning(
+                    f"No handler for interaction with custom ID {custom_id!r}"
+                )
+            self.unhandled[custom_id] += 1
+            if metrics := getattr(self.bot, "metrics", None):
+                metrics.unhandled_interactions.inc(type=inter.type.name)
+            return
+
+        route, arguments = matched
+        start = time.perf_counter()
+        try:
+            await route.handler(inter, **arguments)
+        finally:
+            if metrics := getattr(self.bot, "metrics", None):
+                metrics.listener_duration.observe(
+                    time.perf_counter() - start,
+                    event="interaction",
+                    listener=route.handler.__qualname__,
+                )
+
+    async def on_message_interaction(self, inter: MessageInteraction) -> None:
+        """Route button and select menu interactions."""
+        await self.dispatch(inter, inter.data.custom_id)
+
+    async def on_modal_submit(self, inter: ModalInteraction) -> None:
+        """Route modal submissions."""
+        await self.dispatch(inter, inter.custom_id)
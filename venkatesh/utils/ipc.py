@@ -0,0 +1,178 @@
+import asyncio
+import json
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+from loguru import logger
+
+Handler = Callable[[Any, int | None], Awaitable[object] | None]
+
+# Messages are single JSON lines; anything longer than this is a bug, not a message.
+MAX_MESSAGE = 1 << 20
+
+
+def _encode(topic: str, origin: int | None, data: Any) -> bytes:
+    message = {"topic": topic, "origin": origin, "data": data}
+    return json.dumps(message, separators=(",", ":")).encode() + b"\n"
+
+
+class IPCBroker:
+    """
+    Relay messages between the bot processes over a Unix socket.
+
+    Every line a process writes is passed on to all the other connected processes. The
+    broker keeps no state of its own; a process that is disconnected misses what is sent in
+    the meantime.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        # Called with every message relayed, so the launcher can follow along.
+        self.listeners: list[Callable[[dict[str, Any]], None]] = []
+        self.clients: set[asyncio.StreamWriter] = set()
+        self._server: asyncio.Server | None = None
+        self._handlers: set[asyncio.Task] = set()
+
+    async def start(self) -> None:
+        """Listen for bot processes on the socket."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.path.unlink(missing_ok=True)
+        self._server = await asyncio.start_unix_server(
+            self._handle, path=str(self.path), limit=MAX_MESSAGE
+        )
+        logger.info(f"IPC broker listening on {self.path}")
+
+    async def _handle(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ) -> None:
+        self.clients.add(writer)
+        self._handlers.add(asyncio.current_task())
+        try:
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    logger.warning("Dropping a malformed IPC message")
+                    continue
+
+                for listener in self.listeners:
+                    listener(message)
+                for client in self.clients - {writer}:
+                    client.write(line)
+                    # A process that stops reading is dropped, so it can't stall the rest.
+                    if client.transport.get_write_buffer_size() > MAX_MESSAGE * 8:
+                        logger.warning("Disconnecting an IPC client that fell behind")
+                        client.close()
+                        self.clients.discard(client)
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as error:
+            logger.warning(f"IPC client disconnected: {error}")
+        finally:
+            self.clients.discard(writer)
+            self._handlers.discard(asyncio.current_task())
+            writer.close()
+
+    async def close(self) -> None:
+        """Disconnect every process and stop listening."""
+        if self._server is not None:
+            self._server.close()
+            for client in self.clients:
+                client.close()
+            # Closing a client ends its handler, once the handler gets to run.
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+        self.path.unlink(missing_ok=True)
+
+
+class IPCClient:
+    """
+    Publish and subscribe to messages shared between the bot processes.
+
+    `publish` never waits: messages are queued and written by a background task, which
+    reconnects to the broker with backoff whenever the connection drops. Messages published
+    while disconnected are dropped once the queue is full.
+    """
+
+    def __init__(self, path: Path, origin: int, *, max_queued: int = 1000):
+        self.path = path
+        self.origin = origin
+        self.handlers: dict[str, list[Handler]] = {}
+        self._outbox: asyncio.Queue[bytes] = asyncio.Queue(max_queued)
+        self._task: asyncio.Task | None = None
+        self.connected = asyncio.Event()
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        """Call a handler with the data and origin of every message on a topic."""
+        self.handlers.setdefault(topic, []).append(handler)
+
+    def unsubscribe(self, topic: str, handler: Handler) -> None:
+        """Stop calling a handler for a topic."""
+        if handler in self.handlers.get(topic, []):
+            self.handlers[topic].remove(handler)
+
+    def publish(self, topic: str, data: Any = None) -> None:
+        """Send a message to every other process."""
+        try:
+            self._outbox.put_nowait(_encode(topic, self.origin, data))
+        except asyncio.QueueFull:
+            logger.warning(f"IPC outbox is full, dropped a {topic} message")
+
+    def start(self) -> None:
+        """Connect to the broker in the background."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self, max_backoff: float = 30.0) -> None:
+        backoff = 0.5
+        while True:
+            try:
+                reader, writer = await asyncio.open_unix_connection(
+                    str(self.path), limit=MAX_MESSAGE
+                )
+            except OSError as error:
+                logger.warning(f"Failed to reach the IPC broker: {error}")
+                await asyncio.sleep(backoff)
+                backoff = min(backoff * 2, max_backoff)
+                continue
+
+            backoff = 0.5
+            self.connected.set()
+            sending = asyncio.create_task(self._send(writer))
+            try:
+                await self._receive(reader)
+            finally:
+                self.connected.clear()
+                sending.cancel()
+                writer.close()
+            logger.warning("Lost the connection to the IPC broker, reconnecting")
+
+    async def _send(self, writer: asyncio.StreamWriter) -> None:
+        while True:
+            line = await self._outbox.get()
+            writer.write(line)
+            await writer.drain()
+
+    async def _receive(self, reader: asyncio.StreamReader) -> None:
+        try:
+            while line := await reader.readline():
+                try:
+                    message = json.loads(line)
+                except ValueError:
+                    continue
+                for handler in self.handlers.get(message["topic"], []):
+                    try:
+                        if (
+                            result := handler(message["data"], message["origin"])
+                        ) is not None:
+                            await result
+                    except Exception as error:
+                        logger.error(
+                            f"IPC handler for {message['topic']} failed: {error}"
+                        )
+        except (ConnectionError, asyncio.LimitOverrunError, ValueError) as error:
+            logger.warning(f"IPC connection failed: {error}")
+
+    async def close(self) -> None:
+        """Stop sending and receiving."""
+        if self._task is not None:
+            self._task.cancel()
@@ -0,0 +1,29 @@
+class JoinRateMonitor:
+    """
+    Track how quickly members are joining with a ring buffer of the latest join times.
+
+    The buffer holds the last `threshold` joins, so whether at least `count` members joined
+    within the window is answered by looking at a single slot.
+    """
+
+    def __init__(self, threshold: int, window: float):
+        self.threshold = max(1, threshold)
+        self.window = window
+        self._times: list[float | None] = [None] * self.threshold
+        # The slot the next join is written to, which holds the oldest one.
+        self._head = 0
+
+    def record(self, now: float) -> None:
+        """Record a join at the given monotonic time."""
+        self._times[self._head] = now
+        self._head = (self._head + 1) % self.threshold
+
+    def above(self, count: int, now: float) -> bool:
+        """Whether at least `count` of the most recent joins fall within the window."""
+        count = min(max(1, count), self.threshold)
+        joined_at = self._times[(self._head - count) % self.threshold]
+        return joined_at is not None and now - joined_at <= self.window
+
+    def exceeded(self, now: float) -> bool:
+        """Whether the join threshold has been reached within the window."""
+        return self.above(self.threshold, now)
@@ -0,0 +1,156 @@
+import logging
+import sys
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any, TextIO
+
+from loguru import logger
+
+# The interaction, or chain of interactions, the code logging is working on behalf of.
+correlation_id: ContextVar[str | None] = ContextVar("correlation_id", default=None)
+
+TEXT_FORMAT = (
+    "<green>{time:YYYY-MM-DD HH:mm:ss.SSS}</green> | <level>{level: <8}</level> | "
+    "<cyan>{name}</cyan>:<cyan>{function}</cyan>:<cyan>{line}</cyan>"
+    "{extra[correlation]} - <level>{message}</level>"
+)
+
+
+@contextmanager
+def correlated(value: str | None) -> Iterator[None]:
+    """Tag everything logged within the block, and in tasks started from it, with an ID."""
+    token = correlation_id.set(value)
+    try:
+        yield
+    finally:
+        correlation_id.reset(token)
+
+
+def _add_correlation_id(record: dict[str, Any]) -> None:
+    value = correlation_id.get()
+    record["extra"]["correlation_id"] = value
+    record["extra"]["correlation"] = f" [{value}]" if value else ""
+
+
+class LevelFilter:
+    """Drop records below the level set for their module, or the closest package above it."""
+
+    def __init__(self, default: str, levels: dict[str, str]):
+        self.default = logger.level(default).no
+        self.levels = {name: logger.level(level).no for name, level in levels.items()}
+        self._cache: dict[str, int] = {}
+
+    @property
+    def lowest(self) -> int:
+        """The lowest level any module logs at."""
+        return min([self.default, *self.levels.values()])
+
+    def threshold(self, name: str) -> int:
+        """The level a module logs at."""
+        if (level := self._cache.get(name)) is None:
+            level = self.default
+            module = name
+            while module:
+                if module in self.levels:
+                    level = self.levels[module]
+                    break
+                module = module.rpartition(".")[0]
+            self._cache[name] = level
+        return level
+
+    def __call__(self, record: dict[str, Any]) -> bool:
+        return record["level"].no >= self.threshold(record["name"] or "")
+
+
+class Rotation:
+    """Rotate a log file once it reaches `size` bytes, or after `interval` seconds of use."""
+
+    def __init__(self, size: int, interval: float):
+        self.size = size
+        self.interval = interval
+        self.opened_at: float | None = None
+
+    def __call__(self, message: Any, file: TextIO) -> bool:
+        now = time.time()
+        if self.opened_at is None:
+            self.opened_at = now
+        if (self.size and file.tell() + len(message) > self.size) or (
+            self.interval and now - self.opened_at >= self.interval
+        ):
+            self.opened_at = now
+            return True
+        return False
+
+
+class InterceptHandler(logging.Handler):
+    """Pass records from the standard library's logging, such as disnake's, on to loguru."""
+
+    def emit(self, record: logging.LogRecord) -> None:
+        """Log a standard library record through loguru."""
+        try:
+            level: str | int = logger.level(record.levelname).name
+        except ValueError:
+            level = record.levelno
+
+        # Report the caller of the logging call, rather than the logging module itself.
+        frame, depth = sys._getframe(1), 1
+        while frame is not None and frame.f_code.co_filename == logging.__file__:
+            frame = frame.f_back
+            depth += 1
+        # Filtered by the logger's name, as set by the library, rather than the caller's module.
+        logger.patch(lambda patched: patched.update(name=record.name)).opt(
+            depth=depth, exception=record.exc_info
+        ).log(level, record.getMessage())
+
+
+def setup_logging(
+    level: str = "INFO",
+    *,
+    levels: dict[str, str] | None = None,
+    serialize: bool = False,
+    path: Path | None = None,
+    rotation: Rotation | None = None,
+    retention: str | int | None = None,
+) -> None:
+    """
+    Send every log record through a queue to a background writer.
+
+    Records go to stderr, as JSON if `serialize` is set, and as JSON to a compressed,
+    rotated file at `path` if given. Modules log at `level` unless `levels` sets their own, by
+    module or package name. The standard library's logging is routed through the same sinks.
+    """
+    level_filter = LevelFilter(level, levels or {})
+    logger.remove()
+    logger.configure(patcher=_add_correlation_id)
+
+    # With enqueue, logging only puts the record on a queue; a thread does the slow writing.
+    logger.add(
+        sys.stderr,
+        level=0,
+        format=TEXT_FORMAT,
+        filter=level_filter,
+        serialize=serialize,
+        enqueue=True,
+        backtrace=False,
+    )
+    if path is not None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        logger.add(
+            path,
+            level=0,
+            filter=level_filter,
+            serialize=True,
+            enqueue=True,
+            backtrace=False,
+            rotation=rotation,
+            retention=retention,
+            compression="gz",
+        )
+
+    # Records below every module's level are dropped before they're even formatted.
+    logging.basicConfig(
+        handlers=[InterceptHandler()], level=level_filter.lowest, force=True
+    )
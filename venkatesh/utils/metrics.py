@@ -0,0 +1,308 @@
+import bisect
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from aiohttp import web
+from disnake.ext import commands
+from loguru import logger
+
+from .outbound import Priority
+
+LabelSet = tuple[tuple[str, str], ...]
+
+# Seconds, from a quick cache hit up to a handler that blew through the interaction deadline.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _labels(labels: dict[str, Any]) -> LabelSet:
+    return tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+
+def _format_labels(labels: Iterable[tuple[str, str]]) -> str:
+    labels = list(labels)
+    if not labels:
+        return ""
+    escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for _, value in labels)
+    return (
+        "{"
+        + ",".join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped))
+        + "}"
+    )
+
+
+class Metric(ABC):
+    """A named metric, rendered in the Prometheus text exposition format."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, description: str):
+        self.name = name
+        self.description = description
+
+    @abstractmethod
+    def samples(self) -> Iterable[tuple[str, LabelSet, float]]:
+        """Every sample of the metric as (name, labels, value)."""
+
+    def render(self) -> str:
+        """The metric in the Prometheus text format."""
+        lines = [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} {self.type}",
+        ]
+        lines += [
+            f"{name}{_format_labels(labels)} {value}"
+            for name, labels, value in self.samples()
+        ]
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    """A value that only goes up."""
+
+    type = "counter"
+
+    def __init__(self, name: str, description: str):
+        super().__init__(name, description)
+        self.values: dict[LabelSet, float] = {}
+
+    def inc(self, amount: float = 1, **labels: Any) -> None:
+        """Increase the counter for the given labels."""
+        key = _labels(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def total(self) -> float:
+        """The sum of the counter over every label set."""
+        return sum(self.values.values())
+
+    def samples(self) -> Iterable[tuple[str, LabelSet, float]]:
+        """Every sample of the metric as (name, labels, value)."""
+        return ((self.name, labels, value) for labels, value in self.values.items())
+
+
+class Gauge(Metric):
+    """A value read from a callback whenever the metrics are collected."""
+
+    type = "gauge"
+
+    def __init__(
+        self, name: str, description: str, callback: Callable[[], dict[LabelSet, float]]
+    ):
+        super().__init__(name, description)
+        self.callback = callback
+
+    def samples(self) -> Iterable[tuple[str, LabelSet, float]]:
+        """Every sample of the metric as (name, labels, value)."""
+        return ((self.name, labels, value) for labels, value in self.callback().items())
+
+
+class Histogram(Metric):
+    """Observations counted into cumulative buckets."""
+
+    type = "histogram"
+
+    def __init__(
+        self, name: str, description: str, buckets: tuple[float, ...] = DEFAULT_BUCKETS
+    ):
+        super().__init__(name, description)
+        self.buckets = buckets
+        self.counts: dict[LabelSet, list[int]] = {}
+        self.sums: dict[LabelSet, float] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        """Record an observation for the given labels."""
+        key = _labels(labels)
+        counts = self.counts.setdefault(key, [0] * (len(self.buckets) + 1))
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[key] = self.sums.get(key, 0.0) + value
+
+    def quantile(self, q: float, **labels: Any) -> float | None:
+        """Estimate a quantile by interpolating within the bucket it falls in."""
+        counts = self.counts.get(_labels(labels))
+        if not counts:
+            return None
+
+        rank = q * sum(counts)
+        seen = 0
+        for index, count in enumerate(counts):
+            if seen + count >= rank and count:
+                lower = self.buckets[index - 1] if index else 0.0
+                upper = self.buckets[index] if index < len(self.buckets) else lower
+                return lower + (upper - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def samples(self) -> Iterable[tuple[str, LabelSet, float]]:
+        """Every sample of the metric as (name, labels, value)."""
+        for labels, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", (*labels, ("le", str(bound))), cumulative
+            yield f"{self.name}_sum", labels, self.sums[labels]
+            yield f"{self.name}_count", labels, cumulative
+
+
+class BotMetrics:
+    """The metrics collected about the bot, and the HTTP endpoint serving them."""
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.started_at = time.monotonic()
+
+        self.listener_duration = Histogram(
+            "venkatesh_listener_duration_seconds", "Time taken by each event listener."
+        )
+        self.command_duration = Histogram(
+            "venkatesh_command_duration_seconds", "Time taken by each command."
+        )
+        self.rest_requests = Counter(
+            "venkatesh_rest_requests_total",
+            "Requests made to the Discord API, by route.",
+        )
+        self.rest_duration = Histogram(
+            "venkatesh_rest_request_duration_seconds",
+            "Discord API response times, by route.",
+        )
+        self.rate_limited = Counter(
+            "venkatesh_rest_rate_limited_total",
+            "429 responses from the Discord API, by route.",
+        )
+        self.rest_queue_wait = Histogram(
+            "venkatesh_rest_queue_wait_seconds",
+            "Time requests waited for room under the rate limits, by priority.",
+        )
+        self.unhandled_interactions = Counter(
+            "venkatesh_unhandled_interactions_total",
+            "Component and modal interactions with no handler for their custom ID.",
+        )
+        self.loop_lag = Histogram(
+            "venkatesh_event_loop_lag_seconds",
+            "How late the event loop was to run a timer.",
+        )
+        self.jobs = Counter(
+            "venkatesh_jobs_total",
+            "Background jobs for interactions, by job and outcome.",
+        )
+        self.metrics: list[Metric] = [
+            self.listener_duration,
+            self.command_duration,
+            self.rest_requests,
+            self.rest_duration,
+            self.rate_limited,
+            self.rest_queue_wait,
+            self.unhandled_interactions,
+            self.loop_lag,
+            self.jobs,
+            Gauge(
+                "venkatesh_gateway_latency_seconds",
+                "Time between a gateway heartbeat and its acknowledgement.",
+                lambda: {(): self.bot.latency},
+            ),
+            Gauge(
+                "venkatesh_work_queue_depth",
+                "Background jobs waiting for a worker.",
+                self.queue_depth,
+            ),
+            Gauge(
+                "venkatesh_rest_queue_depth",
+                "Requests waiting for room under the rate limits, by priority.",
+                self.rest_queue_depth,
+            ),
+            Gauge(
+                "venkatesh_spool_pending",
+                "Log and audit messages written to the spool but not yet delivered.",
+                self.spool_pending,
+            ),
+            Gauge(
+                "venkatesh_cache_size", "Objects held in each cache.", self.cache_sizes
+            ),
+        ]
+        self._runner: web.AppRunner | None = None
+
+    def cache_sizes(self) -> dict[LabelSet, float]:
+        """The number of objects in each of the bot's caches."""
+        sizes = {
+            "guilds": len(self.bot.guilds),
+            "users": len(self.bot.users),
+            "members": sum(len(guild.members) for guild in self.bot.guilds),
+            "messages": len(self.bot.cached_messages),
+        }
+        if resolver := getattr(self.bot, "resolver", None):
+            sizes["resolver_channels"] = len(resolver.channels)
+            sizes["resolver_roles"] = len(resolver.roles)
+        if snapshot := getattr(self.bot, "snapshot", None):
+            sizes["snapshot_members"] = sum(map(len, snapshot.members.values()))
+        return {_labels({"cache": cache}): size for cache, size in sizes.items()}
+
+    def queue_depth(self) -> dict[LabelSet, float]:
+        """The number of jobs waiting in the work queue."""
+        if work_queue := getattr(self.bot, "work_queue", None):
+            return {(): work_queue.queue.qsize()}
+        return {}
+
+    def rest_queue_depth(self) -> dict[LabelSet, float]:
+        """The number of requests waiting in each priority."""
+        if outbound := getattr(self.bot, "outbound", None):
+            return {
+                _labels({"priority": priority.name.lower()}): depth
+                for priority, depth in outbound.depths().items()
+            }
+        return {}
+
+    def spool_pending(self) -> dict[LabelSet, float]:
+        """The number of spooled messages waiting to be delivered."""
+        if spool := getattr(self.bot, "spool", None):
+            return {(): len(spool.pending)}
+        return {}
+
+    def observe_request(self, route: str, status: int, duration: float) -> None:
+        """Record a response from the Discord API."""
+        self.rest_requests.inc(route=route, status=status)
+        self.rest_duration.observe(duration, route=route)
+        if status == 429:
+            self.rate_limited.inc(route=route)
+
+    def observe_rest_wait(self, priority: Priority, waited: float) -> None:
+        """Record how long a request waited for room under the rate limits."""
+        self.rest_queue_wait.observe(waited, priority=priority.name.lower())
+
+    def observe_job(self, name: str, outcome: str) -> None:
+        """Record what happened to a background job."""
+        self.jobs.inc(job=name, outcome=outcome)
+
+    def observe_loop_lag(self, lag: float) -> None:
+        """Record how late the event loop was to run a timer."""
+        self.loop_lag.observe(lag)
+
+    def observe_command(
+        self, name: str, kind: str, duration: float, failed: bool
+    ) -> None:
+        """Record how long a prefix or slash command took."""
+        outcome = "failed" if failed else "completed"
+        self.command_duration.observe(
+            duration, command=name, kind=kind, outcome=outcome
+        )
+
+    def render(self) -> str:
+        """Every metric in the Prometheus text format."""
+        return "\n".join(metric.render() for metric in self.metrics) + "\n"
+
+    async def handle_metrics(self, request: web.Request) -> web.Response:
+        """Serve the metrics to a scraper."""
+        return web.Response(text=self.render(), content_type="text/plain")
+
+    async def start(self, host: str, port: int) -> None:
+        """Serve the metrics at http://host:port/metrics."""
+        app = web.Application()
+        app.router.add_get("/metrics", self.handle_metrics)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port).start()
+        logger.info(f"Serving metrics at http://{host}:{port}/metrics")
+
+    async def close(self) -> None:
+        """Stop serving the metrics."""
+        if self._runner is not None:
+            await self._runner.cleanup()
@@ -0,0 +1,251 @@
+import asyncio
+import json
+from collections.abc import Awaitable, Callable, Iterable, Mapping, Set
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+
+from disnake import Guild, HTTPException, Member, Object
+from loguru import logger
+
+from .config import Config
+from .ratelimits import Bucket, RateLimitObserver
+
+
+def parse_changes(tokens: Iterable[str], config: Config) -> tuple[set[int], set[int]]:
+    """Parse role changes such as `+member -guest` into role IDs to add and remove."""
+    aliases = config.role_aliases()
+    add: set[int] = set()
+    remove: set[int] = set()
+
+    for token in tokens:
+        sign, name = token[:1], token[1:].lower()
+        if sign not in ("+", "-") or name not in aliases:
+            raise ValueError(f"Unknown role change `{token}`.")
+        (add if sign == "+" else remove).update(aliases[name])
+
+    if not add and not remove:
+        raise ValueError("No role changes given.")
+    return add, remove
+
+
+def matches(selector: str, role_ids: Set[int], config: Config) -> bool:
+    """Whether a member with the given roles is selected by `all`, `none` or a role name."""
+    if selector == "all":
+        return True
+    if selector == "none":
+        return not role_ids & {config.roles.guest, config.roles.member}
+    return bool(role_ids & config.role_aliases()[selector])
+
+
+@dataclass
+class Checkpoint:
+    """Everything needed to resume an interrupted migration."""
+
+    guild_id: int
+    selector: str
+    add: set[int]
+    remove: set[int]
+    done: set[int] = field(default_factory=set)
+    failed: set[int] = field(default_factory=set)
+
+    @classmethod
+    def load(cls, path: Path) -> "Checkpoint | None":
+        """Read a checkpoint from disk, if one exists."""
+        if not path.exists():
+            return None
+
+        data = json.loads(path.read_text())
+        return cls(
+            guild_id=data["guild_id"],
+            selector=data["selector"],
+            **{key: set(data[key]) for key in ("add", "remove", "done", "failed")},
+        )
+
+    def save(self, path: Path) -> None:
+        """Atomically write the checkpoint to disk."""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = {
+            key: sorted(value) if isinstance(value, set) else value
+            for key, value in asdict(self).items()
+        }
+        temp = path.with_suffix(".tmp")
+        temp.write_text(json.dumps(data))
+        temp.replace(path)
+
+
+@dataclass
+class Progress:
+    """Counts of members processed by a migration."""
+
+    total: int
+    changed: int = 0
+    unchanged: int = 0
+    failed: int = 0
+
+    @property
+    def processed(self) -> int:
+        """Members that have been handled, successfully or not."""
+        return self.changed + self.unchanged + self.failed
+
+
+class AdaptiveLimiter:
+    """
+    Bound the number of requests in flight.
+
+    The limit halves whenever the route is rate limited, and grows back by one at a time while
+    the rate-limit headers show there are requests to spare.
+    """
+
+    def __init__(self, maximum: int):
+        self.maximum = maximum
+        self.limit = maximum
+        self.active = 0
+        self._rate_limited = 0
+        self._condition = asyncio.Condition()
+
+    async def __aenter__(self) -> None:
+        async with self._condition:
+            await self._condition.wait_for(lambda: self.active < self.limit)
+            self.active += 1
+
+    async def __aexit__(self, *_) -> None:
+        async with self._condition:
+            self.active -= 1
+            self._condition.notify_all()
+
+    async def update(self, bucket: Bucket | None) -> None:
+        """Adjust the limit to the latest rate-limit headers for the route."""
+        if bucket is None:
+            return
+
+        if bucket.rate_limited > self._rate_limited:
+            self._rate_limited = bucket.rate_limited
+            self.limit = max(1, self.limit // 2)
+        elif bucket.remaining > self.active:
+            self.limit = min(self.maximum, self.limit + 1)
+
+        if bucket.remaining == 0:
+            await asyncio.sleep(bucket.reset_after)
+
+        async with self._condition:
+            self._condition.notify_all()
+
+
+class RoleMigration:
+    """Change the roles of every member matching a selector, checkpointing as it goes."""
+
+    def __init__(
+        self,
+        guild: Guild,
+        checkpoint: Checkpoint,
+        path: Path,
+        observer: RateLimitObserver,
+        config: Config,
+        *,
+        max_concurrency: int = 8,
+        checkpoint_every: int = 25,
+    ):
+        self.guild = guild
+        self.checkpoint = checkpoint
+        self.path = path
+        self.observer = observer
+        self.config = config
+        self.limiter = AdaptiveLimiter(max_concurrency)
+        self.checkpoint_every = checkpoint_every
+
+    def pending(self) -> list[Member]:
+        """Members matching the selector that haven't been processed yet."""
+        done = self.checkpoint.done | self.checkpoint.failed
+        return [
+            member
+            for member in self.guild.members
+            if member.id not in done
+            and matches(
+                self.checkpoint.selector,
+                {role.id for role in member.roles},
+                self.config,
+            )
+        ]
+
+    def target_roles(self, current: Set[int]) -> set[int]:
+        """The role IDs a member with the given roles should end up with."""
+        return (set(current) - self.checkpoint.remove) | self.checkpoint.add
+
+    def dry_run(self, members: Mapping[int, Set[int]]) -> Progress:
+        """Count what a migration would do to members with the given role IDs."""
+        done = self.checkpoint.done | self.checkpoint.failed
+        selected = [
+            roles
+            for member_id, roles in members.items()
+            if member_id not in done
+            and matches(self.checkpoint.selector, roles, self.config)
+        ]
+        progress = Progress(total=len(selected))
+        for current in selected:
+            if current == self.target_roles(current):
+                progress.unchanged += 1
+            else:
+                progress.changed += 1
+        return progress
+
+    async def _migrate(self, member: Member, progress: Progress) -> None:
+        current = {role.id for role in member.roles if not role.is_default()}
+        target = self.target_roles(current)
+        if current == target:
+            progress.unchanged += 1
+            self.checkpoint.done.add(member.id)
+            return
+
+        async with self.limiter:
+            try:
+                await member.edit(
+                    roles=[Object(role_id) for role_id in target],
+                    reason="Role migration",
+                )
+            except HTTPException as error:
+                logger.error(
+                    f"Failed to migrate roles for {member} ({member.id}): {error}"
+                )
+                progress.failed += 1
+                self.checkpoint.failed.add(member.id)
+            else:
+                progress.changed += 1
+                self.checkpoint.done.add(member.id)
+
+        await self.limiter.update(
+            self.observer.get("PATCH", f"/guilds/{self.guild.id}/members/{member.id}")
+        )
+        if progress.processed % self.checkpoint_every == 0:
+            self.checkpoint.save(self.path)
+
+    async def run(
+        self,
+        report: Callable[[Progress], Awaitable[None]],
+        report_interval: float = 5.0,
+    ) -> Progress:
+        """Migrate every pending member, calling `report` periodically with the progress."""
+        members = self.pending()
+        progress = Progress(total=len(members))
+        self.checkpoint.save(self.path)
+
+        async def worker() -> None:
+            while members:
+                await self._migrate(members.pop(), progress)
+
+        async def reporter() -> None:
+            while True:
+                await report(progress)
+                await asyncio.sleep(report_interval)
+
+        reporting = asyncio.create_task(reporter())
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.limiter.maximum)))
+        finally:
+            reporting.cancel()
+            self.checkpoint.save(self.path)
+
+        # The checkpoint is kept while there are failures, so resuming can retry them.
+        if not self.checkpoint.failed:
+            self.path.unlink(missing_ok=True)
+        await report(progress)
+        return progress
@@ -0,0 +1,225 @@
+import asyncio
+import heapq
+import itertools
+import math
+import re
+import time
+from collections import Counter
+from collections.abc import Callable, Collection
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any
+
+from disnake.http import HTTPClient, Route
+from yarl import URL
+
+from .ratelimits import RateLimitObserver, route_key
+
+_ROLE_EDIT = re.compile(
+    r"^(PATCH|PUT|DELETE) /guilds/\d+/members/\{id\}(/roles/\{id\})?$"
+)
+_MESSAGE = re.compile(r"^POST /channels/(\d+)/messages$")
+
+
+class Priority(IntEnum):
+    """Classes of outbound requests, most urgent first."""
+
+    INTERACTION = 0
+    ROLE_EDIT = 1
+    DEFAULT = 2
+    AUDIT = 3
+
+
+@dataclass(order=True)
+class _Waiter:
+    priority: Priority
+    sequence: int
+    key: str = field(compare=False)
+    future: asyncio.Future[None] = field(compare=False)
+    queued_at: float = field(compare=False)
+
+
+class OutboundScheduler:
+    """
+    Make REST requests in order of priority, within Discord's rate limits.
+
+    Every request the bot makes first takes a token from a global bucket refilling at
+    `global_rate` per second, and room in its route's bucket: what the observer last heard
+    was remaining, less the requests already in flight on it. Requests that would go over
+    either wait, and are let through most urgent first, so a burst of log messages can't hold
+    up role edits queued behind them. Interaction responses don't count towards the global
+    limit and each has a bucket of its own, so they never wait.
+    """
+
+    def __init__(
+        self,
+        observer: RateLimitObserver,
+        *,
+        global_rate: float = 50.0,
+        audit_channels: Callable[[], Collection[int]] = frozenset,
+    ):
+        self.observer = observer
+        self.global_rate = global_rate
+        # Messages to these channels are records rather than replies, so they can wait longest.
+        self.audit_channels = audit_channels
+        # Called with the priority and seconds waited of every request let through.
+        self.listeners: list[Callable[[Priority, float], None]] = []
+        self.in_flight: Counter[str] = Counter()
+        self._tokens = global_rate
+        self._refilled_at = time.monotonic()
+        self._waiting: list[_Waiter] = []
+        self._sequence = itertools.count()
+        self._wake = asyncio.Event()
+        self._task: asyncio.Task | None = None
+
+    def classify(self, key: str) -> Priority:
+        """The priority of a request, from its route key."""
+        # The bot's only webhooks are interaction followups, which are keyed by their token.
+        if "/interactions/" in key or "{token}" in key:
+            return Priority.INTERACTION
+        if _ROLE_EDIT.match(key):
+            return Priority.ROLE_EDIT
+        if (match := _MESSAGE.match(key)) and int(match[1]) in self.audit_channels():
+            return Priority.AUDIT
+        return Priority.DEFAULT
+
+    def depths(self) -> dict[Priority, int]:
+        """The number of requests waiting in each priority."""
+        depths = Counter(waiter.priority for waiter in self._waiting)
+        return {priority: depths[priority] for priority in Priority}
+
+    def attach(self, http: HTTPClient) -> None:
+        """Schedule every request made through the bot's HTTP client."""
+        request = http.request
+        if getattr(request, "scheduled", False):
+            return
+
+        async def scheduled(route: Route, **kwargs: Any) -> Any:
+            key = route_key(route.method, URL(route.url).path)
+            await self.acquire(key)
+            try:
+                return await request(route, **kwargs)
+            finally:
+                self.release(key)
+
+        scheduled.scheduled = True  # type: ignore
+        http.request = scheduled  # type: ignore
+        self.start()
+
+    async def acquire(self, key: str) -> None:
+        """Wait until a request can be made on a route without going over a rate limit."""
+        priority = self.classify(key)
+        now = time.monotonic()
+        if priority is Priority.INTERACTION or (
+            not self._waiting and self._take(key, now)
+        ):
+            self.in_flight[key] += 1
+            self._notify(priority, 0.0)
+            return
+
+        waiter = _Waiter(
+            priority,
+            next(self._sequence),
+            key,
+            asyncio.get_running_loop().create_future(),
+            now,
+        )
+        heapq.heappush(self._waiting, waiter)
+        self.start()
+        self._wake.set()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            # Let through just as it was cancelled, so the room it was given is handed back.
+            if waiter.future.done() and not waiter.future.cancelled():
+                self.release(key)
+            elif waiter in self._waiting:
+                self._waiting.remove(waiter)
+                heapq.heapify(self._waiting)
+                self._wake.set()
+            raise
+
+    def release(self, key: str) -> None:
+        """Note a request on a route has finished."""
+        self.in_flight[key] -= 1
+        if self.in_flight[key] <= 0:
+            del self.in_flight[key]
+        if self._waiting:
+            self._wake.set()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(
+            self.global_rate,
+            self._tokens + (now - self._refilled_at) * self.global_rate,
+        )
+        self._refilled_at = now
+
+    def _route_delay(self, key: str, now: float) -> float:
+        """Seconds until the route has room, or infinity if it's waiting on requests in flight."""
+        bucket = self.observer.buckets.get(key)
+        if bucket is None or not bucket.limit:
+            return 0.0
+
+        resets_in = bucket.reset_at - now
+        remaining = bucket.remaining if resets_in > 0 else bucket.limit
+        if remaining > self.in_flight[key]:
+            return 0.0
+        return resets_in if resets_in > 0 else math.inf
+
+    def _take(self, key: str, now: float) -> bool:
+        self._refill(now)
+        if self._tokens < 1 or self._route_delay(key, now):
+            return False
+        self._tokens -= 1
+        return True
+
+    def _dispatch(self) -> float | None:
+        """Let through every waiting request there's room for, returning when to look again."""
+        now = time.monotonic()
+        delays = []
+        waiting = []
+        for waiter in sorted(self._waiting):
+            if waiter.future.done():
+                continue
+            if not self._take(waiter.key, now):
+                waiting.append(waiter)
+                if self._tokens >= 1:
+                    delays.append(self._route_delay(waiter.key, now))
+                continue
+
+            self.in_flight[waiter.key] += 1
+            waiter.future.set_result(None)
+            self._notify(waiter.priority, now - waiter.queued_at)
+
+        # A sorted list is already a heap.
+        self._waiting = waiting
+        if waiting and self._tokens < 1:
+            delays.append((1 - self._tokens) / self.global_rate)
+        delay = min(delays, default=math.inf)
+        return None if delay == math.inf else delay
+
+    def _notify(self, priority: Priority, waited: float) -> None:
+        for listener in self.listeners:
+            listener(priority, waited)
+
+    def start(self) -> None:
+        """Start letting waiting requests through."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self._wake.clear()
+            delay = self._dispatch()
+            try:
+                await asyncio.wait_for(self._wake.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    def close(self) -> None:
+        """Stop letting requests through, cancelling those still waiting."""
+        if self._task is not None:
+            self._task.cancel()
+        for waiter in self._waiting:
+            waiter.future.cancel()
+        self._waiting.clear()
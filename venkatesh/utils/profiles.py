@@ -0,0 +1,97 @@
+from collections.abc import Callable
+from typing import NamedTuple
+
+from disnake import Intents, MemberCacheFlags
+
+
+class Profile(NamedTuple):
+    """The gateway intents and member caching used by the bot."""
+
+    intents: Callable[[], Intents]
+    member_cache_flags: Callable[[Intents], MemberCacheFlags]
+    chunk_guilds_at_startup: bool
+    caches_members: bool
+    description: str
+
+
+def _full() -> Intents:
+    intents = Intents.default()
+    intents.members = True
+    intents.message_content = True
+    intents.presences = True
+    return intents
+
+
+def _standard() -> Intents:
+    intents = Intents.default()
+    intents.members = True
+    intents.message_content = True
+    return intents
+
+
+def _lean() -> Intents:
+    return Intents(guilds=True, members=True, guild_messages=True, message_content=True)
+
+
+PROFILES = {
+    "full": Profile(
+        _full,
+        lambda _: MemberCacheFlags.all(),
+        True,
+        True,
+        "Every member, role and presence is cached. No cog reads presences.",
+    ),
+    "standard": Profile(
+        _standard,
+        MemberCacheFlags.from_intents,
+        True,
+        True,
+        "Members are chunked and cached without presences. Everything the cogs use.",
+    ),
+    "lean": Profile(
+        _lean,
+        lambda _: MemberCacheFlags.none(),
+        False,
+        False,
+        "Only the events the cogs listen to. No members are cached, even after chunking,"
+        " so `migrate` is unavailable.",
+    ),
+}
+
+# The intent each gateway event listened to by a cog depends on.
+EVENT_INTENTS = {
+    "on_member_join": "members",
+    "on_member_remove": "members",
+    "on_member_update": "members",
+    "on_raw_member_remove": "members",
+    "on_presence_update": "presences",
+    "on_message": "messages",
+    "on_message_edit": "messages",
+    "on_message_delete": "messages",
+    "on_voice_state_update": "voice_states",
+    "on_typing": "typing",
+    "on_guild_channel_update": "guilds",
+    "on_guild_channel_delete": "guilds",
+    "on_guild_role_update": "guilds",
+    "on_guild_role_delete": "guilds",
+}
+
+
+# Events disnake only dispatches for members it has cached.
+MEMBER_CACHE_EVENTS = {"on_member_remove", "on_member_update", "on_presence_update"}
+
+
+def missing_intents(intents: Intents, events: list[str]) -> dict[str, str]:
+    """Map each listened-to event to the intent it needs, where that intent is disabled."""
+    return {
+        event: EVENT_INTENTS[event]
+        for event in events
+        if event in EVENT_INTENTS and not getattr(intents, EVENT_INTENTS[event])
+    }
+
+
+def uncached_events(flags: MemberCacheFlags, events: list[str]) -> list[str]:
+    """The listened-to events that never fire, because no members are cached."""
+    if flags.value:
+        return []
+    return [event for event in events if event in MEMBER_CACHE_EVENTS]
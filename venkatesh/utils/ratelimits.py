@@ -0,0 +1,93 @@
+import re
+import time
+from collections.abc import Callable
+from dataclasses import dataclass
+from types import SimpleNamespace
+
+import aiohttp
+from disnake.http import HTTPClient
+
+_API_PREFIX = re.compile(r"^/api/v\d+")
+# Snowflakes that aren't major parameters are collapsed, so requests on the same route share a key.
+_MINOR_ID = re.compile(r"(?<!channels/)(?<!guilds/)(?<!webhooks/)\b\d{15,21}\b")
+# Interaction tokens are unique per interaction, so they'd give every response its own key.
+_TOKEN = re.compile(r"(/(?:interactions/\d+|webhooks/\d+)/)[^/]+")
+
+
+def route_key(method: str, path: str) -> str:
+    """Key a request by its method and path, keeping only Discord's major parameters."""
+    path = _TOKEN.sub(r"\1{token}", _API_PREFIX.sub("", path))
+    return f"{method} {_MINOR_ID.sub('{id}', path)}"
+
+
+@dataclass
+class Bucket:
+    """The last rate-limit headers Discord sent for a route."""
+
+    limit: int
+    remaining: int
+    reset_at: float
+    rate_limited: int = 0
+
+    @property
+    def reset_after(self) -> float:
+        """Seconds until the bucket refills."""
+        return max(0.0, self.reset_at - time.monotonic())
+
+
+class RateLimitObserver:
+    """Keep track of the rate-limit headers on every response the bot receives from the API."""
+
+    def __init__(self):
+        self.buckets: dict[str, Bucket] = {}
+        # Called with the route key, status and duration of every response.
+        self.listeners: list[Callable[[str, int, float], None]] = []
+        self.trace_config = aiohttp.TraceConfig()
+        self.trace_config.on_request_start.append(self._on_request_start)
+        self.trace_config.on_request_end.append(self._on_request_end)
+        self.trace_config.freeze()
+
+    def attach(self, http: HTTPClient) -> None:
+        """Observe every request made through the bot's HTTP session."""
+        # disnake doesn't accept trace configs, so hook into the session it creates on login.
+        session: aiohttp.ClientSession = http._HTTPClient__session  # type: ignore
+        if self.trace_config not in session.trace_configs:
+            session.trace_configs.append(self.trace_config)
+
+    def get(self, method: str, path: str) -> Bucket | None:
+        """Get the last known bucket state for a route."""
+        return self.buckets.get(route_key(method, path))
+
+    async def _on_request_start(
+        self,
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceRequestStartParams,
+    ) -> None:
+        context.started_at = time.perf_counter()
+
+    async def _on_request_end(
+        self,
+        session: aiohttp.ClientSession,
+        context: SimpleNamespace,
+        params: aiohttp.TraceRequestEndParams,
+    ) -> None:
+        key = route_key(params.method, params.url.path)
+        duration = time.perf_counter() - context.started_at
+        for listener in self.listeners:
+            listener(key, params.response.status, duration)
+
+        headers = params.response.headers
+        limited = params.response.status == 429
+        if "X-RateLimit-Limit" not in headers and not limited:
+            return
+
+        bucket = self.buckets.setdefault(key, Bucket(0, 0, 0.0))
+        if "X-RateLimit-Limit" in headers:
+            bucket.limit = int(headers["X-RateLimit-Limit"])
+            bucket.remaining = int(headers.get("X-RateLimit-Remaining", 0))
+            bucket.reset_at = time.monotonic() + float(
+                headers.get("X-RateLimit-Reset-After", 0)
+            )
+        if limited:
+            bucket.rate_limited += 1
@@ -0,0 +1,279 @@
+import asyncio
+import sqlite3
+from collections.abc import Callable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import astuple, dataclass, fields
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, TypeVar
+
+from loguru import logger
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS registrations (
+    user_id INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    registration_number TEXT NOT NULL,
+    email TEXT NOT NULL,
+    phone TEXT NOT NULL,
+    registered_at TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS registrations_user_id ON registrations (user_id);
+"""
+# Replaces the plain indexes of databases made before registrations had to be unique.
+UNIQUE_INDEXES = """
+DROP INDEX IF EXISTS registrations_number;
+DROP INDEX IF EXISTS registrations_email;
+CREATE UNIQUE INDEX IF NOT EXISTS registrations_unique_number
+    ON registrations (registration_number);
+CREATE UNIQUE INDEX IF NOT EXISTS registrations_unique_email ON registrations (email);
+"""
+PLAIN_INDEXES = """
+CREATE INDEX IF NOT EXISTS registrations_number ON registrations (registration_number);
+CREATE INDEX IF NOT EXISTS registrations_email ON registrations (email);
+"""
+# The longest a batch that can't be written waits before the next attempt.
+MAX_RETRY_DELAY = 30.0
+
+
+@dataclass(frozen=True)
+class Registration:
+    """The details a member submits through the registration modal."""
+
+    user_id: int
+    name: str
+    registration_number: str
+    email: str
+    phone: str
+    registered_at: str
+
+    @classmethod
+    def from_modal(cls, user_id: int, values: Mapping[str, str]) -> "Registration":
+        """Build a registration from the text values of the registration modal."""
+        return cls(
+            user_id=user_id,
+            name=values["Full Name"].strip(),
+            registration_number=values["Registration Number"].strip(),
+            email=values["Learner's Email Address"].strip().lower(),
+            phone=values["Phone Number"].strip(),
+            registered_at=datetime.now(timezone.utc).isoformat(),
+        )
+
+    def conflicts_with(self, other: "Registration") -> bool:
+        """Whether another member already registered with the same number or email."""
+        return other.user_id != self.user_id and (
+            other.registration_number == self.registration_number
+            or other.email == self.email
+        )
+
+
+class RegistrationStore:
+    """
+    A local SQLite record of member registrations.
+
+    All database work runs on a dedicated thread. New registrations are queued and written
+    by a background task, which commits them in batches of up to `batch_size`. Registrations
+    made by other processes sharing the database are held in memory until they are written.
+    """
+
+    def __init__(
+        self, path: Path, *, batch_size: int = 50, flush_interval: float = 1.0
+    ):
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+        # A single worker thread owns the connection, so it is never shared between threads.
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="registrations"
+        )
+        self._db: sqlite3.Connection | None = None
+        self._queue: asyncio.Queue[Registration] = asyncio.Queue()
+        self._pending: list[Registration] = []
+        self._remote: list[Registration] = []
+        self._writer: asyncio.Task | None = None
+        self._closing = False
+        # Called with every registration held here, and with those released again.
+        self.listeners: list[Callable[[Registration], None]] = []
+        self.release_listeners: list[Callable[[Registration], None]] = []
+
+    async def _run(self, func: Callable[..., T], *args: Any) -> T:
+        return await asyncio.get_running_loop().run_in_executor(
+            self._executor, func, *args
+        )
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._db is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.executescript(SCHEMA)
+            try:
+                self._db.executescript(UNIQUE_INDEXES)
+            except sqlite3.IntegrityError:
+                logger.error(
+                    "Registrations already contain duplicates, uniqueness can't be enforced"
+                )
+                self._db.executescript(PLAIN_INDEXES)
+        return self._db
+
+    def _select(self, query: str, *params: Any) -> list[Registration]:
+        rows = self._connect().execute(query, params).fetchall()
+        return [Registration(*row) for row in rows]
+
+    def _insert(self, registrations: list[Registration]) -> list[Registration]:
+        db = self._connect()
+        columns = ", ".join(field.name for field in fields(Registration))
+        placeholders = ", ".join("?" for _ in fields(Registration))
+        insert = f"INSERT INTO registrations ({columns}) VALUES ({placeholders})"
+        duplicates = []
+        with db:
+            for registration in registrations:
+                try:
+                    db.execute(insert, astuple(registration))
+                    continue
+                except sqlite3.IntegrityError:
+                    pass
+
+                match = (registration.registration_number, registration.email)
+                owners = db.execute(
+                    "SELECT DISTINCT user_id FROM registrations"
+                    " WHERE registration_number = ? OR email = ?",
+                    match,
+                ).fetchall()
+                if owners != [(registration.user_id,)]:
+                    duplicates.append(registration)
+                    continue
+
+                # Registering again replaces the member's own earlier registration.
+                db.execute(
+                    "DELETE FROM registrations WHERE registration_number = ? OR email = ?",
+                    match,
+                )
+                db.execute(insert, astuple(registration))
+        return duplicates
+
+    def _hold(self, registration: Registration) -> None:
+        self._pending.append(registration)
+        for listener in self.listeners:
+            listener(registration)
+
+    def reserve(self, registration: Registration) -> bool:
+        """Hold a registration as pending, unless another member's pending one conflicts."""
+        if any(map(registration.conflicts_with, (*self._pending, *self._remote))):
+            return False
+        self._hold(registration)
+        return True
+
+    def release(self, registration: Registration) -> None:
+        """Drop a reserved registration that won't be added after all."""
+        self._pending.remove(registration)
+        for listener in self.release_listeners:
+            listener(registration)
+
+    def add(self, registration: Registration) -> None:
+        """Queue a registration, reserved or not, to be written with the next batch."""
+        if registration not in self._pending:
+            self._hold(registration)
+        self._queue.put_nowait(registration)
+
+        if self._writer is None or self._writer.done():
+            self._writer = asyncio.create_task(self._write_batches())
+
+    async def _write_batches(self) -> None:
+        delay = self.flush_interval
+        while not self._queue.empty():
+            batch = [await self._queue.get()]
+            deadline = asyncio.get_running_loop().time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - asyncio.get_running_loop().time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                duplicates = await self._run(self._insert, batch)
+            except sqlite3.Error as error:
+                if self._closing:
+                    logger.error(
+                        f"Failed to write {len(batch)} registrations before closing: {error}"
+                    )
+                    for registration in batch:
+                        self._pending.remove(registration)
+                    continue
+
+                # Most likely the database is locked; the batch stays pending until written.
+                logger.warning(
+                    f"Failed to write {len(batch)} registrations ({error}), "
+                    f"retrying in {delay:.1f}s"
+                )
+                for registration in batch:
+                    self._queue.put_nowait(registration)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, MAX_RETRY_DELAY)
+                continue
+
+            delay = self.flush_interval
+            for duplicate in duplicates:
+                logger.error(
+                    f"Registration by {duplicate.user_id} not recorded, "
+                    "another member already registered with the same details"
+                )
+            for registration in batch:
+                self._pending.remove(registration)
+
+    def add_remote(self, registration: Registration, *, hold: float = 30.0) -> None:
+        """Hold a registration made by another process until it must have been written."""
+        self._remote.append(registration)
+        asyncio.get_running_loop().call_later(hold, self.remove_remote, registration)
+
+    def remove_remote(self, registration: Registration) -> None:
+        """Stop holding a registration made by another process."""
+        if registration in self._remote:
+            self._remote.remove(registration)
+
+    async def find_duplicate(self, registration: Registration) -> Registration | None:
+        """Find a registration by another member with the same number or email."""
+        for pending in (*self._pending, *self._remote):
+            if registration.conflicts_with(pending):
+                return pending
+
+        matches = await self._run(
+            self._select,
+            "SELECT * FROM registrations WHERE (registration_number = ? OR email = ?)"
+            " AND user_id != ? LIMIT 1",
+            registration.registration_number,
+            registration.email,
+            registration.user_id,
+        )
+        return matches[0] if matches else None
+
+    async def get(self, user_id: int) -> list[Registration]:
+        """Get every registration submitted by a member, oldest first."""
+        return await self._run(
+            self._select,
+            "SELECT * FROM registrations WHERE user_id = ? ORDER BY registered_at",
+            user_id,
+        )
+
+    async def close(self) -> None:
+        """Write out anything still queued and close the database."""
+        # Batches that fail now get no more attempts, so closing can't hang.
+        self._closing = True
+        if self._writer is not None:
+            await self._writer
+
+        def _close() -> None:
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+        await self._run(_close)
+        self._executor.shutdown()
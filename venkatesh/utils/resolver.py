@@ -0,0 +1,110 @@
+from collections.abc import Iterable
+
+from disnake import Forbidden, HTTPException, NotFound, Role
+from disnake.abc import GuildChannel
+from disnake.ext import commands
+from loguru import logger
+
+
+def constant_ids(namespace: type) -> dict[str, int]:
+    """Map each public ID attribute of a constants namespace to its value."""
+    return {
+        name: value
+        for name, value in vars(namespace).items()
+        if not name.startswith("_") and isinstance(value, int)
+    }
+
+
+class Resolver:
+    """
+    Serve the channels and roles named in the config from memory.
+
+    Everything is resolved once when the bot becomes ready. Entries are dropped when Discord
+    reports them as updated or deleted, and are re-resolved from the gateway cache on the
+    next lookup, so hot paths never need a REST round-trip for these objects. A config
+    reload resolves the new IDs straight away.
+    """
+
+    def __init__(self, bot: commands.Bot):
+        self.bot = bot
+        self.channels: dict[int, GuildChannel] = {}
+        self.roles: dict[int, Role] = {}
+
+        bot.add_listener(self.warm, "on_ready")
+        bot.add_listener(self.warm, "on_config_reload")
+        bot.add_listener(self.on_guild_channel_update)
+        bot.add_listener(self.on_guild_channel_delete)
+        bot.add_listener(self.on_guild_role_update)
+        bot.add_listener(self.on_guild_role_delete)
+
+    async def warm(self, *_) -> None:
+        """Resolve every channel and role ID named in the config."""
+        config = self.bot.config
+        for channel_id in vars(config.channels).values():
+            await self.fetch_channel(channel_id)
+
+        for role_id in (*vars(config.roles).values(), *config.department_roles):
+            if self.get_role(role_id) is None:
+                logger.error(f"Failed to get role with ID ({role_id})")
+
+        logger.info(
+            f"Resolved {len(self.channels)} channels and {len(self.roles)} roles"
+        )
+
+    def get_channel(self, channel_id: int) -> GuildChannel | None:
+        """Get a channel from memory, falling back to the gateway cache."""
+        if (channel := self.channels.get(channel_id)) is not None:
+            return channel
+
+        if (channel := self.bot.get_channel(channel_id)) is not None:
+            self.channels[channel_id] = channel
+        return channel
+
+    async def fetch_channel(self, channel_id: int) -> GuildChannel | None:
+        """Get a channel from memory, falling back to the API if it isn't cached."""
+        if (channel := self.get_channel(channel_id)) is not None:
+            return channel
+
+        try:
+            channel = await self.bot.fetch_channel(channel_id)
+        except (NotFound, Forbidden, HTTPException) as error:
+            logger.error(f"Failed to get channel with ID ({channel_id}): {error}")
+            return None
+
+        self.channels[channel_id] = channel
+        return channel
+
+    def get_role(self, role_id: int) -> Role | None:
+        """Get a role from memory, falling back to the gateway cache."""
+        if (role := self.roles.get(role_id)) is not None:
+            return role
+
+        for guild in self.bot.guilds:
+            if (role := guild.get_role(role_id)) is not None:
+                self.roles[role_id] = role
+                return role
+        return None
+
+    def get_roles(self, role_ids: Iterable[int]) -> list[Role]:
+        """Get every role in `role_ids` that could be resolved."""
+        return [
+            role for role_id in role_ids if (role := self.get_role(role_id)) is not None
+        ]
+
+    async def on_guild_channel_update(
+        self, before: GuildChannel, after: GuildChannel
+    ) -> None:
+        """Invalidate an updated channel."""
+        self.channels.pop(after.id, None)
+
+    async def on_guild_channel_delete(self, channel: GuildChannel) -> None:
+        """Invalidate a deleted channel."""
+        self.channels.pop(channel.id, None)
+
+    async def on_guild_role_update(self, before: Role, after: Role) -> None:
+        """Invalidate an updated role."""
+        self.roles.pop(after.id, None)
+
+    async def on_guild_role_delete(self, role: Role) -> None:
+        """Invalidate a deleted role."""
+        self.roles.pop(role.id, None)
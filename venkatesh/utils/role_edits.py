@@ -0,0 +1,103 @@
+import asyncio
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+
+from disnake import Member, Object
+from disnake.abc import Snowflake
+from loguru import logger
+
+
+@dataclass
+class _PendingEdit:
+    member: Member
+    future: asyncio.Future[bool]
+    add: set[int] = field(default_factory=set)
+    remove: set[int] = field(default_factory=set)
+    reason: str | None = None
+
+
+class RoleEditor:
+    """
+    Apply role changes to members in a single API call each.
+
+    Changes requested for the same member within `delay` seconds of each other are merged,
+    later requests winning over earlier ones, and applied together with one `Member.edit`.
+    No call is made if the member already has the resulting set of roles.
+    """
+
+    def __init__(self, delay: float = 0.5):
+        self.delay = delay
+        self._pending: dict[int, _PendingEdit] = {}
+        self._locks: dict[int, asyncio.Lock] = {}
+        # Roles returned by the last edit, for members with another edit already queued.
+        self._latest: dict[int, set[int]] = {}
+        # Only the flush task resolves an edit's future, so it must not be garbage collected.
+        self._tasks: set[asyncio.Task] = set()
+
+    async def apply(
+        self,
+        member: Member,
+        *,
+        add: Iterable[Snowflake | None] = (),
+        remove: Iterable[Snowflake | None] = (),
+        reason: str | None = None,
+    ) -> bool:
+        """Add and remove roles from a member, returning whether their roles changed."""
+        # Roles that couldn't be resolved come through as None, and are left out.
+        if None in (add := list(add)) or None in (remove := list(remove)):
+            logger.error(f"Skipping roles missing from the edit for {member.id}")
+            add = [role for role in add if role is not None]
+            remove = [role for role in remove if role is not None]
+
+        edit = self._pending.get(member.id)
+        if edit is None:
+            edit = _PendingEdit(member, asyncio.get_running_loop().create_future())
+            self._pending[member.id] = edit
+            task = asyncio.create_task(self._flush_later(member.id))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        else:
+            edit.member = member
+
+        for role in remove:
+            edit.add.discard(role.id)
+            edit.remove.add(role.id)
+        for role in add:
+            edit.remove.discard(role.id)
+            edit.add.add(role.id)
+        edit.reason = reason or edit.reason
+
+        return await asyncio.shield(edit.future)
+
+    async def _flush_later(self, member_id: int) -> None:
+        await asyncio.sleep(self.delay)
+
+        lock = self._locks.setdefault(member_id, asyncio.Lock())
+        async with lock:
+            edit = self._pending.pop(member_id)
+            try:
+                edit.future.set_result(await self._edit(edit))
+            except Exception as error:
+                edit.future.set_exception(error)
+
+        if member_id not in self._pending:
+            self._locks.pop(member_id, None)
+            self._latest.pop(member_id, None)
+
+    async def _edit(self, edit: _PendingEdit) -> bool:
+        current = self._latest.pop(edit.member.id, None)
+        if current is None:
+            current = {role.id for role in edit.member.roles if not role.is_default()}
+
+        target = (current - edit.remove) | edit.add
+        if target == current:
+            return False
+
+        updated = await edit.member.edit(
+            roles=[Object(role_id) for role_id in target], reason=edit.reason
+        )
+        if updated is not None and edit.member.id in self._pending:
+            self._latest[edit.member.id] = {
+                role.id for role in updated.roles if not role.is_default()
+            }
+        return True
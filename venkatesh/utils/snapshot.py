@@ -0,0 +1,212 @@
+import asyncio
+import gzip
+import json
+import os
+import time
+from collections.abc import Iterable
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from disnake import DiscordException, Guild, Member, RawGuildMemberRemoveEvent, Role
+from disnake.ext import commands
+from loguru import logger
+
+VERSION = 1
+
+
+def _role_ids(member: Member) -> frozenset[int]:
+    return frozenset(role.id for role in member.roles if not role.is_default())
+
+
+class GuildSnapshot:
+    """
+    The role IDs of every member, kept on disk so they're known straight after a restart.
+
+    With a snapshot on disk the bot skips chunking before it's ready, and chunks each guild
+    in the background afterwards, reconciling the snapshot with the fresh member list. Until
+    then `members_of` answers from the snapshot, which is all the migration dry run needs;
+    member events and leaves don't depend on it, as they're handled from the raw events.
+    The snapshot is kept up to date from those events too, changing only the members an
+    event is about, and is saved every `interval` seconds while it has changes, and when
+    the bot closes.
+    """
+
+    def __init__(self, bot: commands.Bot, path: Path, *, interval: float = 300.0):
+        self.bot = bot
+        self.path = path
+        self.interval = interval
+        self.members: dict[int, dict[int, frozenset[int]]] = {}
+        # Guilds whose members have been checked against a full chunk since startup.
+        self.reconciled: set[int] = set()
+        self.dirty = False
+        self._saver: asyncio.Task | None = None
+        self._reconciler: asyncio.Task | None = None
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="snapshot"
+        )
+
+        self._load()
+        bot.add_listener(self.on_member_join)
+        bot.add_listener(self.on_raw_member_update)
+        bot.add_listener(self.on_raw_member_remove)
+        bot.add_listener(self.on_guild_role_delete)
+        bot.add_listener(self.on_guild_remove)
+
+    def _load(self) -> None:
+        if not self.path.exists():
+            return
+
+        try:
+            with gzip.open(self.path, "rt", encoding="utf-8") as file:
+                data = json.load(file)
+        except (OSError, ValueError) as error:
+            logger.error(f"Ignoring unreadable guild snapshot: {error}")
+            return
+        if data.get("version") != VERSION:
+            return
+
+        self.members = {
+            int(guild_id): {
+                int(member_id): frozenset(roles) for member_id, roles in members.items()
+            }
+            for guild_id, members in data["members"].items()
+        }
+        age = time.time() - data["saved_at"]
+        logger.info(
+            f"Loaded a snapshot of {sum(map(len, self.members.values()))} members "
+            f"saved {age:.0f}s ago"
+        )
+
+    def _write(self, data: dict) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(".tmp")
+        with gzip.open(temporary, "wt", encoding="utf-8", compresslevel=6) as file:
+            json.dump(data, file, separators=(",", ":"))
+        with open(temporary, "rb") as file:
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+    async def save(self) -> None:
+        """Write the snapshot to disk, off the event loop."""
+        # Copied on the loop, so events arriving during the write can't change it underneath.
+        data = {
+            "version": VERSION,
+            "saved_at": time.time(),
+            "members": {
+                guild_id: {
+                    member_id: sorted(roles) for member_id, roles in members.items()
+                }
+                for guild_id, members in self.members.items()
+            },
+        }
+        self.dirty = False
+        try:
+            await asyncio.get_running_loop().run_in_executor(
+                self._executor, self._write, data
+            )
+        except OSError as error:
+            self.dirty = True
+            logger.error(f"Failed to save the guild snapshot: {error}")
+
+    def start(self) -> None:
+        """Start saving the snapshot periodically."""
+        if self._saver is None or self._saver.done():
+            self._saver = asyncio.create_task(self._save_periodically())
+
+    async def _save_periodically(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            if self.dirty:
+                await self.save()
+
+    def members_of(self, guild: Guild) -> dict[int, frozenset[int]]:
+        """Every member of a guild with their role IDs, from the cache once it's complete."""
+        if guild.chunked or guild.id not in self.members:
+            return {member.id: _role_ids(member) for member in guild.members}
+        return self.members[guild.id]
+
+    def _set(self, guild_id: int, member_id: int, roles: frozenset[int]) -> None:
+        members = self.members.setdefault(guild_id, {})
+        if members.get(member_id) != roles:
+            members[member_id] = roles
+            self.dirty = True
+
+    async def reconcile(self, guild: Guild) -> None:
+        """Chunk a guild, then bring its snapshot in line with the fresh member list."""
+        start = time.perf_counter()
+        if not guild.chunked:
+            await guild.chunk()
+
+        fresh = {member.id: _role_ids(member) for member in guild.members}
+        members = self.members.setdefault(guild.id, {})
+        removed = members.keys() - fresh.keys()
+        changed = [
+            member_id
+            for member_id, roles in fresh.items()
+            if members.get(member_id) != roles
+        ]
+        for member_id in removed:
+            del members[member_id]
+        for member_id in changed:
+            members[member_id] = fresh[member_id]
+
+        self.reconciled.add(guild.id)
+        self.dirty |= bool(removed or changed)
+        logger.info(
+            f"Reconciled {guild.name} after {time.perf_counter() - start:.1f}s: "
+            f"{len(changed)} members added or changed, {len(removed)} removed"
+        )
+
+    def reconcile_all(self, guilds: Iterable[Guild]) -> None:
+        """Reconcile every guild in the background, one at a time."""
+
+        async def run() -> None:
+            for guild in guilds:
+                if guild.id in self.reconciled:
+                    continue
+                try:
+                    await self.reconcile(guild)
+                except (DiscordException, asyncio.TimeoutError) as error:
+                    logger.error(
+                        f"Failed to reconcile the snapshot of {guild.name}: {error}"
+                    )
+
+        self._reconciler = asyncio.create_task(run())
+
+    async def on_member_join(self, member: Member) -> None:
+        """Adds a member who joined."""
+        self._set(member.guild.id, member.id, _role_ids(member))
+
+    async def on_raw_member_update(self, member: Member) -> None:
+        """Updates the roles of a member, cached or not."""
+        self._set(member.guild.id, member.id, _role_ids(member))
+
+    async def on_raw_member_remove(self, payload: RawGuildMemberRemoveEvent) -> None:
+        """Drops a member who left."""
+        if (
+            self.members.get(payload.guild_id, {}).pop(payload.user.id, None)
+            is not None
+        ):
+            self.dirty = True
+
+    async def on_guild_role_delete(self, role: Role) -> None:
+        """Takes a deleted role away from the members who had it."""
+        members = self.members.get(role.guild.id, {})
+        for member_id, roles in members.items():
+            if role.id in roles:
+                members[member_id] = roles - {role.id}
+                self.dirty = True
+
+    async def on_guild_remove(self, guild: Guild) -> None:
+        """Forgets a guild the bot left."""
+        if self.members.pop(guild.id, None) is not None:
+            self.dirty = True
+
+    async def close(self) -> None:
+        """Stop reconciling and saving periodically, and save any changes."""
+        for task in (self._reconciler, self._saver):
+            if task is not None:
+                task.cancel()
+        if self.dirty:
+            await self.save()
+        self._executor.shutdown(wait=True)
@@ -0,0 +1,245 @@
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections.abc import Awaitable, Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any
+
+from disnake import Embed
+from loguru import logger
+
+from .work_queue import is_retriable
+
+# Limits Discord enforces on an embed, by the length of each part.
+EMBED_LIMITS = {
+    "title": 256,
+    "description": 4096,
+    "field name": 256,
+    "field value": 1024,
+}
+MAX_EMBED_FIELDS = 25
+MAX_EMBED_LENGTH = 6000
+
+
+def check_embed(embed: dict[str, Any]) -> None:
+    """Raise `ValueError` for an embed Discord would reject, since it can never be delivered."""
+    parts = [("title", embed.get("title")), ("description", embed.get("description"))]
+    fields = embed.get("fields", [])
+    if len(fields) > MAX_EMBED_FIELDS:
+        raise ValueError(f"embed has {len(fields)} fields, over {MAX_EMBED_FIELDS}")
+    for item in fields:
+        for part in ("name", "value"):
+            text = str(item.get(part, "")).strip()
+            if not text:
+                raise ValueError(f"embed field has an empty {part}")
+            parts.append((f"field {part}", text))
+
+    total = sum(len(str(text)) for _, text in parts if text)
+    for name, text in parts:
+        if text and len(str(text)) > EMBED_LIMITS[name]:
+            raise ValueError(f"embed {name} is over {EMBED_LIMITS[name]} characters")
+    if total > MAX_EMBED_LENGTH:
+        raise ValueError(f"embed is {total} characters long, over {MAX_EMBED_LENGTH}")
+
+
+@dataclass
+class SpooledMessage:
+    """A message waiting to be delivered to a channel."""
+
+    channel_id: int
+    content: str | None
+    embeds: list[dict[str, Any]]
+    id: str = field(default_factory=lambda: uuid.uuid4().hex)
+    queued_at: float = field(default_factory=time.time)
+
+
+class MessageSpool:
+    """
+    Deliver log and audit messages through an append-only journal on disk.
+
+    Every message is written to a JSONL file and fsynced before `post` returns, with all the
+    posts made while a sync is running sharing the next one. A drainer task sends the
+    messages in order, at most one every `interval` seconds, and appends an acknowledgement
+    for each one delivered. Anything unacknowledged when the bot stops is sent again on the
+    next startup, so a message is delivered at least once.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        send: Callable[[SpooledMessage], Awaitable[object]],
+        *,
+        interval: float = 1.0,
+        max_backoff: float = 60.0,
+        compact_after: int = 1000,
+    ):
+        self.path = path
+        self.send = send
+        self.interval = interval
+        self.max_backoff = max_backoff
+        self.compact_after = compact_after
+
+        self.pending: dict[str, SpooledMessage] = {}
+        self._acked = 0
+        self._lines: list[str] = []
+        self._synced: asyncio.Future | None = None
+        self._flushing: asyncio.Task | None = None
+        self._wake = asyncio.Event()
+        self._drainer: asyncio.Task | None = None
+        # One thread does all the file writes, so appends never interleave.
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="spool")
+
+        self._load()
+
+    def _load(self) -> None:
+        """Read back the messages that were never acknowledged, and compact the journal."""
+        if self.path.exists():
+            with self.path.open(encoding="utf-8") as file:
+                for line in file:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # A line torn by a crash mid-write was never synced, so never posted.
+                        continue
+                    if record["op"] == "message":
+                        self.pending[record["id"]] = SpooledMessage(**record["message"])
+                    elif record["op"] == "ack":
+                        self.pending.pop(record["id"], None)
+
+        if self.pending:
+            logger.info(f"Replaying {len(self.pending)} undelivered spooled messages")
+        self._rewrite(list(self.pending.values()))
+
+    def _rewrite(self, messages: list[SpooledMessage]) -> None:
+        """Replace the journal with one holding only the given messages."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        temporary = self.path.with_suffix(".tmp")
+        with temporary.open("w", encoding="utf-8") as file:
+            for message in messages:
+                file.write(self._record("message", message))
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temporary, self.path)
+
+    @staticmethod
+    def _record(op: str, message: SpooledMessage) -> str:
+        record = {"op": op, "id": message.id}
+        if op == "message":
+            record["message"] = asdict(message)
+        return json.dumps(record, separators=(",", ":")) + "\n"
+
+    def _append(self, lines: list[str]) -> None:
+        with self.path.open("a", encoding="utf-8") as file:
+            file.writelines(lines)
+            file.flush()
+            os.fsync(file.fileno())
+
+    async def _write(self, line: str) -> None:
+        """Append a line to the journal, returning once it has been synced to disk."""
+        self._lines.append(line)
+        if self._synced is None:
+            self._synced = asyncio.get_running_loop().create_future()
+        synced = self._synced
+
+        if self._flushing is None or self._flushing.done():
+            self._flushing = asyncio.create_task(self._flush())
+        await asyncio.shield(synced)
+
+    async def _flush(self) -> None:
+        loop = asyncio.get_running_loop()
+        while self._lines:
+            lines, self._lines = self._lines, []
+            synced, self._synced = self._synced, None
+            try:
+                await loop.run_in_executor(self._executor, self._append, lines)
+            except OSError as error:
+                synced.set_exception(error)
+            else:
+                synced.set_result(None)
+
+    async def post(
+        self,
+        channel_id: int,
+        content: str | None = None,
+        *,
+        embed: Embed | None = None,
+        embeds: list[Embed] | None = None,
+    ) -> None:
+        """
+        Write a message to the spool, to be delivered by the drainer.
+
+        Raises `ValueError` for an embed Discord would reject, rather than spooling a message
+        that would only be dropped, and `OSError` if the message couldn't be written.
+        """
+        embeds = [embed] if embed is not None else embeds or []
+        message = SpooledMessage(
+            channel_id, content, [item.to_dict() for item in embeds]
+        )
+        for item in message.embeds:
+            check_embed(item)
+        # Added before the write, so a compaction running meanwhile keeps the message.
+        self.pending[message.id] = message
+        try:
+            await self._write(self._record("message", message))
+        except OSError:
+            # The caller is told it failed, so it mustn't be delivered behind its back.
+            self.pending.pop(message.id, None)
+            raise
+        self._wake.set()
+
+    def start(self) -> None:
+        """Start delivering spooled messages, including any left from the last run."""
+        if self._drainer is None or self._drainer.done():
+            self._drainer = asyncio.create_task(self._drain())
+
+    async def _drain(self) -> None:
+        backoff = 0.0
+        while True:
+            if not self.pending:
+                self._wake.clear()
+                await self._wake.wait()
+                continue
+
+            message = next(iter(self.pending.values()))
+            try:
+                await self.send(message)
+            except Exception as error:
+                if not is_retriable(error):
+                    logger.error(
+                        f"Dropping spooled message for channel {message.channel_id}: {error}"
+                    )
+                else:
+                    backoff = min(max(backoff * 2, self.interval), self.max_backoff)
+                    logger.warning(
+                        f"Failed to deliver spooled message ({error}), retrying in {backoff:.1f}s"
+                    )
+                    await asyncio.sleep(backoff)
+                    continue
+
+            backoff = 0.0
+            del self.pending[message.id]
+            try:
+                await self._write(self._record("ack", message))
+                self._acked += 1
+                if self._acked >= self.compact_after:
+                    self._acked = 0
+                    # Queued behind any pending appends, with a snapshot taken after them.
+                    await asyncio.get_running_loop().run_in_executor(
+                        self._executor, self._rewrite, list(self.pending.values())
+                    )
+            except OSError as error:
+                # Without its ack the message is sent again after a restart, never lost.
+                logger.error(f"Failed to update the spool journal: {error}")
+            await asyncio.sleep(self.interval)
+
+    async def close(self) -> None:
+        """Stop delivering, leaving anything undelivered for the next startup."""
+        if self._drainer is not None:
+            self._drainer.cancel()
+        if self._flushing is not None:
+            await self._flushing
+        self._executor.shutdown(wait=True)
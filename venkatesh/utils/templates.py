@@ -0,0 +1,176 @@
+import asyncio
+import io
+import json
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+from disnake import Embed, File, Message, TextChannel
+from disnake.ui import Button
+from loguru import logger
+
+from ..constants import Colors
+
+
+def _format(value: Any, values: dict[str, Any]) -> Any:
+    if isinstance(value, str):
+        return value.format_map(values)
+    if isinstance(value, dict):
+        return {key: _format(item, values) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_format(item, values) for item in value]
+    return value
+
+
+@dataclass(frozen=True)
+class Template:
+    """A set of embeds loaded from a template file, with its assets held in memory."""
+
+    name: str
+    embeds: list[dict[str, Any]]
+    assets: dict[str, bytes]
+
+    def render(self, **values: Any) -> list[Embed]:
+        """Build the embeds, filling in `{placeholders}` with the given values."""
+        embeds = []
+        for data in _format(self.embeds, values):
+            if isinstance(data.get("color"), str):
+                data["color"] = getattr(Colors, data["color"])
+            for key in ("thumbnail", "image"):
+                if "file" in data.get(key, {}):
+                    data[key] = {"url": f"attachment://{data[key]['file']}"}
+            embeds.append(Embed.from_dict(data))
+        return embeds
+
+    def files(self) -> list[File]:
+        """Fresh file objects for the assets used by the embeds."""
+        return [
+            File(io.BytesIO(data), filename=name) for name, data in self.assets.items()
+        ]
+
+
+class TemplateRegistry:
+    """Load embed templates once, and reload them whenever their files change."""
+
+    def __init__(self, directory: Path, assets: Path):
+        self.directory = directory
+        self.assets = assets
+        self.templates: dict[str, Template] = {}
+        self._mtimes: dict[Path, float] = {}
+
+    def __getitem__(self, name: str) -> Template:
+        return self.templates[name]
+
+    def _watched(self) -> dict[Path, float]:
+        paths = [*self.directory.glob("*.json"), *self.assets.glob("*.png")]
+        return {path: path.stat().st_mtime for path in paths}
+
+    def load(self) -> None:
+        """Read every template and the assets they reference."""
+        templates = {}
+        for path in sorted(self.directory.glob("*.json")):
+            embeds = json.loads(path.read_text(encoding="utf-8"))["embeds"]
+            assets = {
+                data[key]["file"]: (self.assets / data[key]["file"]).read_bytes()
+                for data in embeds
+                for key in ("thumbnail", "image")
+                if "file" in data.get(key, {})
+            }
+            templates[path.stem] = Template(path.stem, embeds, assets)
+
+        self.templates = templates
+        self._mtimes = self._watched()
+
+    async def watch(self, interval: float = 5.0) -> None:
+        """Reload the templates whenever a template or asset file changes."""
+        while True:
+            await asyncio.sleep(interval)
+            if self._watched() == self._mtimes:
+                continue
+
+            try:
+                self.load()
+            except (OSError, ValueError, KeyError) as error:
+                logger.error(f"Failed to reload embed templates: {error}")
+                self._mtimes = (
+                    self._watched()
+                )  # Don't retry until the files change again.
+            else:
+                logger.info(f"Reloaded {len(self.templates)} embed templates")
+
+
+def _comparable_embeds(embeds: list[Embed]) -> list[dict[str, Any]]:
+    comparable = []
+    for embed in embeds:
+        data = embed.to_dict()
+        data.pop("type", None)
+        for key in ("author", "footer"):
+            if key in data:
+                data[key] = {
+                    k: v for k, v in data[key].items() if not k.startswith("proxy_")
+                }
+        for key in ("thumbnail", "image"):
+            if key in data:
+                # Attachments come back as CDN links, so only the file name can be compared.
+                data[key] = data[key]["url"].rpartition("/")[2].partition("?")[0]
+        comparable.append(data)
+    return comparable
+
+
+def _same_buttons(message: Message, buttons: list[Button]) -> bool:
+    current = [
+        (child.custom_id, child.label, child.disabled)
+        for row in message.components
+        for child in row.children
+    ]
+    return current == [
+        (button.custom_id, button.label, button.disabled) for button in buttons
+    ]
+
+
+async def publish(
+    channel: TextChannel,
+    template: Template,
+    embeds: list[Embed],
+    buttons: list[Button] | None = None,
+    history_limit: int = 50,
+) -> str:
+    """
+    Keep a single up-to-date copy of a template's message in a channel.
+
+    The bot's existing message with the same leading embed title is edited in place, or left
+    alone if nothing changed. Returns `sent`, `edited` or `unchanged`.
+    """
+    message = None
+    async for candidate in channel.history(limit=history_limit):
+        if (
+            candidate.author.id == channel.guild.me.id
+            and candidate.embeds
+            and candidate.embeds[0].title == embeds[0].title
+        ):
+            message = candidate
+            break
+
+    buttons = buttons or []
+    if message is None:
+        await channel.send(embeds=embeds, files=template.files(), components=buttons)
+        return "sent"
+
+    current_assets = {
+        attachment.filename: attachment.size for attachment in message.attachments
+    }
+    new_assets = {name: len(data) for name, data in template.assets.items()}
+    if (
+        _comparable_embeds(message.embeds) == _comparable_embeds(embeds)
+        and current_assets == new_assets
+        and _same_buttons(message, buttons)
+    ):
+        return "unchanged"
+
+    if current_assets == new_assets:
+        await message.edit(embeds=embeds, components=buttons)
+    else:
+        await message.edit(
+            embeds=embeds, files=template.files(), attachments=[], components=buttons
+        )
+    return "edited"
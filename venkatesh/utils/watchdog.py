@@ -0,0 +1,107 @@
+import asyncio
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from collections.abc import Callable
+from dataclasses import dataclass
+
+from loguru import logger
+
+
+@dataclass
+class Stall:
+    """A time the event loop was blocked, and what it was running."""
+
+    at: float
+    lag: float
+    task: str
+    stack: str
+
+
+def _describe(task: asyncio.Task | None) -> str:
+    if task is None:
+        return "a callback outside any task"
+    coro = task.get_coro()
+    return f"{task.get_name()} ({getattr(coro, '__qualname__', coro)})"
+
+
+class LoopWatchdog:
+    """
+    Measure event loop lag, and log what was blocking the loop whenever it stalls.
+
+    A task on the loop beats every `interval` seconds and reports how late each beat was.
+    A thread watches the beats, and once the loop has gone `threshold` seconds past one, logs
+    the stack of the loop's thread and the task it was running, once per stall. The thread
+    can look while the loop is blocked, which a task on the loop never could.
+    """
+
+    def __init__(self, *, interval: float = 0.5, threshold: float = 1.0):
+        self.interval = interval
+        self.threshold = threshold
+        # Called on the loop with the lag of every beat.
+        self.listeners: list[Callable[[float], None]] = []
+        self.stalls: deque[Stall] = deque(maxlen=10)
+        self.max_lag = 0.0
+        self._beat = time.monotonic()
+        # The beat the latest stall came after, so each stall is only logged once.
+        self._stalled_beat: float | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._loop_thread: int | None = None
+        self._task: asyncio.Task | None = None
+        self._thread: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        """Start measuring the running loop."""
+        if self._task is not None:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._task = asyncio.create_task(self._heartbeat())
+        self._thread = threading.Thread(
+            target=self._watch, name="loop-watchdog", daemon=True
+        )
+        self._thread.start()
+
+    async def _heartbeat(self) -> None:
+        self._beat = time.monotonic()
+        while True:
+            before = self._beat
+            await asyncio.sleep(self.interval)
+            self._beat = time.monotonic()
+
+            lag = max(self._beat - before - self.interval, 0.0)
+            self.max_lag = max(self.max_lag, lag)
+            # The watcher logged the stall while it was going on; its full length is known now.
+            if before == self._stalled_beat:
+                self.stalls[-1].lag = lag
+            for listener in self.listeners:
+                listener(lag)
+
+    def _watch(self) -> None:
+        while not self._stopped.wait(min(self.interval, self.threshold) / 2):
+            beat = self._beat
+            lag = time.monotonic() - beat - self.interval
+            if lag < self.threshold or beat == self._stalled_beat:
+                continue
+
+            frame = sys._current_frames().get(self._loop_thread)
+            stall = Stall(
+                at=time.time(),
+                lag=lag,
+                task=_describe(asyncio.current_task(self._loop)),
+                stack="".join(traceback.format_stack(frame)) if frame else "",
+            )
+            self.stalls.append(stall)
+            self._stalled_beat = beat
+            logger.warning(
+                f"Event loop blocked for {lag:.2f}s in {stall.task}:\n{stall.stack}"
+            )
+
+    def stop(self) -> None:
+        """Stop measuring."""
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
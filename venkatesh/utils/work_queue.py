@@ -0,0 +1,144 @@
+import asyncio
+import random
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+
+import aiohttp
+from disnake import HTTPException
+from loguru import logger
+
+from .log import correlated, correlation_id
+
+
+def is_retriable(error: Exception) -> bool:
+    """Whether an error is worth retrying: rate limits, server errors and network failures."""
+    if isinstance(error, HTTPException):
+        return error.status == 429 or error.status >= 500
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, OSError))
+
+
+@dataclass
+class Job:
+    """A unit of background work, and what to do once it finishes or gives up."""
+
+    name: str
+    run: Callable[[], Awaitable[object]]
+    # Called with None on success, or the last error once retries are exhausted.
+    done: Callable[[Exception | None], Awaitable[object]] | None = None
+    attempts: int = 0
+    # Workers outlive the interaction that submitted the job, so its ID is carried over.
+    correlation_id: str | None = None
+
+
+class WorkQueue:
+    """
+    Run side effects of interactions in the background, off the interaction's deadline.
+
+    Jobs wait in a queue of at most `maxsize` and are run by `workers` tasks. Failures that
+    might succeed later are retried up to `retries` times, backing off exponentially with
+    jitter from `base_delay` up to `max_delay` seconds.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        maxsize: int,
+        retries: int = 3,
+        base_delay: float = 1.0,
+        max_delay: float = 30.0,
+    ):
+        self.workers = max(1, workers)
+        self.retries = retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.queue: asyncio.Queue[Job] = asyncio.Queue(max(1, maxsize))
+        # Called with the job name and its outcome: completed, failed, retried or rejected.
+        self.listeners: list[Callable[[str, str], None]] = []
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def busy(self) -> bool:
+        """Whether new jobs would be rejected."""
+        return self.queue.full()
+
+    def submit(
+        self,
+        name: str,
+        run: Callable[[], Awaitable[object]],
+        done: Callable[[Exception | None], Awaitable[object]] | None = None,
+    ) -> bool:
+        """Queue a job, returning False if the queue is full."""
+        self.start()
+        try:
+            self.queue.put_nowait(
+                Job(name, run, done, correlation_id=correlation_id.get())
+            )
+        except asyncio.QueueFull:
+            logger.warning(f"Work queue is full, rejected {name}")
+            self._notify(name, "rejected")
+            return False
+        return True
+
+    def start(self) -> None:
+        """Start the workers, if they aren't running already."""
+        if not self._tasks:
+            self._tasks = [
+                asyncio.create_task(self._work()) for _ in range(self.workers)
+            ]
+
+    def _notify(self, name: str, outcome: str) -> None:
+        for listener in self.listeners:
+            listener(name, outcome)
+
+    async def _work(self) -> None:
+        while True:
+            job = await self.queue.get()
+            try:
+                with correlated(job.correlation_id):
+                    await self._run(job)
+            finally:
+                self.queue.task_done()
+
+    async def _run(self, job: Job) -> None:
+        error = None
+        while True:
+            job.attempts += 1
+            try:
+                await job.run()
+            except Exception as exc:
+                error = exc
+                if job.attempts > self.retries or not is_retriable(exc):
+                    logger.error(
+                        f"{job.name} failed after {job.attempts} attempts: {exc}"
+                    )
+                    self._notify(job.name, "failed")
+                    break
+
+                delay = min(self.base_delay * 2 ** (job.attempts - 1), self.max_delay)
+                delay *= random.uniform(0.5, 1.0)
+                logger.warning(f"{job.name} failed ({exc}), retrying in {delay:.1f}s")
+                self._notify(job.name, "retried")
+                await asyncio.sleep(delay)
+            else:
+                error = None
+                self._notify(job.name, "completed")
+                break
+
+        if job.done is not None:
+            try:
+                await job.done(error)
+            except Exception as exc:
+                logger.error(f"Failed to report the result of {job.name}: {exc}")
+
+    async def close(self, timeout: float = 10.0) -> None:
+        """Give queued jobs a chance to finish, then stop the workers."""
+        if self._tasks:
+            try:
+                await asyncio.wait_for(self.queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"Stopping with {self.queue.qsize()} jobs unfinished")
+
+        for task in self._tasks:
+            task.cancel()
+        self._tasks = []